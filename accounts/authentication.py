@@ -0,0 +1,47 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocation import is_revoked
+from .user_cache import get_user
+
+TOKEN_VERSION_CLAIM = "ver"
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the user through accounts.user_cache
+    and refuses tokens minted before the user's token_version was bumped or
+    revoked one by one (accounts.revocation).
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token):
+            raise AuthenticationFailed(_("Token has been revoked."), code="token_revoked")
+        return token
+
+    def get_user(self, validated_token):
+        return get_token_user(validated_token)
+
+
+def get_token_user(validated_token):
+    """The active user `validated_token` was issued to, at its token_version."""
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError as e:
+        raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    user = get_user(user_id)
+    if user is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+    # Tokens issued before the claim existed count as version 0.
+    if validated_token.get(TOKEN_VERSION_CLAIM, 0) != user.token_version:
+        raise AuthenticationFailed(_("Token has been revoked."), code="token_revoked")
+
+    return user
@@ -1,6 +1,8 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
 
+from .user_cache import get_user as get_cached_user
+
 User = get_user_model()
 
 class EmailBackend(ModelBackend):
@@ -16,7 +18,7 @@ class EmailBackend(ModelBackend):
             return None
         
         try:
-            user = User.objects.get(email=email_to_use)
+            user = User.objects.filter_email(email_to_use).get()
         except User.DoesNotExist:
             # Run the default password hasher once to reduce the timing
             # difference between an existing and a nonexistent user
@@ -28,7 +30,4 @@ class EmailBackend(ModelBackend):
         return None
     
     def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
\ No newline at end of file
+        return get_cached_user(user_id)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
-from .models import User, Role, ArtisanStory
+from .models import DUPLICATE_EMAIL_MESSAGE, User, Role, ArtisanStory
 
 
 class RegisterForm(UserCreationForm):
@@ -14,8 +14,8 @@ class RegisterForm(UserCreationForm):
 
     def clean_email(self):
         email = self.cleaned_data.get("email")
-        if email and User.objects.filter(email__iexact=email).exists():
-            raise forms.ValidationError("A user with this email already exists.")
+        if email and User.objects.filter_email(email).exists():
+            raise forms.ValidationError(DUPLICATE_EMAIL_MESSAGE)
         return email
 
     class Meta:
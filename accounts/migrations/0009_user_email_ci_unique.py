@@ -0,0 +1,57 @@
+# Generated by Django 6.0.4 on 2026-10-17 12:40
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_email_collisions(apps, schema_editor):
+    """
+    Refuse to continue while emails exist that differ only in case: the
+    unique index below could not be built, and which account should keep the
+    address is a decision for a person, not for a migration.
+    """
+    User = apps.get_model("accounts", "User")
+    collisions = list(
+        User.objects.annotate(email_lower=Lower("email"))
+        .values("email_lower")
+        .annotate(accounts=Count("id"))
+        .filter(accounts__gt=1)
+        .values_list("email_lower", flat=True)
+    )
+    if not collisions:
+        return
+
+    lines = []
+    for email_lower in sorted(collisions):
+        users = (
+            User.objects.annotate(email_lower=Lower("email"))
+            .filter(email_lower=email_lower)
+            .order_by("id")
+            .values_list("id", "email", "last_login")
+        )
+        lines.append(
+            "  " + ", ".join(f"#{pk} {email} (last login {last_login or 'never'})" for pk, email, last_login in users)
+        )
+    raise RuntimeError(
+        f"{len(collisions)} email address(es) are registered more than once in different letter case:\n"
+        + "\n".join(lines)
+        + "\nMerge or rename these accounts, then run the migration again."
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_revokedtoken'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_email_collisions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='user_email_ci_unique', violation_error_message='A user with this email already exists.'),
+        ),
+    ]
@@ -1,5 +1,9 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Lower
+
+DUPLICATE_EMAIL_MESSAGE = "A user with this email already exists."
 
 
 class UserManager(BaseUserManager):
@@ -19,6 +23,17 @@ class UserManager(BaseUserManager):
 
         return self.create_user(email, password, **extra_fields)
 
+    def filter_email(self, email):
+        """
+        Users whose email matches `email` ignoring case. Compares LOWER(email)
+        so the lookup is served by the user_email_ci_unique index (an iexact
+        lookup compiles to UPPER() and would scan the table).
+        """
+        return self.alias(email_lower=Lower("email")).filter(email_lower=Lower(Value(email)))
+
+    def get_by_natural_key(self, username):
+        return self.filter_email(username).get()
+
 
 class Role(models.TextChoices):
     ADMIN = "ADMIN", "Admin"
@@ -27,6 +42,11 @@ class Role(models.TextChoices):
     CONSULTANT = "CONSULTANT", "Cultural Consultant"
 
 
+# Changing any of these revokes the user's outstanding tokens and cached
+# authentication state (see User.token_version).
+REVOCATION_FIELDS = ("role", "is_active", "password")
+
+
 class User(AbstractUser):
     username = None  # remove username
     email = models.EmailField(unique=True)
@@ -40,15 +60,48 @@ class User(AbstractUser):
         blank=True,
         null=True
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    # Carried in JWTs as the "ver" claim; bumped on role, activation or
+    # password changes so tokens issued before the change stop working.
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                Lower("email"),
+                name="user_email_ci_unique",
+                violation_error_message=DUPLICATE_EMAIL_MESSAGE,
+            ),
+        ]
+
     def __str__(self):
         return self.email
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user._revocation_state = user._get_revocation_state()
+        return user
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, "_revocation_state", None)
+        if loaded and any(self.__dict__.get(name, value) != value for name, value in loaded.items()):
+            self.token_version += 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "token_version"}
+        super().save(*args, **kwargs)
+        self._revocation_state = self._get_revocation_state()
+
+    def _get_revocation_state(self):
+        # Deferred fields are left out; they can't have been changed unseen.
+        return {name: self.__dict__[name] for name in REVOCATION_FIELDS if name in self.__dict__}
+
 
 class ArtisanStory(models.Model):
     artisan = models.ForeignKey(
@@ -65,6 +118,18 @@ class ArtisanStory(models.Model):
         null=True
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.artisan.email} - {self.title}"
+
+class RevokedToken(models.Model):
+    """A JWT (by its jti claim) that must no longer be accepted; see accounts.revocation."""
+
+    jti = models.CharField(max_length=64, unique=True)
+    # The token's own expiry: after this the row is useless and gets pruned.
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
-        return f"{self.artisan.email} - {self.title}"
\ No newline at end of file
+        return self.jti
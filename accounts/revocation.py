@@ -0,0 +1,180 @@
+"""
+JWT revocation by jti.
+
+Revoked tokens are stored as RevokedToken rows, which are the source of truth
+across workers and nodes. Checking a token must not cost a query, so each
+worker keeps the denylist in memory:
+
+- a Bloom filter over every unexpired jti known at the last rebuild, which
+  answers "definitely not revoked" for almost every live token;
+- an exact set of the jtis synced since that rebuild.
+
+A Bloom hit outside the exact set (a false positive, or a jti added by a
+rebuild) is confirmed with one indexed lookup.
+
+Workers notice new revocations through a version counter in the shared cache,
+bumped by `revoke`. It is polled at most every JWT_DENYLIST_POLL_SECONDS. Then
+only the rows revoked since the last sync are read. Every
+JWT_DENYLIST_RESYNC_SECONDS a worker also syncs without being told, which
+covers a per-process cache and evicted counters. The Bloom filter is rebuilt
+every JWT_DENYLIST_REBUILD_SECONDS. Rows whose token has expired are deleted
+at the same time. No token outlives REFRESH_TOKEN_LIFETIME, so the table stays
+bounded.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import RevokedToken
+
+VERSION_KEY = "accounts:denylist:version"
+
+# Re-read this much history on each incremental sync, so rows from
+# transactions that committed a little out of order are not missed.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+BLOOM_FALSE_POSITIVE_RATE = 0.001
+BLOOM_MIN_CAPACITY = 1024
+
+
+class BloomFilter:
+    def __init__(self, capacity, false_positive_rate=BLOOM_FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest.
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class Denylist:
+    """The per-process view of RevokedToken; use the module-level functions."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.recent = set()
+        self.version = None
+        self.synced_at = None
+        self.polled_at = 0.0
+        self.resynced_at = 0.0
+        self.rebuilt_at = 0.0
+
+    def contains(self, jti):
+        self._refresh()
+        if jti in self.recent:
+            return True
+        if jti not in self.bloom:
+            return False
+        return RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now()).exists()
+
+    def add_local(self, jti):
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+                self.recent.add(jti)
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self.bloom is None or now - self.rebuilt_at >= settings.JWT_DENYLIST_REBUILD_SECONDS:
+            with self.lock:
+                if self.bloom is None or now - self.rebuilt_at >= settings.JWT_DENYLIST_REBUILD_SECONDS:
+                    self._rebuild(now)
+            return
+
+        if now - self.polled_at < settings.JWT_DENYLIST_POLL_SECONDS:
+            return
+        self.polled_at = now
+        version = cache.get(VERSION_KEY)
+        if version == self.version and now - self.resynced_at < settings.JWT_DENYLIST_RESYNC_SECONDS:
+            return
+        with self.lock:
+            self._sync(now, version)
+
+    def _rebuild(self, now):
+        version = cache.get(VERSION_KEY)
+        started = timezone.now()
+        RevokedToken.objects.filter(expires_at__lte=started).delete()
+        jtis = list(RevokedToken.objects.values_list("jti", flat=True))
+
+        bloom = BloomFilter(max(BLOOM_MIN_CAPACITY, 2 * len(jtis)))
+        for jti in jtis:
+            bloom.add(jti)
+        self.bloom = bloom
+        self.recent = set()
+        self.version = version
+        self.synced_at = started
+        self.polled_at = self.resynced_at = self.rebuilt_at = now
+
+    def _sync(self, now, version):
+        started = timezone.now()
+        jtis = RevokedToken.objects.filter(
+            revoked_at__gte=self.synced_at - SYNC_OVERLAP,
+            expires_at__gt=started,
+        ).values_list("jti", flat=True)
+        for jti in jtis:
+            self.bloom.add(jti)
+            self.recent.add(jti)
+        self.version = version
+        self.synced_at = started
+        self.resynced_at = now
+
+
+_denylist = Denylist()
+
+
+def is_revoked(token):
+    """Whether `token` (a validated simplejwt Token) has been revoked."""
+    jti = token.get(settings.SIMPLE_JWT["JTI_CLAIM"])
+    return bool(jti) and _denylist.contains(jti)
+
+
+def revoke(token):
+    """
+    Deny `token` from now until it would have expired anyway.
+
+    Returns False if it was already revoked (or has no jti or has expired),
+    which lets a caller detect a concurrent request revoking the same token.
+    """
+    jti = token.get(settings.SIMPLE_JWT["JTI_CLAIM"])
+    if not jti:
+        return False
+    expires_at = datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+    if expires_at <= timezone.now():
+        return False
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        return False
+    _denylist.add_local(jti)
+    _bump_version()
+    return True
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Missing (first use or evicted): any new value tells workers to sync.
+        cache.set(VERSION_KEY, time.time_ns(), None)
@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User
+from .user_cache import invalidate_user
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # After commit, so a request that reads the row in the meantime can't
+    # put the old version back into the cache.
+    transaction.on_commit(lambda: invalidate_user(instance.pk))
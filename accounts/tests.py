@@ -1,3 +1,300 @@
-from django.test import TestCase
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from api.serializers import UserRegisterSerializer
+from api.views import CustomTokenObtainPairSerializer
+
+from . import revocation, throttling
+from .forms import RegisterForm
+from .models import RevokedToken, Role, User
+from .user_cache import CACHE_KEY, get_user
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="buyer@example.com", password="pass", role=Role.BUYER)
+
+    def test_get_user_is_cached(self):
+        get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user(self.user.pk), self.user)
+
+    def test_save_invalidates_after_commit(self):
+        get_user(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = "Asha"
+            self.user.save()
+        self.assertIsNone(cache.get(CACHE_KEY.format(pk=self.user.pk)))
+        self.assertEqual(get_user(self.user.pk).first_name, "Asha")
+
+
+class TokenVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="buyer@example.com", password="pass", role=Role.BUYER)
+        self.client = APIClient()
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_role_change_revokes_tokens(self):
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.get(pk=self.user.pk)
+            user.role = Role.ARTISAN
+            user.save()
+
+        self.assertEqual(user.token_version, 1)
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 401)
+
+    def test_other_edits_keep_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.get(pk=self.user.pk)
+            user.bio = "Collector"
+            user.save()
+
+        self.assertEqual(user.token_version, 0)
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+
+
+class EmailCaseTests(TestCase):
+    password = "Kal4-setu-pass"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="Asha@Example.com", password=self.password, role=Role.BUYER)
+
+    def registration(self, email):
+        return {
+            "email": email, "role": Role.BUYER,
+            "password": self.password, "password_confirm": self.password,
+            "password1": self.password, "password2": self.password,
+        }
+
+    def test_backend_login_ignores_case(self):
+        self.assertEqual(authenticate(None, username="asha@example.COM", password=self.password), self.user)
+        self.assertEqual(authenticate(None, email="ASHA@EXAMPLE.COM", password=self.password), self.user)
+
+    def test_jwt_login_ignores_case(self):
+        with mock.patch("api.views.verify_captcha", return_value=(True, None)):
+            response = APIClient().post("/api/auth/login/", {
+                "email": "asha@example.com", "password": self.password, "captcha_token": "token",
+            }, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", response.data)
+
+    def test_registration_rejects_case_only_duplicates(self):
+        form = RegisterForm(data=self.registration("asha@EXAMPLE.com"))
+        self.assertFalse(form.is_valid())
+        self.assertIn("email", form.errors)
+
+        serializer = UserRegisterSerializer(data=self.registration("ASHA@example.com"))
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("email", serializer.errors)
+
+    def test_concurrent_duplicate_is_a_validation_error(self):
+        # As if the other registration committed after the email checks ran.
+        with mock.patch.object(User.objects, "filter_email", return_value=User.objects.none()), \
+                mock.patch.object(User, "validate_constraints"):
+            serializer = UserRegisterSerializer(data=self.registration("asha@example.com"))
+            self.assertTrue(serializer.is_valid())
+            with self.assertRaises(ValidationError):
+                serializer.save()
+
+            response = self.client.post(reverse("register"), self.registration("asha@example.com"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("email", response.context["form"].errors)
+        self.assertEqual(User.objects.filter_email("asha@example.com").count(), 1)
+
+    def test_migration_names_colliding_accounts(self):
+        migration = importlib.import_module("accounts.migrations.0009_user_email_ci_unique")
+        with connection.schema_editor() as editor:
+            editor.remove_constraint(
+                User, next(constraint for constraint in User._meta.constraints if constraint.name == "user_email_ci_unique")
+            )
+        other = User.objects.create_user(email="asha@example.com", password=self.password, role=Role.BUYER)
+
+        with self.assertRaises(RuntimeError) as raised:
+            migration.check_email_collisions(apps, None)
+
+        message = str(raised.exception)
+        self.assertIn(f"#{self.user.pk} Asha@example.com", message)
+        self.assertIn(f"#{other.pk} asha@example.com", message)
+
+
+class RevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # A fresh per-process denylist, as in a newly started worker.
+        patcher = mock.patch.object(revocation, "_denylist", revocation.Denylist())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(email="buyer@example.com", password="pass", role=Role.BUYER)
+        self.refresh = CustomTokenObtainPairSerializer.get_token(self.user)
+        self.client = APIClient()
+
+    def post_refresh(self, refresh):
+        return self.client.post("/api/auth/refresh/", {"refresh": str(refresh)}, format="json")
+
+    def test_refresh_token_cannot_be_replayed_after_rotation(self):
+        rotated = self.post_refresh(self.refresh)
+        self.assertEqual(rotated.status_code, 200)
+
+        self.assertEqual(self.post_refresh(self.refresh).status_code, 401)
+        self.assertEqual(self.post_refresh(rotated.data["refresh"]).status_code, 200)
+
+    def test_logout_revokes_refresh_and_access_tokens(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.refresh.access_token}")
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+
+        response = self.client.post("/api/auth/logout/", {"refresh": str(self.refresh)}, format="json")
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 401)
+        self.client.credentials()
+        self.assertEqual(self.post_refresh(self.refresh).status_code, 401)
+
+    def test_revocation_reaches_other_workers(self):
+        jti = self.refresh["jti"]
+        worker = revocation.Denylist()
+        self.assertFalse(worker.contains(jti))
+
+        # Revoked by another worker, which bumps the shared version.
+        self.assertTrue(revocation.revoke(self.refresh))
+
+        with override_settings(JWT_DENYLIST_POLL_SECONDS=0):
+            self.assertTrue(worker.contains(jti))
+        # A rebuilt denylist has it from the table.
+        self.assertTrue(revocation.Denylist().contains(jti))
+
+    def test_bloom_false_positive_is_checked_against_the_table(self):
+        denylist = revocation.Denylist()
+        denylist.contains("warm-up")
+        denylist.bloom.bits = bytearray(b"\xff" * len(denylist.bloom.bits))
+
+        self.assertIn(self.refresh["jti"], denylist.bloom)
+        with self.assertNumQueries(1):
+            self.assertFalse(denylist.contains(self.refresh["jti"]))
+
+    def test_rebuild_prunes_expired_rows(self):
+        now = timezone.now()
+        RevokedToken.objects.create(jti="expired", expires_at=now - timedelta(minutes=1))
+        RevokedToken.objects.create(jti="live", expires_at=now + timedelta(minutes=1))
+
+        denylist = revocation.Denylist()
+        self.assertFalse(denylist.contains("expired"))
+        self.assertTrue(denylist.contains("live"))
+        self.assertEqual(list(RevokedToken.objects.values_list("jti", flat=True)), ["live"])
+
+
+class SharedCacheSettingTests(SimpleTestCase):
+    def test_production_requires_redis(self):
+        env = {**os.environ, "DEBUG": "False", "REDIS_URL": ""}
+        result = subprocess.run(
+            [sys.executable, "-c", "import kalasetu_backend.settings"],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("REDIS_URL must be set", result.stderr)
+
+
+class SlowReadCache:
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.cache, name)
+
+    def get(self, *args, **kwargs):
+        value = self.cache.get(*args, **kwargs)
+        time.sleep(0.05)
+        return value
+
+    def get_many(self, *args, **kwargs):
+        values = self.cache.get_many(*args, **kwargs)
+        time.sleep(0.05)
+        return values
+
+
+@override_settings(AUTH_THROTTLE_RATES={"login_ip": "3/min", "login_email": "10/min"})
+class ThrottleTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def check_at(self, seconds):
+        with mock.patch("accounts.throttling.time.time", return_value=60000.0 + seconds):
+            return throttling.check("login_ip", "client")
+
+    def test_sliding_window(self):
+        decisions = [self.check_at(seconds) for seconds in (10, 20, 30)]
+        self.assertEqual([decision.remaining for decision in decisions], [2, 1, 0])
+
+        rejected = self.check_at(40)
+        self.assertFalse(rejected.allowed)
+        # At 60s the three attempts become the "previous" counter; one of them
+        # has slid out a third of the way into that window, at 80s.
+        self.assertEqual(rejected.retry_after, 40)
+        self.assertFalse(self.check_at(79).allowed)
+        self.assertTrue(self.check_at(81).allowed)
+
+    def test_rejections_are_not_counted(self):
+        for _ in range(3):
+            self.check_at(1)
+        for _ in range(5):
+            self.assertFalse(self.check_at(2).allowed)
+        self.assertTrue(self.check_at(81).allowed)
+
+    def test_concurrent_burst_stays_within_limit(self):
+        start = threading.Barrier(20)
+        allowed = []
+
+        def attempt():
+            start.wait()
+            allowed.append(throttling.check("login_email", "burst").allowed)
+
+        # Slow reads give every thread the same view of the counters before
+        # any of them writes.
+        with mock.patch.object(throttling, "cache", SlowReadCache(cache)):
+            threads = [threading.Thread(target=attempt) for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(allowed.count(True), 10)
+
+
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(AUTH_THROTTLE_RATES={"login_ip": "2/min", "login_email": "10/min"})
+    def test_login_over_limit_is_refused_before_captcha(self):
+        client = APIClient()
+        payload = {"email": "someone@example.com", "password": "wrong", "captcha_token": "token"}
+        with mock.patch("api.views.verify_captcha", return_value=(False, "Captcha failed.")) as verify:
+            statuses = [client.post("/api/auth/login/", payload, format="json").status_code for _ in range(3)]
+            response = client.post("/api/auth/login/", payload, format="json")
+
+        self.assertEqual(statuses, [400, 400, 429])
+        self.assertEqual(verify.call_count, 2)
+        self.assertEqual(response["X-RateLimit-Remaining"], "0")
+        self.assertIn("Retry-After", response)
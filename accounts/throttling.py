@@ -0,0 +1,193 @@
+"""
+Sliding-window rate limits for login and registration.
+
+Both endpoints end in PBKDF2 (and registration in a captcha round-trip), so
+a burst of attempts can pin every worker. Requests over the limit are turned
+away before any of that work, by the DRF throttles in api.throttling and by
+`rate_limit` for the template views.
+
+Limits are per scope (settings.AUTH_THROTTLE_RATES, DRF's "10/min" format)
+and are counted per client IP or per submitted email. Each check is a sliding
+window counter: two fixed-window counters in the cache, the previous one
+weighted by how much of it still overlaps the window ending now. That does
+not allow the 2x burst that plain fixed windows allow at a boundary.
+
+An attempt is counted first (add/incr, atomic in the cache) and the decision
+is made from the count that returns, so concurrent attempts each see a
+different count and a burst cannot slip past the limit between a read and a
+write. A rejected attempt is decremented again: a client that keeps retrying
+gets back in at the configured rate.
+
+The counters live in the default cache, so limits are only global with a
+shared cache. Under the per-process LocMemCache each worker counts on its
+own and the effective limit is the rate times the number of workers; that
+is acceptable for development only, and settings.py refuses to start with
+DEBUG off and no REDIS_URL.
+"""
+
+import hashlib
+import math
+import time
+from dataclasses import dataclass
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.shortcuts import render
+from rest_framework.throttling import BaseThrottle
+
+KEY_PREFIX = "throttle"
+
+# What each scope counts by.
+SCOPE_KEYS = {
+    "login_ip": "ip",
+    "login_email": "email",
+    "register_ip": "ip",
+}
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60); None or '' disables the scope."""
+    if not rate:
+        return None
+    count, period = rate.split("/")
+    return int(count), DURATIONS[period[0]]
+
+
+def check(scope, ident):
+    """Count one attempt by `ident` against `scope`; None if the scope is off."""
+    rate = parse_rate(settings.AUTH_THROTTLE_RATES.get(scope))
+    if rate is None or not ident:
+        return None
+    limit, window = rate
+
+    now = time.time()
+    current = int(now // window)
+    elapsed = now - current * window
+    current_key = f"{KEY_PREFIX}:{scope}:{ident}:{current}"
+    previous = cache.get(f"{KEY_PREFIX}:{scope}:{ident}:{current - 1}", 0)
+    count = _increment(current_key, 2 * window)
+    used = previous * (1 - elapsed / window) + count
+
+    if used > limit:
+        _decrement(current_key)
+        # `count` less this attempt is what the window holds. The older
+        # counter's weight decays linearly; wait until enough of it has slid
+        # out to make room for one more attempt.
+        count -= 1
+        if limit < 1:
+            wait = window
+        elif count + 1 > limit:
+            # Not before this window ends, when `count` becomes the older one.
+            wait = window - elapsed + window * (1 - (limit - 1) / count)
+        else:
+            wait = window * (1 - (limit - 1 - count) / previous) - elapsed
+        return Decision(False, limit, 0, max(1, math.ceil(wait)))
+
+    return Decision(True, limit, max(0, math.floor(limit - used)), 0)
+
+
+def _increment(key, timeout):
+    """Add one to the counter at `key` and return the new value."""
+    # The counter must outlive its own window to serve as the next one's
+    # "previous".
+    if cache.add(key, 1, timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Expired between the add and the incr.
+        cache.add(key, 1, timeout)
+        return 1
+
+
+def _decrement(key):
+    try:
+        cache.decr(key)
+    except ValueError:
+        pass
+
+
+def client_ip(request):
+    # Honours REST_FRAMEWORK["NUM_PROXIES"] like DRF's own throttles.
+    return BaseThrottle().get_ident(request)
+
+
+def email_key(email):
+    """Cache-key form of a submitted email: case-folded and hashed."""
+    if not email:
+        return None
+    return hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()[:32]
+
+
+def ident_for(scope, request, data):
+    if SCOPE_KEYS[scope] == "email":
+        return email_key(data.get("email") or data.get("username"))
+    return client_ip(request)
+
+
+def check_scopes(scopes, request, data):
+    """
+    Run `scopes` in order, stopping at the first rejection. Returns the
+    decisions made; the last one is the rejection, if any.
+    """
+    decisions = []
+    for scope in scopes:
+        decision = check(scope, ident_for(scope, request, data))
+        if decision is None:
+            continue
+        decisions.append(decision)
+        if not decision.allowed:
+            break
+    return decisions
+
+
+def apply_headers(response, decisions):
+    """Report the tightest remaining budget among `decisions`."""
+    if not decisions:
+        return response
+    tightest = min(decisions, key=lambda decision: decision.remaining)
+    response["X-RateLimit-Limit"] = str(tightest.limit)
+    response["X-RateLimit-Remaining"] = str(tightest.remaining)
+    if not tightest.allowed:
+        response["Retry-After"] = str(tightest.retry_after)
+    return response
+
+
+def rate_limit(*scopes, template_name, form_class):
+    """
+    Throttle POSTs to a template view. Over the limit, the page is rendered
+    again with an empty form and an error message, with status 429, before
+    the view runs.
+
+    Usage: @rate_limit("login_ip", "login_email", template_name=..., form_class=LoginForm)
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != "POST":
+                return view_func(request, *args, **kwargs)
+
+            decisions = check_scopes(scopes, request, request.POST)
+            if decisions and not decisions[-1].allowed:
+                messages.error(
+                    request,
+                    f"Too many attempts. Please try again in {decisions[-1].retry_after} seconds.",
+                )
+                response = render(request, template_name, {"form": form_class()}, status=429)
+            else:
+                response = view_func(request, *args, **kwargs)
+            return apply_headers(response, decisions)
+        return wrapper
+    return decorator
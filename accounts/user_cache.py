@@ -0,0 +1,36 @@
+"""
+Cached user lookups for request authentication.
+
+Every authenticated request resolves its user: JWT requests through
+accounts.authentication.CachedJWTAuthentication, session requests through
+EmailBackend.get_user. Both read the user row from the shared cache instead
+of the database. Entries are dropped whenever the user is saved or deleted
+(see accounts.signals), and AUTH_USER_CACHE_TIMEOUT bounds how long one can
+outlive a change made with queryset.update().
+
+The full row is cached, password hash included, because session
+authentication checks it on every request (get_session_auth_hash).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import User
+
+CACHE_KEY = "accounts:user:{pk}"
+
+
+def get_user(user_id):
+    """Return the User with `user_id`, or None if there is none."""
+    key = CACHE_KEY.format(pk=user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_user(user_id):
+    cache.delete(CACHE_KEY.format(pk=user_id))
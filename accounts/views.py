@@ -1,14 +1,17 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
 from django.contrib import messages
+from django.db import IntegrityError, transaction
 from django.views.decorators.http import require_http_methods
 from .forms import LoginForm, RegisterForm, ArtisanStoryForm
-from .models import Role, User, ArtisanStory
+from .models import DUPLICATE_EMAIL_MESSAGE, Role, User, ArtisanStory
+from .throttling import rate_limit
 from core.views import role_required
 from products.models import Product
 
 
 @require_http_methods(["GET", "POST"])
+@rate_limit("login_ip", "login_email", template_name="accounts/login.html", form_class=LoginForm)
 def login_view(request):
     """
     Handle user login with email-based authentication and role-based redirects.
@@ -111,6 +114,7 @@ def logout_view(request):
 
 
 @require_http_methods(["GET", "POST"])
+@rate_limit("register_ip", template_name="accounts/register.html", form_class=RegisterForm)
 def register_view(request):
     if request.user.is_authenticated:
         return redirect("landing_page")
@@ -118,9 +122,15 @@ def register_view(request):
     if request.method == "POST":
         form = RegisterForm(request.POST)
         if form.is_valid():
-            form.save()
-            messages.success(request, "Registration successful. Please login.")
-            return redirect("login")
+            try:
+                with transaction.atomic():
+                    form.save()
+            except IntegrityError:
+                # Same email registered concurrently, after clean_email ran.
+                form.add_error("email", DUPLICATE_EMAIL_MESSAGE)
+            else:
+                messages.success(request, "Registration successful. Please login.")
+                return redirect("login")
         messages.error(request, "Please correct the errors below.")
     else:
         form = RegisterForm()
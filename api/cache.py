@@ -0,0 +1,148 @@
+"""
+Response cache for the public product endpoints.
+
+Anonymous users and buyers both see only VERIFIED products, so their
+serialized responses for /api/products/ and /api/products/<id>/ are shared.
+Each cache key embeds a version token: one token for all list pages and one
+per product for detail responses. Invalidation swaps the token, which makes
+every dependent entry unreachable without having to enumerate keys.
+
+The list tokens double as list ETag inputs (see api/conditional.py): they
+change whenever a row that any product, story or artisan list could show
+does, so a list's validators cost cache reads instead of aggregate queries.
+"""
+
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from accounts.models import Role
+
+# Query parameters that change the list response. Anything else is ignored by
+# ProductViewSet.get_queryset and must not fragment the cache.
+LIST_CACHE_PARAMS = (
+    'search', 'region', 'verification_status', 'is_verified',
+    'min_price', 'max_price', 'min_rating', 'in_stock', 'ordering',
+    'page', 'page_size', 'pagination', 'cursor',
+    'fields', 'expand',
+)
+
+# Query parameters that change a detail response.
+DETAIL_CACHE_PARAMS = ('fields', 'expand')
+
+LIST_VERSION_KEY = 'api:products:list:version'
+DETAIL_VERSION_KEY = 'api:products:detail:{pk}:version'
+STORY_LIST_VERSION_KEY = 'api:stories:list:version'
+ARTISAN_LIST_VERSION_KEY = 'api:artisans:list:version'
+
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+LOCK_POLL_ATTEMPTS = 40
+
+
+def is_cacheable_request(request):
+    """Anonymous and buyer requests see the same product data."""
+    user = request.user
+    return not user.is_authenticated or user.role == Role.BUYER
+
+
+def product_list_cache_key(request):
+    return 'api:products:list:{}:{}'.format(
+        _get_version(LIST_VERSION_KEY),
+        _digest(_request_origin(request), _normalize_params(request, LIST_CACHE_PARAMS)),
+    )
+
+
+def product_detail_cache_key(request, pk):
+    return 'api:products:detail:{}:{}:{}'.format(
+        pk,
+        _get_version(DETAIL_VERSION_KEY.format(pk=pk)),
+        _digest(_request_origin(request), _normalize_params(request, DETAIL_CACHE_PARAMS)),
+    )
+
+
+def list_version(version_key):
+    """Current token for one of the *_LIST_VERSION_KEYs."""
+    return _get_version(version_key)
+
+
+def get_or_compute(key, compute, timeout=None):
+    """
+    Return the cached value for `key`, computing it at most once at a time.
+
+    The first caller on a cold key takes a short lock and fills the entry;
+    concurrent callers poll for the result instead of hitting the database,
+    and fall back to computing it themselves if the lock holder gives up.
+    """
+    if timeout is None:
+        timeout = settings.API_RESPONSE_CACHE_TIMEOUT
+
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    for _ in range(LOCK_POLL_ATTEMPTS):
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if cache.get(lock_key) is None:
+            break
+
+    return compute()
+
+
+def invalidate_products(product_ids):
+    """Drop every cached list page and the detail entries for `product_ids`."""
+    tokens = {LIST_VERSION_KEY: _new_version()}
+    for pk in product_ids:
+        tokens[DETAIL_VERSION_KEY.format(pk=pk)] = _new_version()
+    cache.set_many(tokens, None)
+
+
+def invalidate_stories():
+    """Change the story list token; there is no story response cache to drop."""
+    cache.set(STORY_LIST_VERSION_KEY, _new_version(), None)
+
+
+def invalidate_artisans():
+    """Change the artisan list token, for user rows the artisan list shows."""
+    cache.set(ARTISAN_LIST_VERSION_KEY, _new_version(), None)
+
+
+def _get_version(version_key):
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, _new_version(), None)
+        version = cache.get(version_key)
+    return version
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def _normalize_params(request, names):
+    params = request.query_params
+    return '&'.join(f'{name}={params.get(name)}' for name in names if params.get(name))
+
+
+def _request_origin(request):
+    # Image URLs and pagination links are absolute, so they depend on the host.
+    return f'{request.scheme}://{request.get_host()}'
+
+
+def _digest(*parts):
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
@@ -0,0 +1,230 @@
+"""
+reCAPTCHA verification client.
+
+Login and registration block on this call, so it is built to fail fast:
+
+- one keep-alive HTTPS connection per worker thread, so a verification costs
+  a request/response and not a TCP + TLS handshake;
+- a short timeout (settings.RECAPTCHA_TIMEOUT);
+- tokens that already verified are cached for RECAPTCHA_CACHE_SECONDS, keyed
+  by token and client IP, so a resubmitted login (e.g. after a mistyped
+  password) from the same client skips the upstream call. Single-use checks
+  (registration) neither read nor fill that cache;
+- a circuit breaker: after RECAPTCHA_BREAKER_THRESHOLD consecutive upstream
+  failures, calls are skipped for RECAPTCHA_BREAKER_COOLDOWN seconds and then
+  one trial call is let through. While the upstream is unavailable,
+  RECAPTCHA_FAIL_OPEN decides whether requests are let in or refused.
+
+`verify_captcha` is the sync entry point; `averify_captcha` is the same for
+async (ASGI) views. Point RECAPTCHA_VERIFY_URL at `manage.py
+fake_captcha_server` to exercise latency and failure modes offline.
+"""
+
+import hashlib
+import http.client
+import json
+import threading
+import time
+from urllib import parse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+CACHE_KEY_PREFIX = 'captcha:ok:'
+
+MISSING_MESSAGE = 'Captcha is required.'
+NOT_CONFIGURED_MESSAGE = 'Captcha is not configured on the server.'
+UNAVAILABLE_MESSAGE = 'Captcha verification failed. Please try again.'
+INVALID_MESSAGE = 'Captcha validation failed. Please try again.'
+
+
+class UpstreamError(Exception):
+    """The verification service could not be reached or answered badly."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker, per process.
+
+    Closed: calls go through. After `threshold` failures in a row it opens
+    and `allow()` returns False for `cooldown` seconds; then a single trial
+    call is allowed (half-open), whose outcome closes or re-opens it.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class CaptchaClient:
+    def __init__(self, verify_url, secret, timeout=3.0, cache_seconds=120,
+                 fail_open=False, breaker_threshold=5, breaker_cooldown=30):
+        url = parse.urlsplit(verify_url)
+        self.scheme = url.scheme
+        self.host = url.hostname
+        self.port = url.port
+        self.path = url.path or '/'
+        self.secret = secret
+        self.timeout = timeout
+        self.cache_seconds = cache_seconds
+        self.fail_open = fail_open
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self.local = threading.local()
+
+    def verify(self, token, remote_ip=None, single_use=False):
+        """
+        Return `(is_valid, error_message)`. With `single_use`, the token is
+        always checked upstream (where a token only verifies once) and is
+        not cached for reuse.
+        """
+        if not token:
+            return False, MISSING_MESSAGE
+        if not self.secret:
+            return False, NOT_CONFIGURED_MESSAGE
+
+        # The client IP is part of the key: a solved token that leaks can't
+        # be replayed from elsewhere while it is cached.
+        cache_key = CACHE_KEY_PREFIX + hashlib.sha256(
+            f'{remote_ip or ""}|{token}'.encode('utf-8')
+        ).hexdigest()
+        if not single_use and cache.get(cache_key):
+            return True, None
+
+        if not self.breaker.allow():
+            return self._unavailable()
+
+        fields = {'secret': self.secret, 'response': token}
+        if remote_ip:
+            fields['remoteip'] = remote_ip
+        try:
+            result = self._post(parse.urlencode(fields).encode('utf-8'))
+        except UpstreamError:
+            self.breaker.record_failure()
+            return self._unavailable()
+        self.breaker.record_success()
+
+        if result.get('success'):
+            if not single_use:
+                cache.set(cache_key, True, self.cache_seconds)
+            return True, None
+        return False, INVALID_MESSAGE
+
+    def _unavailable(self):
+        if self.fail_open:
+            return True, None
+        return False, UNAVAILABLE_MESSAGE
+
+    def _post(self, body):
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Connection': 'keep-alive',
+        }
+        # A pooled connection may have been closed by the server while idle;
+        # that shows up on first use, so retry once on a fresh one.
+        for attempt in range(2):
+            reused = getattr(self.local, 'connection', None) is not None
+            connection = self._connection()
+            try:
+                connection.request('POST', self.path, body=body, headers=headers)
+                response = connection.getresponse()
+                payload = response.read()
+            except (http.client.HTTPException, OSError) as exc:
+                self._discard_connection()
+                if reused and attempt == 0 and not isinstance(exc, TimeoutError):
+                    continue
+                raise UpstreamError(str(exc)) from exc
+
+            if response.will_close:
+                self._discard_connection()
+            if response.status >= 500:
+                raise UpstreamError(f'HTTP {response.status}')
+            try:
+                return json.loads(payload.decode('utf-8'))
+            except ValueError as exc:
+                raise UpstreamError('Invalid JSON from captcha service') from exc
+
+    def _connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection_class = (
+                http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            )
+            connection = self.local.connection = connection_class(self.host, self.port, timeout=self.timeout)
+        return connection
+
+    def _discard_connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = CaptchaClient(
+                    settings.RECAPTCHA_VERIFY_URL,
+                    settings.RECAPTCHA_SECRET_KEY,
+                    timeout=settings.RECAPTCHA_TIMEOUT,
+                    cache_seconds=settings.RECAPTCHA_CACHE_SECONDS,
+                    fail_open=settings.RECAPTCHA_FAIL_OPEN,
+                    breaker_threshold=settings.RECAPTCHA_BREAKER_THRESHOLD,
+                    breaker_cooldown=settings.RECAPTCHA_BREAKER_COOLDOWN,
+                )
+    return _client
+
+
+def verify_captcha(token, remote_ip=None, single_use=False):
+    """Validate a reCAPTCHA token; returns `(is_valid, error_message)`."""
+    return get_client().verify(token, remote_ip, single_use)
+
+
+async def averify_captcha(token, remote_ip=None, single_use=False):
+    """
+    `verify_captcha` for async views. The blocking call runs in a worker
+    thread (each with its own keep-alive connection), so the event loop
+    keeps serving other requests meanwhile.
+    """
+    return await sync_to_async(verify_captcha, thread_sensitive=False)(token, remote_ip, single_use)
@@ -0,0 +1,101 @@
+"""
+Conditional GET support (ETag / Last-Modified) for read endpoints.
+
+Detail validators come from the object's `updated_at` columns; list
+validators from the list version tokens in api/cache.py, so a list ETag costs
+a cache read rather than a COUNT over every matching row. A matching
+`If-None-Match` / `If-Modified-Since` is answered with 304 Not Modified
+before any serializer runs.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def build_validators(request, scope, parts, timestamps=(), send_last_modified=False):
+    """
+    Return `(etag, last_modified)` for a response.
+
+    `parts` are the values the payload depends on (counts, maxima, ids).
+    `scope` separates audiences that see different data for the same URL.
+    Last-Modified is only worth sending when the timestamps alone determine
+    the payload; lists can lose rows without any timestamp moving forward.
+    """
+    stamps = [stamp for stamp in timestamps if stamp is not None]
+    latest = max(stamps) if stamps else None
+
+    fingerprint = repr((
+        scope,
+        request.scheme,
+        request.get_host(),
+        sorted(request.query_params.lists()),
+        parts,
+        latest.isoformat() if latest else None,
+    ))
+    etag = 'W/"{}"'.format(hashlib.sha1(fingerprint.encode('utf-8')).hexdigest())
+
+    last_modified = None
+    if send_last_modified and latest is not None:
+        last_modified = int(latest.timestamp())
+    return etag, last_modified
+
+
+def not_modified(request, etag, last_modified):
+    """Return a 304/412 response if the request's preconditions allow it, else None."""
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Add ETag / Last-Modified to `list` and `retrieve` on a viewset.
+
+    Views implement `get_list_validators(queryset)` and
+    `get_object_validators(instance)`, each returning `(etag, last_modified)`
+    via `build_validators`.
+    """
+
+    def get_etag_scope(self, request):
+        return 'public'
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = self.get_list_validators(queryset)
+        return self.conditional_response(
+            etag, last_modified, lambda: self.serialize_list(queryset)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_object_validators(instance)
+        return self.conditional_response(
+            etag, last_modified, lambda: self.get_serializer(instance).data
+        )
+
+    def conditional_response(self, etag, last_modified, get_data):
+        """304 when the client's copy is current, otherwise `get_data()` with validators."""
+        response = not_modified(self.request, etag, last_modified)
+        if response is None:
+            response = Response(get_data())
+        return set_validators(response, etag, last_modified)
+
+    def serialize_list(self, queryset):
+        """Paginated (when enabled) list payload for an already filtered queryset."""
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.paginator.get_paginated_response(serializer.data).data
+
+        serializer = self.get_serializer(queryset, many=True)
+        return serializer.data
@@ -25,4 +25,6 @@ def _get_error_label(status_code):
         return 'not_found'
     if status_code == 401:
         return 'unauthorized'
+    if status_code == 429:
+        return 'too_many_requests'
     return 'error'
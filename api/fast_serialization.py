@@ -0,0 +1,163 @@
+"""
+Read-only fast path for list endpoints.
+
+DRF's ModelSerializer spends most of a list response building model
+instances, resolving attributes field by field and asking the storage for
+each image URL. For read-only list serializers whose fields all map onto
+columns, `compile_row_builder` instead walks the (already sparse-trimmed)
+serializer once, works out which `values()` columns it needs and returns a
+function that turns each row dict into the same dict DRF would have produced.
+Anything it cannot reproduce exactly makes it return None, and the caller
+falls back to the regular serializer.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
+from rest_framework import fields as drf_fields
+from rest_framework import serializers
+from rest_framework.response import Response
+
+
+def compile_row_builder(serializer, annotations=()):
+    """
+    Return `(columns, build_row)` for `serializer`, or None if unsupported.
+
+    `columns` are the ORM paths to pass to `values()`; `build_row(row)` maps
+    one values() dict to the serializer's representation.
+    """
+    columns = []
+    request = serializer.context.get('request')
+    build_row = _compile(serializer, serializer.Meta.model, '', columns, request, set(annotations))
+    if build_row is None:
+        return None
+    return list(dict.fromkeys(columns)), build_row
+
+
+def _compile(serializer, model, prefix, columns, request, annotations):
+    steps = []
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        source = field.source
+        if source == '*' or '.' in source or isinstance(field, serializers.ListSerializer):
+            return None
+
+        path = prefix + source
+        if not prefix and source in annotations:
+            model_field = None
+        else:
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete or model_field.many_to_many:
+                return None
+
+        if isinstance(field, serializers.BaseSerializer):
+            if model_field is None or not model_field.many_to_one:
+                return None
+            nested = _compile(field, model_field.related_model, path + '__', columns, request, annotations)
+            if nested is None:
+                return None
+            # The FK column doubles as the null check for the nested object.
+            columns.append(path)
+            steps.append((name, path, nested, True))
+            continue
+
+        convert = _converter(field, model_field, request)
+        if convert is None:
+            return None
+        columns.append(path)
+        steps.append((name, path, convert, False))
+
+    def build_row(row):
+        data = {}
+        for name, path, convert, nested in steps:
+            value = row[path]
+            if value is None:
+                data[name] = None
+            elif nested:
+                data[name] = convert(row)
+            else:
+                data[name] = convert(value)
+        return data
+
+    return build_row
+
+
+def _converter(field, model_field, request):
+    field_class = type(field)
+
+    if isinstance(field, drf_fields.FileField):
+        return _media_converter(field, model_field, request)
+    if field_class in (drf_fields.CharField, drf_fields.EmailField):
+        return str
+    if field_class is drf_fields.IntegerField:
+        return int
+    if field_class in (
+        drf_fields.BooleanField,
+        drf_fields.ChoiceField,
+        drf_fields.DecimalField,
+        drf_fields.DateTimeField,
+        drf_fields.ReadOnlyField,
+    ):
+        # These are cheap on their own; the saving is in skipping
+        # get_attribute() and model instantiation around them.
+        return field.to_representation
+    return None
+
+
+def _media_converter(field, model_field, request):
+    if not getattr(field, 'use_url', True) or model_field is None:
+        return None
+
+    storage = model_field.storage
+    if not isinstance(storage, FileSystemStorage):
+        def storage_url(name):
+            if not name:
+                return None
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return storage_url
+
+    # FileSystemStorage.url() is urljoin(base_url, quoted name); resolve the
+    # absolute base once instead of once per row.
+    base_url = storage.base_url
+    if request is not None:
+        base_url = request.build_absolute_uri(base_url)
+
+    def media_url(name):
+        if not name:
+            return None
+        return base_url + filepath_to_uri(name).lstrip('/')
+    return media_url
+
+
+class FastListMixin:
+    """
+    Serve list payloads through `compile_row_builder` when the list
+    serializer allows it, falling back to `serialize_list` otherwise.
+    """
+
+    def serialize_list(self, queryset):
+        compiled = compile_row_builder(self.get_serializer(), queryset.query.annotations)
+        if compiled is None:
+            return super().serialize_list(queryset)
+
+        columns, build_row = compiled
+        get_key_columns = getattr(self.paginator, 'get_key_columns', None)
+        if get_key_columns is not None:
+            # Cursor links are built from these; build_row only renders the
+            # serializer's own fields, so they never reach the payload.
+            columns = list(dict.fromkeys([*columns, *get_key_columns(queryset)]))
+        rows = queryset.prefetch_related(None).values(*columns)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.paginator.get_paginated_response([build_row(row) for row in page]).data
+        return [build_row(row) for row in rows]
+
+    def list_response(self, queryset):
+        return Response(self.serialize_list(queryset))
@@ -0,0 +1,156 @@
+"""
+Sparse fieldsets (`?fields=` / `?expand=`) and matching column projection.
+
+`?fields=id,name,price,image,artisan.first_name` trims the JSON payload to
+the named fields, with dots selecting inside nested serializers.
+`?expand=cultural_story` adds fields a serializer lists in
+`Meta.expandable_fields`, which are left out by default. The same field tree
+is turned into `.only()` / `.select_related()` so the SQL column list shrinks
+along with the payload.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def parse_fieldset(value):
+    """Parse `'id,artisan.first_name'` into `{'id': {}, 'artisan': {'first_name': {}}}`."""
+    tree = {}
+    for path in (value or '').split(','):
+        path = path.strip()
+        if not path:
+            continue
+        node = tree
+        for part in path.split('.'):
+            node = node.setdefault(part, {})
+    return tree
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that honours a parsed `fields` / `expand` tree.
+
+    An empty `fields` tree means "all default fields". Nested serializers that
+    also use this mixin receive their branch of both trees.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        self.sparse_fields = fields or {}
+        self.expand = expand or {}
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        for name in getattr(self.Meta, 'expandable_fields', ()):
+            if name not in self.expand and name not in self.sparse_fields:
+                fields.pop(name, None)
+
+        if self.sparse_fields:
+            for name in list(fields):
+                if name not in self.sparse_fields:
+                    fields.pop(name)
+
+        for name, field in fields.items():
+            if isinstance(field, SparseFieldsetMixin):
+                field.sparse_fields = self.sparse_fields.get(name, {})
+                field.expand = self.expand.get(name, {})
+        return fields
+
+
+def project_queryset(queryset, serializer, extra=()):
+    """
+    Restrict `queryset` to the columns `serializer` reads.
+
+    `extra` lists further ORM paths the view needs (validators, permissions).
+    Columns the queryset orders by are kept so keyset pagination can read
+    them. Returns the queryset unchanged when a field's source can't be
+    mapped to a column (method fields, properties, to-many relations).
+    """
+    paths = set()
+    relations = set()
+    if not _collect_paths(serializer, queryset.model, '', paths, relations, queryset.query.annotations):
+        return queryset
+
+    for path in extra:
+        paths.add(path)
+        if '__' in path:
+            relations.add(path.rsplit('__', 1)[0])
+
+    for ordering in queryset.query.order_by:
+        if isinstance(ordering, str):
+            name = ordering.lstrip('-')
+            if name not in queryset.query.annotations:
+                paths.add(name)
+
+    for relation in relations:
+        paths.add(relation)
+
+    queryset = queryset.select_related(None)
+    if relations:
+        queryset = queryset.select_related(*sorted(relations))
+    return queryset.only(*sorted(paths))
+
+
+def _collect_paths(serializer, model, prefix, paths, relations, annotations):
+    paths.add(prefix + model._meta.pk.name)
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*' or isinstance(field, serializers.ListSerializer):
+            return False
+
+        source = field.source.replace('.', '__')
+        if not prefix and source in annotations:
+            continue
+
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return False
+        if not model_field.concrete or model_field.many_to_many:
+            return False
+
+        if isinstance(field, serializers.BaseSerializer):
+            relation = prefix + source
+            relations.add(relation)
+            if not _collect_paths(field, model_field.related_model, relation + '__',
+                                  paths, relations, annotations):
+                return False
+        else:
+            paths.add(prefix + source)
+
+    return True
+
+
+class SparseFieldsetViewMixin:
+    """
+    View mixin that passes `?fields=` / `?expand=` to read serializers and
+    projects querysets to match via `project_for_read`.
+    """
+
+    def get_fieldset(self):
+        params = self.request.query_params
+        return parse_fieldset(params.get('fields')), parse_fieldset(params.get('expand'))
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, SparseFieldsetMixin):
+            fields, expand = self.get_fieldset()
+            kwargs.setdefault('fields', fields)
+            kwargs.setdefault('expand', expand)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_projection_extra(self):
+        return ()
+
+    def project_for_read(self, queryset):
+        if self.request.method not in ('GET', 'HEAD'):
+            return queryset
+        if not issubclass(self.get_serializer_class(), SparseFieldsetMixin):
+            return queryset
+        return project_queryset(queryset, self.get_serializer(), self.get_projection_extra())
+
+    def filter_queryset(self, queryset):
+        return self.project_for_read(super().filter_queryset(queryset))
@@ -0,0 +1,110 @@
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.captcha import CaptchaClient
+
+from .fake_captcha_server import make_server
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure captcha verification latency with concurrent callers. By default '
+        'a fake verifier (see fake_captcha_server) is started in-process with the '
+        'given latency and failure rate; --url targets an already running one. '
+        'Compares one new connection per call with the pooled keep-alive client '
+        'and reports how the circuit breaker reacted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Verifier URL (default: start a fake one).')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--latency', type=float, default=0.02)
+        parser.add_argument('--failure-rate', type=float, default=0.0)
+        parser.add_argument('--hang-rate', type=float, default=0.0)
+        parser.add_argument('--timeout', type=float, default=1.0)
+        parser.add_argument('--fail-open', action='store_true')
+        parser.add_argument(
+            '--repeat-tokens', type=float, default=0.0,
+            help='Fraction of calls that resubmit an already-used token (served from cache).',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive.')
+
+        server = None
+        url = options['url']
+        if url is None:
+            server = make_server(
+                '127.0.0.1', 0,
+                latency=options['latency'],
+                failure_rate=options['failure_rate'],
+                hang_rate=options['hang_rate'],
+            )
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f'http://127.0.0.1:{server.server_port}/siteverify'
+
+        try:
+            self.stdout.write(
+                f'{options["requests"]} verifications, {options["concurrency"]} concurrent, against {url}'
+            )
+            self._run('new connection per call', options, url, pooled=False)
+            self._run('pooled keep-alive', options, url, pooled=True)
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+    def _run(self, label, options, url, pooled):
+        client = CaptchaClient(
+            url, 'benchmark-secret',
+            timeout=options['timeout'],
+            fail_open=options['fail_open'],
+        )
+        # Each run gets its own tokens so it never hits the other's cache entries.
+        run_id = uuid.uuid4().hex
+        repeat_every = int(1 / options['repeat_tokens']) if options['repeat_tokens'] > 0 else 0
+
+        def verify(i):
+            if repeat_every and i % repeat_every == 0 and i:
+                token = f'bench-{run_id}-{i - 1}'
+            else:
+                token = f'bench-{run_id}-{i}'
+            started = time.perf_counter()
+            ok, _ = client.verify(token)
+            elapsed = time.perf_counter() - started
+            if not pooled:
+                # What the old urllib call did: a fresh connection every time.
+                client._discard_connection()
+            return elapsed, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(verify, range(options['requests'])))
+        wall = time.perf_counter() - started
+
+        latencies = sorted(elapsed for elapsed, _ in results)
+        accepted = sum(1 for _, ok in results if ok)
+        self.stdout.write(
+            f'  {label:<26} {len(results) / wall:8.1f}/s  '
+            f'p50 {_percentile(latencies, 50) * 1000:7.1f} ms  '
+            f'p95 {_percentile(latencies, 95) * 1000:7.1f} ms  '
+            f'p99 {_percentile(latencies, 99) * 1000:7.1f} ms  '
+            f'max {latencies[-1] * 1000:7.1f} ms  '
+            f'mean {statistics.fmean(latencies) * 1000:7.1f} ms  '
+            f'accepted {accepted}/{len(results)}'
+        )
+        self.stdout.write(
+            f'  {"":<26} breaker {client.breaker.state} ({client.breaker.failures} consecutive failures)'
+        )
+
+
+def _percentile(values, percent):
+    index = min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))
+    return values[index]
@@ -0,0 +1,112 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import parse
+
+from django.core.management.base import BaseCommand
+
+# Tokens starting with this are answered with success=false.
+INVALID_TOKEN_PREFIX = 'invalid'
+
+
+class Command(BaseCommand):
+    help = (
+        'Run a local stand-in for the reCAPTCHA siteverify endpoint, for load '
+        'testing captcha verification offline. Set RECAPTCHA_VERIFY_URL to '
+        'http://127.0.0.1:<port>/siteverify. Every token is accepted except those '
+        f'starting with "{INVALID_TOKEN_PREFIX}"; --latency and --failure-rate '
+        'simulate a slow or failing upstream.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.05, help='Seconds to wait before answering.')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency, up to this many seconds.')
+        parser.add_argument(
+            '--failure-rate', type=float, default=0.0,
+            help='Fraction of requests answered with HTTP 503.',
+        )
+        parser.add_argument(
+            '--hang-rate', type=float, default=0.0,
+            help='Fraction of requests that never get an answer (exercises client timeouts).',
+        )
+
+    def handle(self, *args, **options):
+        server = make_server(
+            options['host'], options['port'],
+            latency=options['latency'],
+            jitter=options['jitter'],
+            failure_rate=options['failure_rate'],
+            hang_rate=options['hang_rate'],
+        )
+        self.stdout.write(
+            f'Fake captcha verifier on http://{options["host"]}:{server.server_port}/siteverify '
+            '(Ctrl+C to stop)'
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f'Served {server.requests_served} requests.')
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for a burst of new connections from a load test.
+    request_queue_size = 128
+
+
+def make_server(host, port, latency=0.0, jitter=0.0, failure_rate=0.0, hang_rate=0.0):
+    """Build (but do not start) the fake verifier; port 0 picks a free port."""
+
+    class Handler(BaseHTTPRequestHandler):
+        # HTTP/1.1 so clients can keep the connection open between requests.
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; without this, Nagle's
+        # algorithm adds ~40 ms to every reply on a kept-alive connection.
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            fields = parse.parse_qs(self.rfile.read(length).decode('utf-8'))
+            with self.server.counter_lock:
+                self.server.requests_served += 1
+
+            roll = random.random()
+            if roll < hang_rate:
+                self.close_connection = True
+                time.sleep(3600)
+                return
+            time.sleep(latency + random.uniform(0, jitter))
+            if roll < hang_rate + failure_rate:
+                self._send(503, {'error': 'unavailable'})
+                return
+
+            token = (fields.get('response') or [''])[0]
+            if not fields.get('secret') or not token:
+                self._send(200, {'success': False, 'error-codes': ['missing-input']})
+            elif token.startswith(INVALID_TOKEN_PREFIX):
+                self._send(200, {'success': False, 'error-codes': ['invalid-input-response']})
+            else:
+                self._send(200, {'success': True, 'hostname': 'localhost'})
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = _Server((host, port), Handler)
+    server.requests_served = 0
+    server.counter_lock = threading.Lock()
+    return server
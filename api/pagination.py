@@ -0,0 +1,212 @@
+"""
+Pagination classes for the REST API.
+
+Page-number pagination stays the default. Views that mix in
+`CursorPaginationMixin` switch to keyset pagination when the client asks for
+`?pagination=cursor` (or follows a `cursor` link), which skips the COUNT(*)
+query and never issues an OFFSET.
+"""
+
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+MAX_PAGE_SIZE = 100
+
+
+class StandardPageNumberPagination(PageNumberPagination):
+    """Default pagination with a client-selectable, bounded `page_size`."""
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the queryset's first ordering column.
+
+    Every ordering gets `id` appended as a tiebreaker in the same direction,
+    so the position is the `(value, id)` pair of the last row served and the
+    next page is a plain indexed range scan.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+    page_size = api_settings.PAGE_SIZE
+    ordering_fields = ('created_at', 'price', 'name')
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.field_name, self.descending = self.get_ordering(queryset)
+        self.model_field = queryset.model._meta.get_field(self.field_name)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+
+        ordering = self._ordering(reverse)
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self._seek_filter(cursor, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """Return `(field_name, descending)` for the queryset's primary ordering."""
+        order_by = queryset.query.order_by
+        ordering = order_by[0] if order_by else self.default_ordering
+        if not isinstance(ordering, str):
+            ordering = ''
+
+        field_name = ordering.lstrip('-')
+        if field_name not in self.ordering_fields:
+            raise ValidationError({
+                'ordering': 'Cursor pagination supports ordering by {}.'.format(
+                    ', '.join(self.ordering_fields)
+                )
+            })
+        return field_name, ordering.startswith('-')
+
+    def get_key_columns(self, queryset):
+        """Columns `_build_link` reads from each row, for values() querysets."""
+        field_name, _ = self.get_ordering(queryset)
+        return (field_name, 'id')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._build_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._build_link(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            value = self.model_field.to_python(payload['v'])
+            pk = int(payload['i'])
+            reverse = bool(payload.get('r'))
+        except (binascii.Error, DjangoValidationError, KeyError,
+                TypeError, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {'value': value, 'id': pk, 'reverse': reverse}
+
+    def encode_cursor(self, value, pk, reverse):
+        payload = {'v': _cursor_value(value), 'i': pk}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def _ordering(self, reverse):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        return (prefix + self.field_name, prefix + 'id')
+
+    def _seek_filter(self, cursor, reverse):
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        return (
+            Q(**{f'{self.field_name}__{lookup}': cursor['value']}) |
+            Q(**{self.field_name: cursor['value'], f'id__{lookup}': cursor['id']})
+        )
+
+    def _build_link(self, row, reverse):
+        if isinstance(row, dict):
+            # values() rows from the fast list path.
+            value, pk = row[self.field_name], row['id']
+        else:
+            value, pk = getattr(row, self.field_name), row.pk
+        cursor = self.encode_cursor(value, pk, reverse)
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+
+def _cursor_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def wants_cursor_pagination(request):
+    params = request.query_params
+    return params.get('pagination') == 'cursor' or bool(params.get(KeysetPagination.cursor_query_param))
+
+
+def get_paginator(request):
+    """Paginator for plain APIViews that support the cursor opt-in."""
+    if wants_cursor_pagination(request):
+        return KeysetPagination()
+    return StandardPageNumberPagination()
+
+
+class CursorPaginationMixin:
+    """Let clients opt into `KeysetPagination` with `?pagination=cursor`."""
+    cursor_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if wants_cursor_pagination(self.request):
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
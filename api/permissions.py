@@ -42,7 +42,8 @@ class IsArtisanOwner(permissions.BasePermission):
     """Allow access only if user is the owner artisan of the product."""
     
     def has_object_permission(self, request, view, obj):
-        return obj.artisan == request.user
+        # Compare ids so the artisan row is never loaded for the check.
+        return obj.artisan_id == request.user.id
 
 
 class IsConsultantOrAdmin(permissions.BasePermission):
@@ -53,6 +54,13 @@ class IsConsultantOrAdmin(permissions.BasePermission):
                    request.user.role in ['CONSULTANT', 'ADMIN'])
 
 
+class IsReviewAuthor(permissions.BasePermission):
+    """Allow access only to the buyer who wrote the review."""
+    
+    def has_object_permission(self, request, view, obj):
+        return obj.buyer == request.user
+
+
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """Allow owners to edit, others to read only."""
     
@@ -61,7 +69,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
 
         # For product/story models, ownership is through `artisan` relation.
-        if hasattr(obj, 'artisan'):
-            return obj.artisan == request.user
+        if hasattr(obj, 'artisan_id'):
+            return obj.artisan_id == request.user.id
 
         return False
@@ -0,0 +1,157 @@
+"""
+JSON renderer and parser backed by orjson when it is installed.
+
+The output matches DRF's JSONRenderer with this project's settings: compact
+separators, unescaped non-ASCII, Decimals and datetimes formatted by DRF's
+own encoder (so prices stay strings and UTC datetimes keep their trailing
+"Z"), and U+2028/U+2029 escaped. It is not byte-for-byte identical: orjson
+writes finite floats in its own shortest form (1e16 where the stdlib writes
+1e+16), which parses to the same number. orjson would write NaN and Infinity
+as null; data containing them goes to the stdlib renderer instead, which
+raises as DRF does under STRICT_JSON. Anything else orjson cannot handle
+(pretty-printing, ASCII-only output, lenient NaN parsing, oversized
+integers) falls back to the stdlib implementation too.
+
+`StreamingJSONResponse` sends a large array (optionally inside an object
+envelope) in chunks, each encoded by `dumps`, so the body never has to be
+built in full; the bytes are the same as rendering the whole payload.
+"""
+
+import math
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Datetimes go through `default` so they match DRF's isoformat()/"Z" output
+# instead of orjson's RFC 3339 formatting.
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+_LINE_SEPARATOR = '\u2028'.encode()
+_PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+STREAM_CHUNK_SIZE = 500
+
+_encoder = encoders.JSONEncoder()
+
+
+def dumps(data):
+    """Encode `data` the way FastJSONRenderer does, returning bytes."""
+    if orjson is not None:
+        try:
+            ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Let the stdlib path either handle it or raise DRF's usual error.
+            ret = None
+        # orjson writes non-finite floats as null; only look for them when
+        # the output has a null they could be hiding behind.
+        if ret is not None and not (b'null' in ret and _has_non_finite_float(data)):
+            return _escape_separators(ret)
+    return renderers.JSONRenderer().render(data)
+
+
+def _default(obj):
+    return _encoder.default(obj)
+
+
+def _has_non_finite_float(data):
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(_has_non_finite_float(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(_has_non_finite_float(item) for item in data)
+    return False
+
+
+def _escape_separators(ret):
+    # Keep the output a strict JavaScript subset, as JSONRenderer does.
+    if _LINE_SEPARATOR in ret:
+        ret = ret.replace(_LINE_SEPARATOR, b'\\u2028')
+    if _PARAGRAPH_SEPARATOR in ret:
+        ret = ret.replace(_PARAGRAPH_SEPARATOR, b'\\u2029')
+    return ret
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer that encodes with orjson for compact responses."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser that decodes UTF-8 bodies with orjson."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        # orjson only reads UTF-8 and always rejects NaN/Infinity.
+        if orjson is None or not self.strict or encoding.lower().replace('_', '-') != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+def stream_json_array(items, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield `items` as a JSON array in byte chunks of up to `chunk_size` items.
+
+    Pass a lazy iterable (e.g. `queryset.values().iterator()` mapped through
+    a row builder) so the full array never has to sit in memory.
+    """
+    yield b'['
+    chunk = []
+    first = True
+    for item in items:
+        chunk.append(dumps(item))
+        if len(chunk) >= chunk_size:
+            yield (b'' if first else b',') + b','.join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield (b'' if first else b',') + b','.join(chunk)
+    yield b']'
+
+
+def stream_json_object(envelope, key, items, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield `envelope` as a JSON object whose last member, `key`, is the streamed array `items`."""
+    head = dumps(envelope)[:-1]
+    yield head + (b',' if envelope else b'') + dumps(key) + b':'
+    yield from stream_json_array(items, chunk_size)
+    yield b'}'
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    Stream a large JSON array without building the whole body first. With
+    `envelope`, the array is sent as its `key` member instead.
+    """
+
+    def __init__(self, items, envelope=None, key='results', chunk_size=STREAM_CHUNK_SIZE, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        if envelope is None:
+            content = stream_json_array(items, chunk_size)
+        else:
+            content = stream_json_object(envelope, key, items, chunk_size)
+        super().__init__(content, **kwargs)
@@ -5,13 +5,18 @@ Handles data serialization/deserialization for User, Product, ArtisanStory, etc.
 
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from products.models import Product
-from accounts.models import ArtisanStory
+from accounts.models import DUPLICATE_EMAIL_MESSAGE, ArtisanStory
+from orders.models import Order, OrderLine
+from reviews.models import Review
+
+from .fieldsets import SparseFieldsetMixin
 
 User = get_user_model()
 
 
-class UserPublicSerializer(serializers.ModelSerializer):
+class UserPublicSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Limited public view of user profile - for artisan listings."""
     
     class Meta:
@@ -40,6 +45,14 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         model = User
         fields = ('email', 'password', 'password_confirm', 'first_name', 'last_name', 
                   'role', 'phone_number', 'region')
+        # The default UniqueValidator matches case-sensitively; see validate_email.
+        extra_kwargs = {'email': {'validators': []}}
+    
+    def validate_email(self, value):
+        """Reject emails already registered in any letter case."""
+        if User.objects.filter_email(value).exists():
+            raise serializers.ValidationError(DUPLICATE_EMAIL_MESSAGE)
+        return value
     
     def validate(self, data):
         """Validate that passwords match."""
@@ -56,21 +69,27 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         
         user = User(**validated_data)
         user.set_password(password)
-        user.save()
+        try:
+            with transaction.atomic():
+                user.save()
+        except IntegrityError:
+            # Same email registered concurrently, after validate_email ran.
+            raise serializers.ValidationError({'email': [DUPLICATE_EMAIL_MESSAGE]})
         return user
 
 
-class ArtisanStoryListSerializer(serializers.ModelSerializer):
+class ArtisanStoryListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for story list view."""
     artisan = UserPublicSerializer(read_only=True)
 
     class Meta:
         model = ArtisanStory
-        fields = ('id', 'title', 'image', 'created_at', 'artisan')
+        fields = ('id', 'title', 'image', 'created_at', 'artisan', 'content')
         read_only_fields = ('id', 'created_at', 'artisan')
+        expandable_fields = ('content',)
 
 
-class ArtisanStoryDetailSerializer(serializers.ModelSerializer):
+class ArtisanStoryDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for story detail view."""
     artisan = UserPublicSerializer(read_only=True)
 
@@ -88,14 +107,16 @@ class ArtisanStoryWriteSerializer(serializers.ModelSerializer):
         fields = ('title', 'content', 'image')
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for product list view - minimal fields."""
     artisan = UserPublicSerializer(read_only=True)
+    verified_by = UserPublicSerializer(read_only=True)
     
     class Meta:
         model = Product
-        fields = ('id', 'name', 'description', 'price', 'image', 'region', 'artisan',
-                  'is_approved', 'verification_status', 'verification_note', 'is_verified', 'created_at')
+        fields = ('id', 'name', 'description', 'price', 'stock', 'rating', 'rating_count', 'image', 'region',
+                  'artisan', 'is_approved', 'verification_status', 'verification_note', 'is_verified', 'created_at',
+                  'cultural_story', 'craft_process', 'impact_score', 'verified_by')
         read_only_fields = (
             'id',
             'created_at',
@@ -103,34 +124,60 @@ class ProductListSerializer(serializers.ModelSerializer):
             'verification_status',
             'verification_note',
             'is_verified',
+            'impact_score',
+            'rating',
+            'rating_count',
         )
+        # Only rendered when requested with ?expand= (or named in ?fields=).
+        expandable_fields = ('cultural_story', 'craft_process', 'impact_score', 'verified_by')
+
+
+class ArtisanListSerializer(UserPublicSerializer):
+    """Artisan listing with catalogue counts (annotated by ArtisanViewSet)."""
+    product_count = serializers.IntegerField(read_only=True)
+    verified_count = serializers.IntegerField(read_only=True)
+    story_count = serializers.IntegerField(read_only=True)
 
+    class Meta(UserPublicSerializer.Meta):
+        fields = UserPublicSerializer.Meta.fields + ('product_count', 'verified_count', 'story_count')
 
-class ArtisanProfileSerializer(serializers.ModelSerializer):
-    """Public artisan profile with featured approved products."""
+
+class ArtisanProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Public artisan profile with the latest non-rejected products.
+
+    Only the first FEATURED_PRODUCTS are embedded; the full list is paginated
+    at /api/artisans/<id>/products/.
+    """
+    FEATURED_PRODUCTS = 12
+
+    product_count = serializers.IntegerField(read_only=True)
     products = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = ('id', 'email', 'first_name', 'last_name', 'role', 'bio',
-                  'region', 'experience_years', 'profile_image', 'phone_number', 'products')
+                  'region', 'experience_years', 'profile_image', 'phone_number',
+                  'product_count', 'products')
         read_only_fields = fields
 
     def get_products(self, obj):
-        products = obj.products.exclude(
-            verification_status=Product.VerificationStatus.REJECTED
-        ).order_by('-created_at')
+        products = getattr(obj, 'featured_products', None)
+        if products is None:
+            products = obj.products.exclude(
+                verification_status=Product.VerificationStatus.REJECTED
+            ).order_by('-created_at', '-id')[:self.FEATURED_PRODUCTS]
         return ProductListSerializer(products, many=True, context=self.context).data
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class ProductDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for product detail view - all fields."""
     artisan = UserPublicSerializer(read_only=True)
     verified_by = UserPublicSerializer(read_only=True)
     
     class Meta:
         model = Product
-        fields = ('id', 'name', 'description', 'price', 'image', 'region', 
+        fields = ('id', 'name', 'description', 'price', 'stock', 'rating', 'rating_count', 'image', 'region', 
                   'cultural_story', 'craft_process', 'artisan',
                   'is_approved', 'verification_status', 'is_verified', 
                   'verified_by', 'verification_note', 'impact_score', 'created_at')
@@ -143,7 +190,16 @@ class ProductWriteSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = ('name', 'description', 'price', 'image', 'region', 'cultural_story', 'craft_process')
+        fields = ('name', 'description', 'price', 'stock', 'image', 'region', 'cultural_story', 'craft_process')
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # Only the submitted columns: stock and the rating counters are also
+        # changed by F() updates elsewhere, and a full save would overwrite
+        # them with the values read at the start of this request.
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
 
 
 class ProductVerificationSerializer(serializers.ModelSerializer):
@@ -185,8 +241,106 @@ class ProductVerificationSerializer(serializers.ModelSerializer):
         verified_by = validated_data.get('verified_by', None)
         if verified_by:
             instance.verified_by = verified_by
+        # The decision ends any review-queue claim on the product.
+        instance.review_claimed_by = None
+        instance.review_claim_expires_at = None
         instance.save(update_fields=[
             'verification_status', 'verification_note', 'impact_score',
-            'is_approved', 'is_verified', 'verified_at',
+            'is_approved', 'is_verified', 'verified_at', 'verified_by', 'updated_at',
+            'review_claimed_by', 'review_claim_expires_at',
         ])
         return instance
+
+
+class BulkVerificationItemSerializer(serializers.Serializer):
+    """One decision in a POST /api/consultant/verify/bulk/ request."""
+    id = serializers.IntegerField()
+    verification_status = serializers.ChoiceField(
+        choices=[Product.VerificationStatus.VERIFIED, Product.VerificationStatus.REJECTED],
+        error_messages={'invalid_choice': 'Verification status must be VERIFIED or REJECTED.'},
+    )
+    note = serializers.CharField(source='verification_note', required=False, allow_blank=True)
+    impact_score = serializers.IntegerField(required=False, min_value=0, max_value=100)
+
+
+class ConsultantBulkVerifySerializer(serializers.Serializer):
+    """Body of POST /api/consultant/verify/bulk/, validated as a whole before anything is written."""
+    items = BulkVerificationItemSerializer(many=True)
+
+    def validate_items(self, items):
+        ids = [item['id'] for item in items]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError('Each product may appear only once.')
+        return items
+
+
+class CartLineSerializer(serializers.ModelSerializer):
+    """A cart line: the product plus the quantity and subtotal set by CartService."""
+    artisan = UserPublicSerializer(read_only=True)
+    quantity = serializers.IntegerField(read_only=True)
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = Product
+        fields = ('id', 'name', 'price', 'stock', 'image', 'region', 'artisan', 'quantity', 'subtotal')
+        read_only_fields = fields
+
+
+class CartSerializer(serializers.Serializer):
+    """Resolved cart with server-side totals."""
+    items = CartLineSerializer(source='products', many=True, read_only=True)
+    item_count = serializers.IntegerField(read_only=True)
+    total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+
+class CartItemSerializer(serializers.Serializer):
+    """Input for adding a product to the cart or changing its quantity."""
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, max_value=99, default=1)
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """Input for POST /api/orders/checkout/."""
+    idempotency_key = serializers.CharField(
+        max_length=64, required=False, allow_blank=True, default='',
+        error_messages={'max_length': 'Must be at most 64 characters.'},
+    )
+
+    def validate_idempotency_key(self, value):
+        # CharField would turn a number into a string; keys must be sent as one.
+        if not isinstance(self.initial_data.get('idempotency_key', value), str):
+            raise serializers.ValidationError('Must be a string.')
+        return value
+
+
+class OrderLineSerializer(serializers.ModelSerializer):
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = OrderLine
+        fields = ('id', 'product', 'artisan', 'product_name', 'unit_price', 'quantity', 'subtotal')
+        read_only_fields = fields
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    lines = OrderLineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ('id', 'status', 'total', 'lines', 'created_at')
+        read_only_fields = fields
+
+
+class ReviewSerializer(serializers.ModelSerializer):
+    """A product review; `product` is set on create and fixed afterwards."""
+    buyer = UserPublicSerializer(read_only=True, fields={'id': {}, 'first_name': {}, 'last_name': {}})
+
+    class Meta:
+        model = Review
+        fields = ('id', 'product', 'buyer', 'rating', 'comment', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'buyer', 'created_at', 'updated_at')
+
+    def validate_product(self, value):
+        if self.instance is not None and value != self.instance.product:
+            raise serializers.ValidationError('A review cannot be moved to another product.')
+        return value
@@ -0,0 +1,75 @@
+"""
+Signal handlers that keep the product response cache and the list version
+tokens consistent.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import ArtisanStory
+from products.models import Product
+from products.signals import products_changed
+
+from .cache import invalidate_artisans, invalidate_products, invalidate_stories
+from .serializers import UserPublicSerializer
+
+User = get_user_model()
+
+# User columns embedded in product responses (artisan / verified_by).
+PUBLIC_USER_FIELDS = frozenset(UserPublicSerializer.Meta.fields)
+
+
+def _invalidate_on_commit(product_ids):
+    # Deferring to commit stops a concurrent reader from re-caching the old
+    # row between our write and the end of the transaction.
+    transaction.on_commit(lambda: invalidate_products(product_ids))
+
+
+def _products_showing_user(user):
+    return list(
+        Product.objects.filter(Q(artisan=user) | Q(verified_by=user)).values_list('id', flat=True)
+    )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product(sender, instance, **kwargs):
+    _invalidate_on_commit([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_products(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        transaction.on_commit(invalidate_artisans)
+        return
+    if update_fields is not None and PUBLIC_USER_FIELDS.isdisjoint(update_fields):
+        # e.g. update_last_login() on every login.
+        return
+    _invalidate_on_commit(_products_showing_user(instance))
+    # Stories embed their author the same way, and the artisan list shows the
+    # same columns (role included).
+    transaction.on_commit(invalidate_stories)
+    transaction.on_commit(invalidate_artisans)
+
+
+@receiver(pre_delete, sender=User)
+def invalidate_deleted_user_products(sender, instance, **kwargs):
+    # Verified products survive with verified_by set to NULL, which is a
+    # queryset update and sends no Product signals of its own.
+    _invalidate_on_commit(_products_showing_user(instance))
+    transaction.on_commit(invalidate_artisans)
+
+
+@receiver(products_changed)
+def invalidate_changed_products(sender, product_ids, **kwargs):
+    # Already sent after commit.
+    invalidate_products(product_ids)
+
+
+@receiver(post_save, sender=ArtisanStory)
+@receiver(post_delete, sender=ArtisanStory)
+def invalidate_story_lists(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_stories)
@@ -0,0 +1,636 @@
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from accounts.models import ArtisanStory, Role, User
+from core.models import DailyMarketplaceStats
+from orders.models import Order
+from products.cart import CartService
+from products.models import Product
+from products.tests import make_artisan, make_product
+
+from .cache import get_or_compute, invalidate_products, product_detail_cache_key, product_list_cache_key
+from .captcha import INVALID_MESSAGE, CaptchaClient
+from .fast_serialization import compile_row_builder
+from .renderers import FastJSONRenderer, stream_json_object
+from .serializers import ProductListSerializer
+from .views import ArtisanStoryViewSet, ProductViewSet
+
+
+def seed_products(artisan, count, **fields):
+    now = timezone.now()
+    products = Product.objects.bulk_create([
+        Product(
+            artisan=artisan,
+            name=f'Piece {index % 7}',
+            description='Handmade',
+            price=Decimal(index % 13) + Decimal('0.50'),
+            image=f'product_images/piece {index}.jpg',
+            verification_status=Product.VerificationStatus.VERIFIED,
+            **fields,
+        )
+        for index in range(count)
+    ])
+    # Distinct timestamps, so keyset pages have a stable order to walk.
+    for offset, product in enumerate(products):
+        Product.objects.filter(id=product.id).update(created_at=now - timedelta(seconds=offset))
+    return products
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.artisan = make_artisan()
+        self.product = make_product(self.artisan, name='Dhokra horse')
+        self.client = APIClient()
+
+    def as_user(self, role):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(
+            email=f'{role.lower()}-client@example.com', password='pass', role=role,
+        ))
+        return client
+
+    def test_edit_reaches_detail_and_list(self):
+        detail = f'/api/products/{self.product.pk}/'
+        self.client.get(detail)
+        self.client.get('/api/products/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Brass horse'
+            self.product.save()
+
+        self.assertEqual(self.client.get(detail).data['name'], 'Brass horse')
+        self.assertEqual([row['name'] for row in self.client.get('/api/products/').data['results']], ['Brass horse'])
+
+    def test_anonymous_and_buyers_share_entries(self):
+        self.client.get('/api/products/')
+        buyer = self.as_user(Role.BUYER)
+        with self.assertNumQueries(0):
+            self.assertEqual(buyer.get('/api/products/').status_code, 200)
+
+    def test_artisan_and_consultant_responses_are_not_cached(self):
+        self.client.get('/api/products/')
+        for role in (Role.ARTISAN, Role.CONSULTANT):
+            client = self.as_user(role)
+            for _ in range(2):
+                with self.subTest(role=role), CaptureQueriesContext(connection) as queries:
+                    self.assertEqual(client.get('/api/products/').status_code, 200)
+                self.assertGreater(len(queries), 0)
+
+    def test_version_bump_makes_old_entries_unreachable(self):
+        request = Request(APIRequestFactory().get('/api/products/', {'ordering': 'price'}))
+        list_key = product_list_cache_key(request)
+        detail_key = product_detail_cache_key(request, self.product.pk)
+        other_key = product_detail_cache_key(request, self.product.pk + 1)
+        self.assertEqual(get_or_compute(list_key, lambda: 'old'), 'old')
+
+        invalidate_products([self.product.pk])
+
+        self.assertNotEqual(product_list_cache_key(request), list_key)
+        self.assertNotEqual(product_detail_cache_key(request, self.product.pk), detail_key)
+        self.assertEqual(product_detail_cache_key(request, self.product.pk + 1), other_key)
+        self.assertEqual(get_or_compute(product_list_cache_key(request), lambda: 'new'), 'new')
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        start = threading.Barrier(8)
+        computed = []
+        results = []
+
+        def compute():
+            computed.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        def fetch():
+            start.wait()
+            results.append(get_or_compute('api:test:single-flight', compute))
+
+        threads = [threading.Thread(target=fetch) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(computed), 1)
+        self.assertEqual(results, ['value'] * 8)
+
+
+class FastListParityTests(TestCase):
+    """The values() fast path must render exactly what the serializers do."""
+
+    urls = [
+        '/api/products/',
+        '/api/products/?fields=id,name,artisan.first_name',
+        '/api/products/?expand=cultural_story,verified_by',
+        '/api/products/?page_size=3&page=2',
+        '/api/products/?pagination=cursor',
+        '/api/products/?pagination=cursor&ordering=price&page_size=4',
+        '/api/products/?pagination=cursor&fields=name,price',
+        '/api/products/?pagination=cursor&ordering=-name&fields=price',
+        '/api/artisans/',
+        '/api/artisans/?fields=first_name,product_count',
+        '/api/stories/',
+        '/api/stories/?pagination=cursor&fields=title',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artisan = make_artisan()
+        consultant = User.objects.create_user(
+            email='consultant@example.com', password='pass', role=Role.CONSULTANT, first_name='Meera'
+        )
+        products = seed_products(cls.artisan, 25)
+        Product.objects.filter(id__in=[product.id for product in products[:5]]).update(verified_by=consultant)
+        for index in range(12):
+            ArtisanStory.objects.create(artisan=cls.artisan, title=f'Story {index}', content='Text')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def fetch(self, url):
+        cache.clear()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, (url, response.content))
+        return response.json()
+
+    def test_fast_path_matches_serializers(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                fast = self.fetch(url)
+                with mock.patch('api.fast_serialization.compile_row_builder', return_value=None):
+                    slow = self.fetch(url)
+                self.assertEqual(fast, slow)
+
+    def test_cursor_pages_with_sparse_fields(self):
+        url = '/api/products/?pagination=cursor&fields=name,price&page_size=10'
+        seen = 0
+        while url:
+            page = self.fetch(url)
+            for row in page['results']:
+                self.assertEqual(set(row), {'name', 'price'})
+            seen += len(page['results'])
+            url = page['next']
+        self.assertEqual(seen, 25)
+
+
+class FastListBenchmarkTests(TestCase):
+    """
+    Micro-benchmark of the fast path against ProductListSerializer at 10,
+    100 and 1000 rows. Both produce the same rows; the fast path has to be
+    quicker once there is more than a page of them.
+    """
+
+    sizes = (10, 100, 1000)
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_products(make_artisan(), max(cls.sizes))
+
+    def setUp(self):
+        request = Request(APIRequestFactory().get('/api/products/'))
+        self.context = {'request': request}
+        self.queryset = Product.objects.select_related('artisan', 'verified_by').order_by('-created_at', '-id')
+
+    def serialize(self, rows):
+        return ProductListSerializer(list(self.queryset[:rows]), many=True, context=self.context).data
+
+    def fast_serialize(self, rows):
+        columns, build_row = compile_row_builder(ProductListSerializer(context=self.context))
+        return [build_row(row) for row in self.queryset.values(*columns)[:rows]]
+
+    def best_of(self, function, rows, repeat=3):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function(rows)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def test_fast_path_is_faster(self):
+        for rows in self.sizes:
+            with self.subTest(rows=rows):
+                self.assertEqual(
+                    [dict(row) for row in self.serialize(rows)], self.fast_serialize(rows)
+                )
+                slow = self.best_of(self.serialize, rows)
+                fast = self.best_of(self.fast_serialize, rows)
+                if rows >= 100:
+                    self.assertLess(fast, slow, f'{rows} rows: fast {fast:.4f}s, serializer {slow:.4f}s')
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_matches_json_renderer(self):
+        data = {
+            'price': Decimal('250.00'),
+            'created_at': timezone.now(),
+            'name': 'Pattachitra \u2028scroll',
+            'rating': None,
+            'tags': ['odisha', 3, 4.5, True],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_floats_parse_to_the_same_values(self):
+        data = [1e16, 0.1, -2.5e-7, 123456789.125]
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), data)
+
+    def test_non_finite_floats_are_rejected(self):
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                FastJSONRenderer().render({'results': [{'rating': None, 'score': value}]})
+
+
+class StreamingJSONTests(TestCase):
+    def test_stream_matches_the_renderer(self):
+        envelope = {'start': timezone.localdate(), 'metrics': ['revenue']}
+        items = [{'id': index, 'price': Decimal(index) / 4, 'name': 'Dhokra \u2028'} for index in range(7)]
+
+        chunks = list(stream_json_object(envelope, 'results', iter(items), chunk_size=2))
+
+        self.assertGreater(len(chunks), 4)
+        self.assertEqual(b''.join(chunks), FastJSONRenderer().render({**envelope, 'results': items}))
+        self.assertEqual(
+            b''.join(stream_json_object({}, 'results', iter([]))), FastJSONRenderer().render({'results': []}),
+        )
+
+    def test_timeseries_is_streamed(self):
+        today = timezone.localdate()
+        DailyMarketplaceStats.objects.create(
+            date=today - timedelta(days=1), role=Role.ARTISAN, region='Kutch',
+            new_products=3, revenue=Decimal('1250.50'),
+        )
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(
+            email='consultant@example.com', password='pass', role=Role.CONSULTANT,
+        ))
+
+        response = client.get('/api/stats/timeseries/', {'days': 3, 'metrics': 'new_products,revenue'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        expected = {
+            'start': today - timedelta(days=2),
+            'end': today,
+            'metrics': ['new_products', 'revenue'],
+            'results': [
+                {'date': today - timedelta(days=2), 'new_products': 0, 'revenue': 0},
+                {'date': today - timedelta(days=1), 'new_products': 3, 'revenue': Decimal('1250.50')},
+                {'date': today, 'new_products': 0, 'revenue': 0},
+            ],
+        }
+        self.assertEqual(b''.join(response.streaming_content), JSONRenderer().render(expected))
+
+
+def gif(name='piece.gif'):
+    # The smallest valid GIF, so ImageField validation passes.
+    return SimpleUploadedFile(
+        name,
+        b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00'
+        b',\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;',
+        content_type='image/gif',
+    )
+
+
+class WriteQueryBudgetTests(TestCase):
+    """
+    Queries each product and story write endpoint may run. Each fetches its
+    object once; destroy also runs the deletion collector (reviews are
+    loaded for their post_delete signal, then one statement per cascaded
+    table).
+    """
+
+    write_actions = {'post': 'create', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        overrides = self.settings(MEDIA_ROOT=media_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.factory = APIRequestFactory()
+        self.owner = make_artisan('owner@example.com')
+        self.other = make_artisan('other@example.com')
+
+    def call(self, viewset, method, path, user, data=None, budget=0, expect=None, pk=None, format='json'):
+        view = viewset.as_view(self.write_actions)
+        request = getattr(self.factory, method)(path, data, format=format)
+        force_authenticate(request, user=user)
+        with self.assertNumQueries(budget):
+            response = view(request, **({'pk': pk} if pk is not None else {}))
+            response.render()
+        if expect is None:
+            expect = {'post': 201, 'delete': 204}.get(method, 200)
+        self.assertEqual(response.status_code, expect, response.content[:300])
+        return response
+
+    def test_product_writes(self):
+        fields = {'name': 'Budget product', 'description': 'Handmade', 'price': '10.00'}
+        response = self.call(
+            ProductViewSet, 'post', '/api/products/', self.owner, {**fields, 'image': gif()},
+            budget=1, format='multipart',
+        )
+        pk = response.data['id']
+        detail = f'/api/products/{pk}/'
+        self.call(ProductViewSet, 'patch', detail, self.owner, {'price': '12.00'}, budget=2, pk=pk)
+        self.call(
+            ProductViewSet, 'put', detail, self.owner, {**fields, 'image': gif()},
+            budget=2, pk=pk, format='multipart',
+        )
+        # Owners see their own unverified products; others only verified ones.
+        Product.objects.filter(pk=pk).update(verification_status=Product.VerificationStatus.VERIFIED)
+        self.call(ProductViewSet, 'patch', detail, self.other, {'price': '1.00'}, budget=1, expect=403, pk=pk)
+        self.call(ProductViewSet, 'delete', detail, self.owner, budget=7, pk=pk)
+        self.assertFalse(Product.objects.filter(pk=pk).exists())
+
+    def test_story_writes(self):
+        fields = {'title': 'Budget story', 'content': 'Handmade'}
+        response = self.call(ArtisanStoryViewSet, 'post', '/api/stories/', self.owner, fields, budget=1)
+        pk = response.data['id']
+        detail = f'/api/stories/{pk}/'
+        self.call(ArtisanStoryViewSet, 'patch', detail, self.owner, {'title': 'Renamed'}, budget=2, pk=pk)
+        self.call(ArtisanStoryViewSet, 'put', detail, self.owner, fields, budget=2, pk=pk)
+        self.call(ArtisanStoryViewSet, 'patch', detail, self.other, {'title': 'Nope'}, budget=1, expect=403, pk=pk)
+        self.call(ArtisanStoryViewSet, 'delete', detail, self.owner, budget=2, pk=pk)
+        self.assertFalse(ArtisanStory.objects.filter(pk=pk).exists())
+
+
+class ConditionalListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.artisan = make_artisan()
+        cls.products = seed_products(cls.artisan, 5)
+        cls.story = ArtisanStory.objects.create(artisan=cls.artisan, title='Story', content='Text')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def assertNotModified(self, url, etag):
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_cursor_lists_run_only_the_page_query(self):
+        for url in ('/api/products/?pagination=cursor', '/api/stories/?pagination=cursor'):
+            with self.subTest(url=url):
+                self.etag(url)
+                with self.assertNumQueries(1):
+                    self.client.get(url + '&page_size=3')
+
+    def test_product_list_etag_follows_product_writes(self):
+        url = '/api/products/?pagination=cursor'
+        etag = self.etag(url)
+        self.assertNotModified(url, etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.get(id=self.products[0].id).save()
+        self.assertNotEqual(self.etag(url), etag)
+
+    def test_product_list_etag_follows_artisan_edits(self):
+        url = '/api/products/'
+        etag = self.etag(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.artisan.first_name = 'Lakshmi'
+            self.artisan.save()
+        self.assertNotEqual(self.etag(url), etag)
+
+    def test_story_list_etag_follows_story_writes(self):
+        url = '/api/stories/'
+        etag = self.etag(url)
+        self.assertNotModified(url, etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.story.title = 'Retold'
+            self.story.save()
+        changed = self.etag(url)
+        self.assertNotEqual(changed, etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.story.delete()
+        self.assertNotEqual(self.etag(url), changed)
+
+    def test_etag_depends_on_query_string(self):
+        self.assertNotEqual(self.etag('/api/products/?ordering=price'), self.etag('/api/products/?ordering=name'))
+
+
+class ArtisanEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.artisan = make_artisan()
+        make_artisan('second@example.com')
+        cls.products = seed_products(cls.artisan, 12)
+        ArtisanStory.objects.create(artisan=cls.artisan, title='Story', content='Text')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_list_queries(self):
+        # Page count and page; the counts are correlated subqueries.
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/artisans/')
+        row = next(row for row in response.json()['results'] if row['id'] == self.artisan.id)
+        self.assertEqual((row['product_count'], row['verified_count'], row['story_count']), (12, 12, 1))
+
+    def test_profile_queries(self):
+        # The artisan and its featured products.
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/artisans/{self.artisan.id}/')
+        self.assertEqual(response.json()['product_count'], 12)
+
+    def test_products_queries(self):
+        # The artisan, then the page count and the page.
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/artisans/{self.artisan.id}/products/')
+        self.assertEqual(response.json()['count'], 12)
+
+    def test_validators_follow_writes(self):
+        urls = ['/api/artisans/', f'/api/artisans/{self.artisan.id}/', f'/api/artisans/{self.artisan.id}/products/']
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        for url, etag in etags.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.get(id=self.products[0].id).delete()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+    def test_list_etag_follows_new_artisans_and_stories(self):
+        etag = self.client.get('/api/artisans/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            make_artisan('third@example.com')
+        changed = self.client.get('/api/artisans/')['ETag']
+        self.assertNotEqual(changed, etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ArtisanStory.objects.create(artisan=self.artisan, title='Another', content='Text')
+        self.assertNotEqual(self.client.get('/api/artisans/')['ETag'], changed)
+
+
+class CartEndpointTests(TransactionTestCase):
+    def setUp(self):
+        self.product = make_product(make_artisan(), stock=5)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='buyer@example.com', password='pass', role=Role.BUYER,
+        ))
+
+    def test_product_deleted_while_adding_is_not_found(self):
+        add = CartService.add
+
+        def add_after_delete(service, product_id, quantity=1):
+            Product.objects.filter(id=product_id).delete()
+            add(service, product_id, quantity)
+
+        with mock.patch.object(CartService, 'add', add_after_delete):
+            response = self.client.post('/api/cart/', {'product_id': self.product.id, 'quantity': 1}, format='json')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get('/api/cart/').data['item_count'], 0)
+
+
+class ConsultantBulkVerifyTests(TestCase):
+    def setUp(self):
+        artisan = make_artisan()
+        pending = Product.VerificationStatus.PENDING
+        self.products = [
+            make_product(artisan, name=f'Piece {index}', verification_status=pending) for index in range(2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='consultant@example.com', password='pass', role=Role.CONSULTANT,
+        ))
+
+    def post(self, items):
+        return self.client.post('/api/consultant/verify/bulk/', items, format='json')
+
+    def test_applies_each_decision(self):
+        first, second = self.products
+        response = self.post([
+            {'id': first.id, 'verification_status': 'VERIFIED', 'impact_score': 80},
+            {'id': second.id, 'verification_status': 'REJECTED', 'note': 'Machine printed'},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.verification_status, first.impact_score), ('VERIFIED', 80))
+        self.assertEqual((second.verification_status, second.verification_note), ('REJECTED', 'Machine printed'))
+
+    def test_duplicate_ids_are_rejected(self):
+        product = self.products[0]
+        response = self.post([
+            {'id': product.id, 'verification_status': 'VERIFIED'},
+            {'id': product.id, 'verification_status': 'REJECTED'},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'items': ['Each product may appear only once.']})
+        product.refresh_from_db()
+        self.assertEqual(product.verification_status, Product.VerificationStatus.PENDING)
+
+
+class CheckoutEndpointTests(TestCase):
+    def setUp(self):
+        self.product = make_product(make_artisan(), stock=5)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='buyer@example.com', password='pass', role=Role.BUYER,
+        ))
+        self.client.post('/api/cart/', {'product_id': self.product.id, 'quantity': 1}, format='json')
+
+    def checkout(self, data=None, key=None):
+        headers = {'Idempotency-Key': key} if key else {}
+        return self.client.post('/api/orders/checkout/', data, format='json', headers=headers)
+
+    def test_malformed_keys_are_rejected(self):
+        for data in ({'idempotency_key': 123}, {'idempotency_key': ['a']}, {'idempotency_key': 'k' * 65}, ['a']):
+            with self.subTest(data=data):
+                self.assertEqual(self.checkout(data).status_code, 400)
+        self.assertEqual(self.checkout(key='k' * 65).status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_repeated_key_returns_the_original_order(self):
+        first = self.checkout(key='order-1')
+        repeat = self.checkout({'idempotency_key': 'order-1'})
+
+        self.assertEqual((first.status_code, repeat.status_code), (201, 200))
+        self.assertEqual(first.data['id'], repeat.data['id'])
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class CaptchaClientTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = CaptchaClient('http://captcha.invalid/siteverify', 'secret')
+        patcher = mock.patch.object(self.client, '_post', return_value={'success': True})
+        self.post = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_verified_token_is_reused_from_the_same_ip(self):
+        self.assertEqual(self.client.verify('token', '203.0.113.5'), (True, None))
+        self.assertEqual(self.client.verify('token', '203.0.113.5'), (True, None))
+        self.assertEqual(self.post.call_count, 1)
+
+    def test_verified_token_is_not_reused_from_another_ip(self):
+        self.client.verify('token', '203.0.113.5')
+        self.post.return_value = {'success': False, 'error-codes': ['timeout-or-duplicate']}
+        self.assertEqual(self.client.verify('token', '198.51.100.7'), (False, INVALID_MESSAGE))
+        self.assertEqual(self.post.call_count, 2)
+
+    def test_single_use_skips_the_cache(self):
+        self.client.verify('token', '203.0.113.5')
+        self.client.verify('token', '203.0.113.5', single_use=True)
+        self.assertEqual(self.post.call_count, 2)
+
+        self.client.verify('fresh', '203.0.113.5', single_use=True)
+        self.client.verify('fresh', '203.0.113.5')
+        self.assertEqual(self.post.call_count, 4)
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+class CaptchaClientIPTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(HTTP_X_FORWARDED_FOR='203.0.113.5', REMOTE_ADDR='10.0.0.1')
+
+    def test_login_and_register_verify_with_the_throttled_ip(self):
+        with mock.patch('api.views.verify_captcha', return_value=(False, 'Captcha failed.')) as verify:
+            self.client.post('/api/auth/login/', {
+                'email': 'buyer@example.com', 'password': 'pass', 'captcha_token': 'token',
+            }, format='json')
+            self.client.post('/api/auth/register/', {'captcha_token': 'token'}, format='json')
+
+        self.assertEqual(verify.call_args_list, [
+            mock.call('token', '203.0.113.5'),
+            mock.call('token', '203.0.113.5', single_use=True),
+        ])
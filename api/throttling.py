@@ -0,0 +1,50 @@
+"""
+DRF throttles for the login and registration endpoints.
+Thin wrappers over the sliding-window limiter in accounts.throttling.
+"""
+
+from rest_framework.throttling import BaseThrottle
+
+from accounts.throttling import apply_headers, check, ident_for
+
+
+class AuthScopeThrottle(BaseThrottle):
+    """Throttle requests against one scope of settings.AUTH_THROTTLE_RATES."""
+    scope = None
+
+    def allow_request(self, request, view):
+        data = request.data if hasattr(request.data, 'get') else {}
+        self.decision = check(self.scope, ident_for(self.scope, request, data))
+        return self.decision is None or self.decision.allowed
+
+    def wait(self):
+        return self.decision.retry_after if self.decision else None
+
+
+class LoginIPThrottle(AuthScopeThrottle):
+    scope = 'login_ip'
+
+
+class LoginEmailThrottle(AuthScopeThrottle):
+    scope = 'login_email'
+
+
+class RegisterIPThrottle(AuthScopeThrottle):
+    scope = 'register_ip'
+
+
+class RateLimitHeadersMixin:
+    """Add X-RateLimit-Limit/-Remaining headers from the view's AuthScopeThrottles."""
+
+    def get_throttles(self):
+        if not hasattr(self, '_throttles'):
+            self._throttles = super().get_throttles()
+        return self._throttles
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        decisions = [
+            throttle.decision for throttle in getattr(self, '_throttles', ())
+            if getattr(throttle, 'decision', None) is not None
+        ]
+        return apply_headers(response, decisions)
@@ -5,16 +5,27 @@ Defines all REST API endpoints for frontend consumption.
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenRefreshView
 
 from .views import (
     CustomTokenObtainPairView,
+    CustomTokenRefreshView,
+    LogoutView,
     RegisterView,
     CurrentUserView,
     ProductViewSet,
     ArtisanViewSet,
     ArtisanStoryViewSet,
+    CartView,
+    CartItemView,
+    CartReserveView,
+    OrderViewSet,
+    ReviewViewSet,
+    CertificateProofView,
+    CertificateBulkVerifyView,
+    StatsTimeseriesView,
     ConsultantPendingView,
+    ConsultantClaimView,
+    ConsultantBulkVerifyView,
     ConsultantVerifyView,
 )
 
@@ -23,18 +34,35 @@ router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
 router.register(r'artisans', ArtisanViewSet, basename='artisan')
 router.register(r'stories', ArtisanStoryViewSet, basename='story')
+router.register(r'orders', OrderViewSet, basename='order')
+router.register(r'reviews', ReviewViewSet, basename='review')
 
 urlpatterns = [
     # Email / password authentication
     path('auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/logout/', LogoutView.as_view(), name='logout'),
     path('auth/register/', RegisterView.as_view(), name='register'),
 
     # User profile
     path('auth/me/', CurrentUserView.as_view(), name='current_user'),
 
+    # Cart
+    path('cart/', CartView.as_view(), name='cart'),
+    path('cart/items/<int:product_id>/', CartItemView.as_view(), name='cart_item'),
+    path('cart/reserve/', CartReserveView.as_view(), name='cart_reserve'),
+
+    # Authenticity certificates
+    path('authenticity/<int:certificate_id>/proof/', CertificateProofView.as_view(), name='certificate_proof'),
+    path('authenticity/verify/', CertificateBulkVerifyView.as_view(), name='certificate_verify'),
+
+    # Marketplace analytics
+    path('stats/timeseries/', StatsTimeseriesView.as_view(), name='stats_timeseries'),
+
     # Consultant endpoints
     path('consultant/pending/', ConsultantPendingView.as_view(), name='consultant_pending'),
+    path('consultant/claims/', ConsultantClaimView.as_view(), name='consultant_claims'),
+    path('consultant/verify/bulk/', ConsultantBulkVerifyView.as_view(), name='consultant_verify_bulk'),
     path('consultant/verify/<int:product_id>/', ConsultantVerifyView.as_view(), name='consultant_verify'),
 
     # ViewSet routes
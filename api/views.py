@@ -7,68 +7,73 @@ from rest_framework import status, viewsets, views, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
-from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Prefetch, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.utils import timezone
+from datetime import date, timedelta
 from decimal import Decimal, InvalidOperation
-import json
-from urllib import parse, request as urllib_request
-from urllib.error import URLError, HTTPError
 
+from products.cart import CartService, merge_guest_cart
+from products.inventory import OutOfStock, reserve
 from products.models import Product
+from products.moderation import MAX_DECISIONS, UPDATED, apply_decisions
+from products.review_queue import (
+    ClaimHeld, claim_products, claimable, claimed_by, lock_for_review, release_claims
+)
+from products.search import search_products
+from accounts.authentication import TOKEN_VERSION_CLAIM, get_token_user
 from accounts.models import ArtisanStory
+from accounts.revocation import is_revoked, revoke
+from accounts.throttling import client_ip
+from orders.checkout import CheckoutError, place_order
+from orders.models import Order, OrderLine
+from reviews.models import Review
+from authenticity.certificates import MAX_BUNDLES, proof_bundle, verify_bundles
+from authenticity.models import Certificate
+from core.models import DailyMarketplaceStats
+from core.rollups import METRICS as ROLLUP_METRICS
 
 from .serializers import (
-    UserRegisterSerializer, UserDetailSerializer, UserPublicSerializer,
-    ArtisanProfileSerializer,
+    UserRegisterSerializer, UserDetailSerializer,
+    ArtisanListSerializer, ArtisanProfileSerializer,
     ProductListSerializer, ProductDetailSerializer, ProductWriteSerializer, ProductVerificationSerializer,
-    ArtisanStoryListSerializer, ArtisanStoryDetailSerializer, ArtisanStoryWriteSerializer
+    ArtisanStoryListSerializer, ArtisanStoryDetailSerializer, ArtisanStoryWriteSerializer,
+    CartSerializer, CartItemSerializer, CheckoutSerializer, OrderSerializer, ReviewSerializer,
+    ConsultantBulkVerifySerializer,
 )
 from .permissions import (
-    IsAdmin, IsArtisan, IsConsultantOrAdmin, IsArtisanOwner, IsOwnerOrReadOnly
+    IsAdmin, IsArtisan, IsBuyer, IsConsultantOrAdmin, IsArtisanOwner, IsOwnerOrReadOnly, IsReviewAuthor
+)
+from .pagination import CursorPaginationMixin, get_paginator
+from .captcha import verify_captcha
+from .throttling import LoginEmailThrottle, LoginIPThrottle, RateLimitHeadersMixin, RegisterIPThrottle
+from .cache import (
+    ARTISAN_LIST_VERSION_KEY, LIST_VERSION_KEY, STORY_LIST_VERSION_KEY, get_or_compute, is_cacheable_request, list_version,
+    product_detail_cache_key, product_list_cache_key
 )
+from .conditional import ConditionalGetMixin, build_validators
+from .fieldsets import SparseFieldsetViewMixin, parse_fieldset, project_queryset
+from .fast_serialization import FastListMixin
+from .renderers import StreamingJSONResponse
 
 User = get_user_model()
 
+# Viewset actions that fetch a single object to change it; they need no
+# related rows joined in.
+WRITE_ACTIONS = ('update', 'partial_update', 'destroy')
 
 
 
-def _verify_captcha_token(captcha_token):
-    """Validate Google reCAPTCHA token using secret key from environment."""
-    if not captcha_token:
-        return False, 'Captcha is required.'
-
-    secret_key = getattr(settings, 'RECAPTCHA_SECRET_KEY', '')
-    if not secret_key:
-        return False, 'Captcha is not configured on the server.'
-
-    payload = parse.urlencode({
-        'secret': secret_key,
-        'response': captcha_token,
-    }).encode('utf-8')
-
-    verify_request = urllib_request.Request(
-        'https://www.google.com/recaptcha/api/siteverify',
-        data=payload,
-        method='POST',
-    )
-
-    try:
-        with urllib_request.urlopen(verify_request, timeout=8) as response:
-            result = json.loads(response.read().decode('utf-8'))
-    except (URLError, HTTPError, TimeoutError, ValueError):
-        return False, 'Captcha verification failed. Please try again.'
-
-    if result.get('success'):
-        return True, None
-
-    return False, 'Captcha validation failed. Please try again.'
-
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Customize token response to include user data."""
@@ -76,11 +81,15 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
     def validate(self, attrs):
         captcha_token = attrs.pop('captcha_token', None)
-        is_valid, error_message = _verify_captcha_token(captcha_token)
+        is_valid, error_message = verify_captcha(captcha_token, client_ip(self.context['request']))
         if not is_valid:
             raise serializers.ValidationError({'detail': error_message})
 
-        return super().validate(attrs)
+        data = super().validate(attrs)
+        # Token logins don't go through django.contrib.auth.login(), so the
+        # user_logged_in cart merge has to happen here.
+        merge_guest_cart(self.context['request'], self.user)
+        return data
     
     def get_token(self, user):
         token = super().get_token(user)
@@ -94,22 +103,58 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
         token['role'] = user.role
         token['email'] = user.email
+        token[TOKEN_VERSION_CLAIM] = user.token_version
         return token
 
 
-class CustomTokenObtainPairView(TokenObtainPairView):
+class CustomTokenObtainPairView(RateLimitHeadersMixin, TokenObtainPairView):
     """Token obtain view with custom serializer."""
     serializer_class = CustomTokenObtainPairSerializer
+    # Checked before the captcha call and the password hash.
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh against the in-memory denylist and the cached user instead of
+    the database. With ROTATE_REFRESH_TOKENS on, the refresh token sent in
+    is revoked as a new one is issued, so each can be used only once.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked(refresh):
+            raise AuthenticationFailed('Token has been revoked.', code='token_revoked')
+        get_token_user(refresh)
+
+        data = {'access': str(refresh.access_token)}
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if not revoke(refresh):
+                # Another request rotated this token first: a replay.
+                raise AuthenticationFailed('Token has been revoked.', code='token_revoked')
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class CustomTokenRefreshView(TokenRefreshView):
+    """Token refresh view with rotation and revocation checks."""
+    serializer_class = RotatingTokenRefreshSerializer
 
 
 # ============== AUTH ENDPOINTS ==============
 
-class RegisterView(views.APIView):
+class RegisterView(RateLimitHeadersMixin, views.APIView):
     """Register a new user."""
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterIPThrottle]
     
     def post(self, request):
-        is_valid_captcha, captcha_error = _verify_captcha_token(request.data.get('captcha_token'))
+        is_valid_captcha, captcha_error = verify_captcha(
+            request.data.get('captcha_token'), client_ip(request), single_use=True
+        )
         if not is_valid_captcha:
             return Response({'detail': captcha_error}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -124,6 +169,25 @@ class RegisterView(views.APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class LogoutView(views.APIView):
+    """Revoke a refresh token, and the access token sent with the request."""
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        raw_refresh = request.data.get('refresh')
+        if not raw_refresh:
+            raise ValidationError({'refresh': 'This field is required.'})
+        try:
+            refresh = RefreshToken(raw_refresh)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        revoke(refresh)
+        if request.auth is not None:
+            revoke(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 # ============== USER ENDPOINTS ==============
 
 class CurrentUserView(views.APIView):
@@ -146,7 +210,8 @@ class CurrentUserView(views.APIView):
 
 # ============== PRODUCT ENDPOINTS ==============
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CursorPaginationMixin, FastListMixin, ConditionalGetMixin, SparseFieldsetViewMixin,
+                     viewsets.ModelViewSet):
     """
     API endpoint for products.
     - GET /api/products/ : List all verified products
@@ -183,7 +248,9 @@ class ProductViewSet(viewsets.ModelViewSet):
         user = self.request.user
         params = self.request.query_params
 
-        queryset = Product.objects.select_related('artisan', 'verified_by').all()
+        queryset = Product.objects.all()
+        if self.action not in WRITE_ACTIONS:
+            queryset = queryset.select_related('artisan', 'verified_by')
         
         if user.is_authenticated:
             if user.role in ['ADMIN', 'CONSULTANT']:
@@ -211,14 +278,12 @@ class ProductViewSet(viewsets.ModelViewSet):
         is_verified = params.get('is_verified')
         min_price = params.get('min_price')
         max_price = params.get('max_price')
+        min_rating = params.get('min_rating')
+        in_stock = params.get('in_stock')
         ordering = params.get('ordering', '-created_at')
 
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(description__icontains=search) |
-                Q(cultural_story__icontains=search)
-            )
+            queryset = search_products(queryset, search)
 
         if region:
             queryset = queryset.filter(region__icontains=region)
@@ -247,41 +312,108 @@ class ProductViewSet(viewsets.ModelViewSet):
                 raise ValidationError({'max_price': 'max_price must be a valid number.'})
             queryset = queryset.filter(price__lte=max_price)
 
+        if min_rating is not None:
+            try:
+                min_rating = Decimal(min_rating)
+            except (InvalidOperation, TypeError):
+                raise ValidationError({'min_rating': 'min_rating must be a valid number.'})
+            queryset = queryset.filter(rating__gte=min_rating)
+
+        if in_stock is not None:
+            normalized = str(in_stock).lower()
+            if normalized in ['true', '1', 'yes']:
+                queryset = queryset.filter(stock__gt=0)
+            elif normalized in ['false', '0', 'no']:
+                queryset = queryset.filter(stock=0)
+
+        if ordering == 'relevance':
+            if search:
+                return queryset.order_by('-search_rank', '-created_at')
+            ordering = '-created_at'
+
+        if ordering in ('rating', '-rating'):
+            # Unrated products sort last either way (product_verified_rating_idx).
+            rating = F('rating').desc(nulls_last=True) if ordering == '-rating' else F('rating').asc(nulls_last=True)
+            return queryset.order_by(rating, '-id' if ordering == '-rating' else 'id')
+
         allowed_ordering = {'created_at', '-created_at', 'price', '-price', 'name', '-name'}
         if ordering not in allowed_ordering:
             ordering = '-created_at'
 
         return queryset.order_by(ordering)
-    
+
+    def get_projection_extra(self):
+        if self.action == 'retrieve':
+            # Read by get_object_validators.
+            return ('updated_at', 'artisan__updated_at', 'verified_by__updated_at')
+        return ()
+
+    def get_etag_scope(self, request):
+        if is_cacheable_request(request):
+            return 'public'
+        return f'user:{request.user.pk}'
+
+    def get_list_validators(self, queryset):
+        # Any product write, or an edit to a user shown on a product, swaps the
+        # list token; the query string is part of the ETag already.
+        return build_validators(
+            self.request,
+            self.get_etag_scope(self.request),
+            list_version(LIST_VERSION_KEY),
+        )
+
+    def get_object_validators(self, product):
+        timestamps = [product.updated_at, product.artisan.updated_at]
+        if product.verified_by_id:
+            timestamps.append(product.verified_by.updated_at)
+        return build_validators(
+            self.request,
+            self.get_etag_scope(self.request),
+            product.pk,
+            timestamps,
+            send_last_modified=True,
+        )
+
+    def list(self, request, *args, **kwargs):
+        """List products, served from the shared cache for anonymous users and buyers."""
+        if not is_cacheable_request(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified, data = get_or_compute(
+            product_list_cache_key(request),
+            lambda: (*self.get_list_validators(queryset), self.serialize_list(queryset)),
+        )
+        return self.conditional_response(etag, last_modified, lambda: data)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Product detail, served from the shared cache for anonymous users and buyers."""
+        if not is_cacheable_request(request):
+            return super().retrieve(request, *args, **kwargs)
+
+        def build_entry():
+            product = self.get_object()
+            return (*self.get_object_validators(product), self.get_serializer(product).data)
+
+        etag, last_modified, data = get_or_compute(
+            product_detail_cache_key(request, kwargs[self.lookup_field]),
+            build_entry,
+        )
+        return self.conditional_response(etag, last_modified, lambda: data)
+
     def create(self, request, *args, **kwargs):
         """Create a new product."""
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             serializer.save(artisan=request.user)
-            detail_data = ProductDetailSerializer(
-                Product.objects.select_related('artisan', 'verified_by').get(id=serializer.instance.id)
-            ).data
+            # Serialized from the saved instance: its artisan is request.user
+            # and a new product has no verifier, so nothing is re-read.
+            detail_data = ProductDetailSerializer(serializer.instance).data
             return Response(detail_data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    def update(self, request, *args, **kwargs):
-        """Update own product."""
-        product = self.get_object()
-        if product.artisan != request.user:
-            raise PermissionDenied(detail='You can only edit your own products.')
-        return super().update(request, *args, **kwargs)
 
-    def partial_update(self, request, *args, **kwargs):
-        product = self.get_object()
-        if product.artisan != request.user:
-            raise PermissionDenied(detail='You can only edit your own products.')
-        return super().partial_update(request, *args, **kwargs)
-
-    def destroy(self, request, *args, **kwargs):
-        product = self.get_object()
-        if product.artisan != request.user:
-            raise PermissionDenied(detail='You can only delete your own products.')
-        return super().destroy(request, *args, **kwargs)
+    # update, partial_update and destroy are ModelViewSet's: one get_object(),
+    # which runs IsArtisanOwner against artisan_id.
     
     @action(detail=True, methods=['patch'], 
             permission_classes=[IsAuthenticated, IsConsultantOrAdmin])
@@ -291,55 +423,34 @@ class ProductViewSet(viewsets.ModelViewSet):
         PATCH /api/products/<id>/verify/
         """
         product = self.get_object()
-        serializer = ProductVerificationSerializer(product, data=request.data, partial=True)
-        
-        if serializer.is_valid():
-            serializer.save(verified_by=request.user)
-            return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return _apply_verification(request, product.pk)
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsConsultantOrAdmin])
     def pending(self, request):
         """Get all pending-verification products for consultant review."""
-        products = Product.objects.filter(
+        products = self.project_for_read(Product.objects.filter(
             verification_status=Product.VerificationStatus.PENDING
-        ).select_related('artisan', 'verified_by').order_by('-created_at')
-
-        page = self.paginate_queryset(products)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        ).select_related('artisan', 'verified_by').order_by('-created_at'))
 
-        serializer = self.get_serializer(products, many=True)
-        return Response(serializer.data)
+        return self.list_response(products)
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsArtisan])
     def my_products(self, request):
         """Get current user's products (Artisan only)."""
-        products = Product.objects.filter(artisan=request.user).order_by('-created_at')
-        page = self.paginate_queryset(products)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-
-        serializer = self.get_serializer(products, many=True)
-        return Response(serializer.data)
+        products = self.project_for_read(
+            Product.objects.filter(artisan=request.user).select_related('artisan').order_by('-created_at')
+        )
+        return self.list_response(products)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdmin])
     def pending_approval(self, request):
         """[Deprecated] Admin approval is no longer required; consultant verification is the single gate.
         Returns products with PENDING verification status for reference."""
-        products = Product.objects.filter(
+        products = self.project_for_read(Product.objects.filter(
             verification_status=Product.VerificationStatus.PENDING
-        ).select_related('artisan', 'verified_by').order_by('-created_at')
-
-        page = self.paginate_queryset(products)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        ).select_related('artisan', 'verified_by').order_by('-created_at'))
 
-        serializer = self.get_serializer(products, many=True)
-        return Response(serializer.data)
+        return self.list_response(products)
 
     @action(detail=True, methods=['patch'], permission_classes=[IsAuthenticated, IsAdmin])
     def approve(self, request, pk=None):
@@ -357,31 +468,118 @@ class ProductViewSet(viewsets.ModelViewSet):
         product.is_approved = False
         product.is_verified = False
         product.verification_status = Product.VerificationStatus.REJECTED
-        product.save(update_fields=['is_approved', 'is_verified', 'verification_status'])
+        product.save(update_fields=['is_approved', 'is_verified', 'verification_status', 'updated_at'])
         return Response({'message': 'Product rejected and removed from marketplace.'}, status=status.HTTP_200_OK)
 
 
 # ============== ARTISAN ENDPOINTS ==============
 
-class ArtisanViewSet(viewsets.ReadOnlyModelViewSet):
+class ArtisanViewSet(FastListMixin, ConditionalGetMixin, SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for artisans (read-only).
     - GET /api/artisans/ : List all artisans
     - GET /api/artisans/<id>/ : Artisan detail
+    - GET /api/artisans/<id>/products/ : Artisan's products (paginated)
     """
-    queryset = User.objects.filter(role='ARTISAN').prefetch_related('products', 'stories')
-    serializer_class = UserPublicSerializer
+    serializer_class = ArtisanListSerializer
     permission_classes = [AllowAny]
-    
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return ArtisanProfileSerializer
-        return UserPublicSerializer
+        if self.action == 'products':
+            return ProductListSerializer
+        return ArtisanListSerializer
+
+    def get_queryset(self):
+        artisans = User.objects.filter(role='ARTISAN')
+        public_products = Product.objects.filter(artisan=OuterRef('pk')).exclude(
+            verification_status=Product.VerificationStatus.REJECTED
+        )
+
+        if self.action == 'list':
+            # Correlated counts instead of prefetching every product and story.
+            return artisans.annotate(
+                product_count=_count_subquery(public_products),
+                verified_count=_count_subquery(
+                    public_products.filter(verification_status=Product.VerificationStatus.VERIFIED)
+                ),
+                story_count=_count_subquery(ArtisanStory.objects.filter(artisan=OuterRef('pk'))),
+            ).order_by('id')
+
+        if self.action == 'retrieve':
+            featured = Product.objects.exclude(
+                verification_status=Product.VerificationStatus.REJECTED
+            ).select_related('verified_by').order_by('-created_at', '-id')
+            return artisans.annotate(
+                product_count=_count_subquery(public_products),
+            ).prefetch_related(
+                Prefetch(
+                    'products',
+                    queryset=featured[:ArtisanProfileSerializer.FEATURED_PRODUCTS],
+                    to_attr='featured_products',
+                )
+            )
+
+        return artisans
+
+    def filter_queryset(self, queryset):
+        if self.action == 'products':
+            # The artisan lookup is a plain existence check; projection applies
+            # to the product queryset in `products` instead.
+            return queryset
+        return super().filter_queryset(queryset)
+
+    def get_list_validators(self, queryset):
+        # The counts change with products and stories, so their tokens are
+        # part of the ETag along with the artisan rows' own.
+        return build_validators(
+            self.request,
+            self.get_etag_scope(self.request),
+            tuple(
+                list_version(key)
+                for key in (ARTISAN_LIST_VERSION_KEY, LIST_VERSION_KEY, STORY_LIST_VERSION_KEY)
+            ),
+        )
+
+    def get_object_validators(self, artisan):
+        return build_validators(
+            self.request,
+            self.get_etag_scope(self.request),
+            (artisan.pk, list_version(LIST_VERSION_KEY)),
+            (artisan.updated_at,),
+        )
+
+    @action(detail=True, methods=['get'])
+    def products(self, request, pk=None):
+        """List an artisan's non-rejected products, newest first."""
+        artisan = self.get_object()
+        products = self.project_for_read(
+            Product.objects.filter(artisan=artisan).exclude(
+                verification_status=Product.VerificationStatus.REJECTED
+            ).select_related('artisan', 'verified_by').order_by('-created_at', '-id')
+        )
+
+        # Product writes and edits to their verifiers swap the product token.
+        etag, last_modified = build_validators(
+            request,
+            self.get_etag_scope(request),
+            (artisan.pk, list_version(LIST_VERSION_KEY)),
+            (artisan.updated_at,),
+        )
+        return self.conditional_response(etag, last_modified, lambda: self.serialize_list(products))
+
+
+def _count_subquery(queryset):
+    """Correlated COUNT(*) over `queryset`, which must filter on OuterRef('pk')."""
+    counts = queryset.order_by().values('artisan').annotate(count=Count('id')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
 
 
 # ============== ARTISAN STORY ENDPOINTS ==============
 
-class ArtisanStoryViewSet(viewsets.ModelViewSet):
+class ArtisanStoryViewSet(CursorPaginationMixin, FastListMixin, ConditionalGetMixin, SparseFieldsetViewMixin,
+                          viewsets.ModelViewSet):
     """
     API endpoint for artisan stories.
     - GET /api/stories/ : List all stories
@@ -407,48 +605,360 @@ class ArtisanStoryViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Return all stories (public content)."""
-        return ArtisanStory.objects.select_related('artisan').all().order_by('-created_at')
+        queryset = ArtisanStory.objects.all()
+        if self.action not in WRITE_ACTIONS:
+            queryset = queryset.select_related('artisan')
+        return queryset.order_by('-created_at')
+
+    def get_projection_extra(self):
+        if self.action == 'retrieve':
+            return ('updated_at', 'artisan__updated_at')
+        return ()
+
+    def get_list_validators(self, queryset):
+        return build_validators(
+            self.request,
+            self.get_etag_scope(self.request),
+            list_version(STORY_LIST_VERSION_KEY),
+        )
+
+    def get_object_validators(self, story):
+        return build_validators(
+            self.request,
+            self.get_etag_scope(self.request),
+            story.pk,
+            (story.updated_at, story.artisan.updated_at),
+            send_last_modified=True,
+        )
     
     def create(self, request, *args, **kwargs):
         """Create a new story."""
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             serializer.save(artisan=request.user)
-            detail_data = ArtisanStoryDetailSerializer(
-                ArtisanStory.objects.select_related('artisan').get(id=serializer.instance.id)
-            ).data
+            detail_data = ArtisanStoryDetailSerializer(serializer.instance).data
             return Response(detail_data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    def update(self, request, *args, **kwargs):
-        story = self.get_object()
-        if story.artisan != request.user:
-            raise PermissionDenied(detail='You can only edit your own stories.')
-        return super().update(request, *args, **kwargs)
-
-    def partial_update(self, request, *args, **kwargs):
-        story = self.get_object()
-        if story.artisan != request.user:
-            raise PermissionDenied(detail='You can only edit your own stories.')
-        return super().partial_update(request, *args, **kwargs)
-
-    def destroy(self, request, *args, **kwargs):
-        story = self.get_object()
-        if story.artisan != request.user:
-            raise PermissionDenied(detail='You can only delete your own stories.')
-        return super().destroy(request, *args, **kwargs)
+    # update, partial_update and destroy are ModelViewSet's: one get_object(),
+    # which runs IsOwnerOrReadOnly against artisan_id.
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsArtisan])
     def my_stories(self, request):
         """Get current user's stories (Artisan only)."""
-        stories = ArtisanStory.objects.filter(artisan=request.user).order_by('-created_at')
-        page = self.paginate_queryset(stories)
-        if page is not None:
-            serializer = ArtisanStoryListSerializer(page, many=True, context={'request': request})
-            return self.get_paginated_response(serializer.data)
+        stories = self.project_for_read(
+            ArtisanStory.objects.filter(artisan=request.user).select_related('artisan').order_by('-created_at')
+        )
+        return self.list_response(stories)
 
-        serializer = ArtisanStoryListSerializer(stories, many=True, context={'request': request})
-        return Response(serializer.data)
+
+# ============== CART ENDPOINTS ==============
+
+class CartView(views.APIView):
+    """
+    Cart with server-computed totals. Guests get a cookie-backed cart that is
+    merged into their account cart when they log in.
+    - GET /api/cart/ : Cart lines, item count and total
+    - POST /api/cart/ : Add a product ({"product_id", "quantity"})
+    - DELETE /api/cart/ : Empty the cart
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return _cart_response(request)
+
+    def post(self, request):
+        serializer = CartItemSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        product_id = serializer.validated_data['product_id']
+        stock = Product.objects.filter(
+            id=product_id, verification_status=Product.VerificationStatus.VERIFIED
+        ).values_list('stock', flat=True).first()
+        if stock is None:
+            raise NotFound(detail='Product not found.')
+        if stock == 0:
+            return Response({'detail': 'Product is out of stock.', 'product_ids': [product_id]},
+                            status=status.HTTP_409_CONFLICT)
+
+        try:
+            CartService(request).add(product_id, serializer.validated_data['quantity'])
+        except IntegrityError:
+            # Deleted since the check above.
+            raise NotFound(detail='Product not found.')
+        return _cart_response(request, status.HTTP_201_CREATED)
+
+    def delete(self, request):
+        CartService(request).clear()
+        return _cart_response(request)
+
+
+class CartItemView(views.APIView):
+    """
+    A single cart line.
+    - PATCH /api/cart/items/<product_id>/ : Set the quantity ({"quantity"})
+    - DELETE /api/cart/items/<product_id>/ : Remove the line
+    """
+    permission_classes = [AllowAny]
+
+    def patch(self, request, product_id):
+        serializer = CartItemSerializer(data={'product_id': product_id, **request.data})
+        serializer.is_valid(raise_exception=True)
+        service = CartService(request)
+        if product_id not in service.get_items():
+            raise NotFound(detail='Product is not in the cart.')
+
+        try:
+            service.set_quantity(product_id, serializer.validated_data['quantity'])
+        except IntegrityError:
+            raise NotFound(detail='Product not found.')
+        return _cart_response(request)
+
+    def delete(self, request, product_id):
+        CartService(request).remove(product_id)
+        return _cart_response(request)
+
+
+class CartReserveView(views.APIView):
+    """
+    Hold the cart's stock for STOCK_RESERVATION_MINUTES, e.g. while the buyer
+    pays. Checkout uses the held units; expired holds are released by the
+    release_expired_reservations command.
+    - POST /api/cart/reserve/
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        cart = CartService(request).resolve()
+        if not cart.products:
+            return Response({'detail': 'Your cart is empty.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            reservations = reserve(request.user, {product.id: product.quantity for product in cart})
+        except OutOfStock as exc:
+            return Response({'detail': str(exc), 'product_ids': exc.product_ids}, status=status.HTTP_409_CONFLICT)
+
+        return Response({
+            'expires_at': reservations[0].expires_at,
+            'items': [
+                {'product_id': reservation.product_id, 'quantity': reservation.quantity}
+                for reservation in reservations
+            ],
+        }, status=status.HTTP_201_CREATED)
+
+
+def _cart_response(request, status_code=status.HTTP_200_OK):
+    cart = CartService(request).resolve()
+    return Response(CartSerializer(cart, context={'request': request}).data, status=status_code)
+
+
+# ============== ORDER ENDPOINTS ==============
+
+class OrderViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    The current user's orders.
+    - GET /api/orders/ : List your orders
+    - GET /api/orders/<id>/ : Order detail
+    - POST /api/orders/checkout/ : Turn your cart into an order
+    """
+    serializer_class = OrderSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Order.objects.filter(buyer=self.request.user).prefetch_related('lines').order_by('-created_at', '-id')
+
+    @action(detail=False, methods=['post'])
+    def checkout(self, request):
+        """
+        Place an order for everything in the cart.
+
+        Send an `Idempotency-Key` header (or `idempotency_key` field) to make
+        retries safe: a repeated key returns the original order with 200.
+        """
+        header = request.headers.get('Idempotency-Key')
+        serializer = CheckoutSerializer(data={'idempotency_key': header} if header else request.data)
+        serializer.is_valid(raise_exception=True)
+        key = serializer.validated_data['idempotency_key']
+
+        cart = CartService(request)
+        try:
+            order, created = place_order(request.user, cart.get_items(), idempotency_key=key)
+        except CheckoutError as exc:
+            return Response(
+                {'detail': str(exc), 'product_ids': exc.product_ids},
+                status=status.HTTP_409_CONFLICT if exc.product_ids else status.HTTP_400_BAD_REQUEST,
+            )
+
+        if created:
+            cart.clear()
+        order = self.get_queryset().get(pk=order.pk)
+        return Response(
+            self.get_serializer(order).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+
+# ============== REVIEW ENDPOINTS ==============
+
+class ReviewViewSet(viewsets.ModelViewSet):
+    """
+    Product reviews.
+    - GET /api/reviews/?product=<id> : Reviews of a product (public)
+    - POST /api/reviews/ : Review a product you bought (buyers)
+    - PATCH/DELETE /api/reviews/<id>/ : Edit or remove your review
+    """
+    serializer_class = ReviewSerializer
+    http_method_names = ['get', 'post', 'patch', 'delete', 'head', 'options']
+
+    def get_permissions(self):
+        if self.action in ['list', 'retrieve']:
+            return [AllowAny()]
+        if self.action == 'create':
+            return [IsBuyer()]
+        return [IsAuthenticated(), IsReviewAuthor()]
+
+    def get_queryset(self):
+        queryset = Review.objects.select_related('buyer').filter(
+            product__verification_status=Product.VerificationStatus.VERIFIED
+        )
+        if self.action == 'list':
+            product = self.request.query_params.get('product')
+            if product is not None:
+                if not product.isdigit():
+                    raise ValidationError({'product': 'product must be a product id.'})
+                queryset = queryset.filter(product_id=product)
+        return queryset.order_by('-created_at', '-id')
+
+    def perform_create(self, serializer):
+        product = serializer.validated_data['product']
+        if product.verification_status != Product.VerificationStatus.VERIFIED:
+            raise ValidationError({'product': 'Only verified products can be reviewed.'})
+        purchased = OrderLine.objects.filter(
+            order__buyer=self.request.user,
+            order__status=Order.Status.PAID,
+            product=product,
+        ).exists()
+        if not purchased:
+            raise PermissionDenied('You can only review products you have bought.')
+        try:
+            with transaction.atomic():
+                serializer.save(buyer=self.request.user)
+        except IntegrityError:
+            raise ValidationError({'product': 'You have already reviewed this product.'})
+
+
+# ============== AUTHENTICITY ENDPOINTS ==============
+
+class CertificateProofView(views.APIView):
+    """
+    GET /api/authenticity/<id>/proof/
+    Merkle inclusion proof for a certificate, checkable offline.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, certificate_id):
+        try:
+            certificate = Certificate.objects.select_related('batch').get(id=certificate_id)
+        except Certificate.DoesNotExist:
+            raise NotFound(detail='Certificate not found.')
+
+        if certificate.batch is None:
+            return Response(
+                {
+                    'detail': 'Certificate has not been sealed into a batch yet.',
+                    'certificate': certificate.payload,
+                },
+                status=status.HTTP_202_ACCEPTED,
+            )
+        return Response(proof_bundle(certificate))
+
+
+class CertificateBulkVerifyView(views.APIView):
+    """
+    POST /api/authenticity/verify/
+    Check up to MAX_BUNDLES proof bundles in one request.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        bundles = request.data.get('certificates') if isinstance(request.data, dict) else None
+        if not isinstance(bundles, list) or not bundles:
+            raise ValidationError({'certificates': 'Send a non-empty list of proof bundles.'})
+        if len(bundles) > MAX_BUNDLES:
+            raise ValidationError({'certificates': f'At most {MAX_BUNDLES} certificates per request.'})
+
+        results = verify_bundles(bundles)
+        valid = sum(1 for result in results if result['valid'])
+        return Response({'valid': valid, 'invalid': len(results) - valid, 'results': results})
+
+
+# ============== STATS ENDPOINTS ==============
+
+class StatsTimeseriesView(views.APIView):
+    """
+    GET /api/stats/timeseries/
+    Daily marketplace metrics from the DailyMarketplaceStats rollups.
+
+    Query params: metrics (comma-separated, default all), days (default 30,
+    ending today) or start/end (YYYY-MM-DD), role, region.
+    """
+    permission_classes = [IsAuthenticated, IsConsultantOrAdmin]
+    MAX_DAYS = 366
+
+    def get(self, request):
+        params = request.query_params
+
+        metrics = [name.strip() for name in params.get('metrics', '').split(',') if name.strip()]
+        metrics = metrics or list(ROLLUP_METRICS)
+        unknown = [name for name in metrics if name not in ROLLUP_METRICS]
+        if unknown:
+            raise ValidationError({'metrics': 'Unknown metrics: {}. Choose from {}.'.format(
+                ', '.join(unknown), ', '.join(ROLLUP_METRICS)
+            )})
+
+        start, end = self._date_range(params)
+
+        rows = DailyMarketplaceStats.objects.filter(date__gte=start, date__lte=end)
+        if params.get('role'):
+            rows = rows.filter(role=params['role'])
+        if params.get('region'):
+            rows = rows.filter(region__iexact=params['region'])
+        totals = {
+            row['date']: row
+            for row in rows.values('date').annotate(**{name: Sum(name) for name in metrics}).order_by('date')
+        }
+
+        # One entry per day, zero-filled, so charts need no gap handling.
+        # Built as it is streamed rather than as one list.
+        def results():
+            day = start
+            while day <= end:
+                row = totals.get(day, {})
+                yield {'date': day, **{name: row.get(name) or 0 for name in metrics}}
+                day += timedelta(days=1)
+
+        return StreamingJSONResponse(
+            results(), envelope={'start': start, 'end': end, 'metrics': metrics}, key='results',
+        )
+
+    def _date_range(self, params):
+        today = timezone.localdate()
+        try:
+            end = date.fromisoformat(params['end']) if params.get('end') else today
+            if params.get('start'):
+                start = date.fromisoformat(params['start'])
+            else:
+                days = int(params.get('days', 30))
+                if days < 1:
+                    raise ValueError
+                start = end - timedelta(days=days - 1)
+        except ValueError:
+            raise ValidationError({'detail': 'Use start/end as YYYY-MM-DD and days as a positive integer.'})
+
+        if start > end:
+            raise ValidationError({'start': 'start must not be after end.'})
+        if (end - start).days >= self.MAX_DAYS:
+            raise ValidationError({'detail': f'At most {self.MAX_DAYS} days per request.'})
+        return start, end
 
 
 # ============== CONSULTANT ENDPOINTS ==============
@@ -459,28 +969,125 @@ class ConsultantPendingView(views.APIView):
     
     def get(self, request):
         """GET /api/consultant/pending/"""
+        fields = parse_fieldset(request.query_params.get('fields'))
+        expand = parse_fieldset(request.query_params.get('expand'))
+        context = {'request': request}
+
         products = Product.objects.filter(
             verification_status=Product.VerificationStatus.PENDING
-        ).select_related('artisan', 'verified_by').order_by('-created_at')
+        )
+        if str(request.query_params.get('available', '')).lower() in ['true', '1', 'yes']:
+            # Leave out products other consultants currently hold.
+            products = claimable(request.user)
+        products = products.select_related('artisan', 'verified_by').order_by('-created_at')
+        products = project_queryset(
+            products, ProductListSerializer(fields=fields, expand=expand, context=context)
+        )
 
-        paginator = PageNumberPagination()
-        paginator.page_size = 10
-        page = paginator.paginate_queryset(products, request)
-        serializer = ProductListSerializer(page, many=True, context={'request': request})
+        paginator = get_paginator(request)
+        page = paginator.paginate_queryset(products, request, view=self)
+        serializer = ProductListSerializer(page, many=True, context=context, fields=fields, expand=expand)
         return paginator.get_paginated_response(serializer.data)
 
 
+class ConsultantClaimView(views.APIView):
+    """
+    Review work queue.
+    - GET /api/consultant/claims/ : Products you currently hold
+    - POST /api/consultant/claims/ : Claim the next `count` pending products
+    - DELETE /api/consultant/claims/ : Release your claims (or `product_ids`)
+    """
+    permission_classes = [IsAuthenticated, IsConsultantOrAdmin]
+    MAX_CLAIM = 50
+
+    def get(self, request):
+        return self._claims_response(request, claimed_by(request.user))
+
+    def post(self, request):
+        try:
+            count = int(request.data.get('count', 10))
+        except (TypeError, ValueError):
+            raise ValidationError({'count': 'count must be a whole number.'})
+        if not 1 <= count <= self.MAX_CLAIM:
+            raise ValidationError({'count': f'count must be between 1 and {self.MAX_CLAIM}.'})
+
+        # Route by the consultant's own region unless another one is given.
+        region = request.data.get('region', request.user.region) or None
+        strict = str(request.data.get('strict', '')).lower() in ['true', '1', 'yes']
+
+        ids = claim_products(request.user, count, region=region, strict=strict)
+        products = claimed_by(request.user).filter(id__in=ids)
+        return self._claims_response(request, products)
+
+    def delete(self, request):
+        product_ids = request.data.get('product_ids') if isinstance(request.data, dict) else None
+        if product_ids is not None and (
+            not isinstance(product_ids, list) or not all(isinstance(pk, int) for pk in product_ids)
+        ):
+            raise ValidationError({'product_ids': 'Send a list of product ids.'})
+        released = release_claims(request.user, product_ids)
+        return Response({'released': released})
+
+    def _claims_response(self, request, products):
+        products = list(products.select_related('artisan'))
+        serializer = ProductListSerializer(products, many=True, context={'request': request})
+        return Response({
+            # The earliest lease to lapse.
+            'claim_expires_at': min((product.review_claim_expires_at for product in products), default=None),
+            'results': serializer.data,
+        })
+
+
 class ConsultantVerifyView(views.APIView):
     """Verify or reject a product."""
     permission_classes = [IsAuthenticated, IsConsultantOrAdmin]
     
     def patch(self, request, product_id):
         """PATCH /api/consultant/verify/<id>/"""
+        return _apply_verification(request, product_id)
+
+
+class ConsultantBulkVerifyView(views.APIView):
+    """
+    POST /api/consultant/verify/bulk/
+    Verify or reject up to MAX_DECISIONS products in one transaction.
+    """
+    permission_classes = [IsAuthenticated, IsConsultantOrAdmin]
+
+    def post(self, request):
+        items = request.data.get('items') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'items': 'Send a non-empty list of decisions.'})
+        if len(items) > MAX_DECISIONS:
+            raise ValidationError({'items': f'At most {MAX_DECISIONS} decisions per request.'})
+
+        # Everything is validated before anything is written.
+        serializer = ConsultantBulkVerifySerializer(data={'items': items})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = apply_decisions(request.user, serializer.validated_data['items'])
+        updated = sum(1 for result in results if result['status'] == UPDATED)
+        return Response({'updated': updated, 'skipped': len(results) - updated, 'results': results})
+
+
+def _apply_verification(request, product_id):
+    """
+    Record a consultant decision with the product row locked, so concurrent
+    decisions on one product are serialised. Refused with 409 while another
+    consultant holds a review-queue claim on it.
+    """
+    with transaction.atomic():
         try:
-            product = Product.objects.select_related('artisan', 'verified_by').get(id=product_id)
+            product = lock_for_review(product_id, request.user)
         except Product.DoesNotExist:
             raise NotFound(detail='Product not found.')
-        
+        except ClaimHeld as exc:
+            return Response(
+                {'detail': str(exc), 'product_ids': [exc.product_id], 'claim_expires_at': exc.expires_at},
+                status=status.HTTP_409_CONFLICT,
+            )
+
         serializer = ProductVerificationSerializer(product, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save(verified_by=request.user)
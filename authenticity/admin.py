@@ -1,3 +1,19 @@
 from django.contrib import admin
+from .models import Certificate, CertificateBatch
 
-# Register your models here.
+
+@admin.register(CertificateBatch)
+class CertificateBatchAdmin(admin.ModelAdmin):
+    list_display = ("id", "size", "algorithm", "key_id", "created_at")
+    readonly_fields = ("merkle_root", "size", "algorithm", "key_id", "signature", "created_at")
+    ordering = ("-created_at",)
+
+
+@admin.register(Certificate)
+class CertificateAdmin(admin.ModelAdmin):
+    list_display = ("serial", "product", "batch", "issued_at", "revoked_at")
+    list_filter = ("issued_at", "revoked_at")
+    search_fields = ("serial", "product__name")
+    raw_id_fields = ("product", "batch")
+    readonly_fields = ("serial", "payload", "leaf_hash", "leaf_index", "proof", "issued_at")
+    ordering = ("-issued_at",)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class StartappConfig(AppConfig):
     name = 'authenticity'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,199 @@
+"""
+Issuing, sealing and checking authenticity certificates.
+
+A certificate is issued (unsealed) in the same transaction that marks a
+product VERIFIED. `seal_batch`, run periodically by the seal_certificates
+command, gathers unsealed certificates into a Merkle tree, signs the root
+once and stores each certificate's inclusion proof, so serving a proof is a
+single row read. `verify_bundles` checks any number of proofs with two
+queries in total.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from products.models import Product
+
+from . import merkle
+from .models import Certificate, CertificateBatch
+from .signing import get_signer, signed_message
+
+# Upper bound for one bulk verification request.
+MAX_BUNDLES = 500
+
+
+def certificate_payload(product, serial, issued_at):
+    return {
+        "serial": str(serial),
+        "product_id": product.pk,
+        "product_name": product.name,
+        "region": product.region,
+        "artisan_id": product.artisan_id,
+        "verified_by_id": product.verified_by_id,
+        "verified_at": product.verified_at.isoformat() if product.verified_at else None,
+        "issued_at": issued_at.isoformat(),
+    }
+
+
+def issue_certificates(products):
+    """
+    Issue a certificate for each VERIFIED product in `products` that does not
+    already have an active one. Returns the number issued.
+    """
+    now = timezone.now()
+    certificates = []
+    for product in products:
+        if product.verification_status != Product.VerificationStatus.VERIFIED:
+            continue
+        certificate = Certificate(product=product)
+        certificate.payload = certificate_payload(product, certificate.serial, now)
+        certificate.leaf_hash = merkle.leaf_hash(certificate.payload)
+        certificates.append(certificate)
+    if not certificates:
+        return 0
+    # certificate_active_product_unique skips products that already have one.
+    # With ignore_conflicts, bulk_create returns the skipped objects too, so
+    # count the fresh serials that were actually written.
+    Certificate.objects.bulk_create(certificates, ignore_conflicts=True)
+    return Certificate.objects.filter(
+        serial__in=[certificate.serial for certificate in certificates]
+    ).count()
+
+
+def revoke_certificates(product_ids):
+    """Revoke the active certificates of products that lost VERIFIED status."""
+    return Certificate.objects.filter(
+        product_id__in=list(product_ids), revoked_at__isnull=True
+    ).update(revoked_at=timezone.now())
+
+
+def seal_batch(max_size=None):
+    """
+    Seal up to `max_size` unsealed certificates into one signed batch.
+
+    Returns the new CertificateBatch, or None when nothing was waiting.
+    Concurrent sealers take disjoint sets of rows.
+    """
+    if max_size is None:
+        max_size = settings.AUTHENTICITY_BATCH_SIZE
+
+    with transaction.atomic():
+        certificates = list(
+            Certificate.objects.select_for_update(skip_locked=True)
+            .filter(batch__isnull=True, revoked_at__isnull=True)
+            .order_by("id")
+            .only("id", "leaf_hash")[:max_size]
+        )
+        if not certificates:
+            return None
+
+        levels = merkle.build_levels([certificate.leaf_hash for certificate in certificates])
+        merkle_root = merkle.root(levels)
+        signer = get_signer()
+        batch = CertificateBatch.objects.create(
+            merkle_root=merkle_root,
+            size=len(certificates),
+            algorithm=signer.algorithm,
+            key_id=signer.key_id,
+            signature=signer.sign(signed_message(merkle_root, len(certificates))),
+        )
+        for index, certificate in enumerate(certificates):
+            certificate.batch = batch
+            certificate.leaf_index = index
+            certificate.proof = merkle.proof(levels, index)
+        Certificate.objects.bulk_update(certificates, ["batch", "leaf_index", "proof"], batch_size=1000)
+    return batch
+
+
+def proof_bundle(certificate):
+    """Everything a scanner needs to check `certificate` offline."""
+    batch = certificate.batch
+    signer = get_signer()
+    return {
+        "certificate": certificate.payload,
+        "leaf_hash": certificate.leaf_hash,
+        "leaf_index": certificate.leaf_index,
+        "proof": certificate.proof,
+        "revoked": certificate.revoked_at is not None,
+        "batch": {
+            "id": batch.pk,
+            "merkle_root": batch.merkle_root,
+            "size": batch.size,
+            "algorithm": batch.algorithm,
+            "key_id": batch.key_id,
+            "signature": batch.signature,
+            "public_key": signer.public_key if batch.key_id == signer.key_id else None,
+            "sealed_at": batch.created_at,
+        },
+    }
+
+
+def verify_bundles(bundles):
+    """
+    Check proof bundles as returned by `proof_bundle`.
+
+    The leaf is recomputed from the payload and folded up the proof; the
+    result must equal the root stored for the referenced batch, whose
+    signature is checked once per batch. Batches and revocations are loaded
+    with one query each, whatever the number of bundles.
+    """
+    parsed = []
+    for bundle in bundles:
+        try:
+            payload = bundle["certificate"]
+            parsed.append((
+                str(payload["serial"]),
+                merkle.leaf_hash(payload),
+                list(bundle["proof"]),
+                int(bundle["batch"]["id"]),
+            ))
+        except (KeyError, TypeError, ValueError):
+            parsed.append(None)
+
+    batch_ids = {entry[3] for entry in parsed if entry is not None}
+    serials = [entry[0] for entry in parsed if entry is not None]
+
+    signer = get_signer()
+    batches = {}
+    for batch in CertificateBatch.objects.filter(id__in=batch_ids):
+        message = signed_message(batch.merkle_root, batch.size)
+        batches[batch.pk] = (
+            batch.merkle_root,
+            signer.verify(batch.algorithm, batch.key_id, message, batch.signature),
+        )
+    revoked = set(
+        str(serial) for serial in Certificate.objects.filter(
+            serial__in=_valid_uuids(serials), revoked_at__isnull=False
+        ).values_list("serial", flat=True)
+    )
+
+    results = []
+    for entry in parsed:
+        if entry is None:
+            results.append({"serial": None, "valid": False, "reason": "malformed"})
+            continue
+        serial, leaf, path, batch_id = entry
+        reason = None
+        if batch_id not in batches:
+            reason = "unknown_batch"
+        elif not batches[batch_id][1]:
+            reason = "bad_signature"
+        elif not merkle.verify_proof(leaf, path, batches[batch_id][0]):
+            reason = "proof_mismatch"
+        elif serial in revoked:
+            reason = "revoked"
+        results.append({"serial": serial, "valid": reason is None, "reason": reason})
+    return results
+
+
+def _valid_uuids(values):
+    valid = []
+    for value in values:
+        try:
+            valid.append(uuid.UUID(value))
+        except ValueError:
+            continue
+    return valid
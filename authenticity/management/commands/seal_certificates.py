@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from authenticity.certificates import issue_certificates, seal_batch
+from authenticity.models import Certificate
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Seal unsealed authenticity certificates into signed Merkle batches. "
+        "Run it periodically (e.g. every few minutes from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.AUTHENTICITY_BATCH_SIZE,
+            help="Certificates per Merkle tree.",
+        )
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="First issue certificates for VERIFIED products that have none.",
+        )
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            products = Product.objects.filter(
+                verification_status=Product.VerificationStatus.VERIFIED
+            ).exclude(
+                id__in=Certificate.objects.filter(revoked_at__isnull=True).values("product_id")
+            ).only(
+                "id", "name", "region", "artisan_id", "verified_by_id", "verified_at", "verification_status"
+            ).order_by("id")
+            issued = 0
+            last_id = 0
+            while True:
+                chunk = list(products.filter(id__gt=last_id)[:1000])
+                if not chunk:
+                    break
+                last_id = chunk[-1].id
+                issued += issue_certificates(chunk)
+            self.stdout.write(f"Issued {issued} certificate(s).")
+
+        batches = 0
+        sealed = 0
+        while True:
+            batch = seal_batch(options["batch_size"])
+            if batch is None:
+                break
+            batches += 1
+            sealed += batch.size
+        self.stdout.write(self.style.SUCCESS(f"Sealed {sealed} certificate(s) in {batches} batch(es)."))
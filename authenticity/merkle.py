@@ -0,0 +1,74 @@
+"""
+Merkle trees over certificate payloads.
+
+Leaves and inner nodes are SHA-256 with distinct prefixes (0x00 for leaves,
+0x01 for nodes) so a leaf can never be passed off as a node. A level with an
+odd number of nodes promotes its last node unchanged. A proof is the list of
+sibling hashes from the leaf up, each tagged with the side it sits on, so a
+scanner needs only the payload, the proof and the signed root to check a
+certificate: log2(n) hashes, no database.
+"""
+
+import hashlib
+import json
+
+LEFT = "L"
+RIGHT = "R"
+
+
+def canonical_json(payload):
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def leaf_hash(payload):
+    return hashlib.sha256(b"\x00" + canonical_json(payload)).hexdigest()
+
+
+def _node(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def build_levels(leaf_hashes):
+    """Return every level of the tree as lists of digests, leaves first."""
+    if not leaf_hashes:
+        raise ValueError("A Merkle tree needs at least one leaf.")
+    levels = [[bytes.fromhex(value) for value in leaf_hashes]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def root(levels):
+    return levels[-1][0].hex()
+
+
+def proof(levels, index):
+    """Sibling path for leaf `index` as `[[side, hash], ...]`."""
+    path = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append([LEFT if sibling < index else RIGHT, level[sibling].hex()])
+        index //= 2
+    return path
+
+
+def verify_proof(leaf, path, expected_root):
+    """Fold `path` onto the hex digest `leaf` and compare with `expected_root`."""
+    try:
+        digest = bytes.fromhex(leaf)
+        for side, sibling in path:
+            sibling = bytes.fromhex(sibling)
+            if side == LEFT:
+                digest = _node(sibling, digest)
+            elif side == RIGHT:
+                digest = _node(digest, sibling)
+            else:
+                return False
+    except (TypeError, ValueError):
+        return False
+    return digest.hex() == expected_root
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.4 on 2026-10-17 02:10
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0012_product_verified_rating_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificateBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('merkle_root', models.CharField(max_length=64, unique=True)),
+                ('size', models.PositiveIntegerField()),
+                ('algorithm', models.CharField(max_length=16)),
+                ('key_id', models.CharField(max_length=16)),
+                ('signature', models.CharField(max_length=128)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'certificate batches',
+            },
+        ),
+        migrations.CreateModel(
+            name='Certificate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('serial', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('payload', models.JSONField()),
+                ('leaf_hash', models.CharField(max_length=64)),
+                ('leaf_index', models.PositiveIntegerField(blank=True, null=True)),
+                ('proof', models.JSONField(blank=True, null=True)),
+                ('issued_at', models.DateTimeField(auto_now_add=True)),
+                ('revoked_at', models.DateTimeField(blank=True, null=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='certificates', to='products.product')),
+                ('batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='certificates', to='authenticity.certificatebatch')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('batch__isnull', True), ('revoked_at__isnull', True)), fields=['id'], name='certificate_unsealed_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('revoked_at__isnull', True)), fields=('product',), name='certificate_active_product_unique')],
+            },
+        ),
+    ]
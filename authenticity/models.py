@@ -1,3 +1,71 @@
+import uuid
+
 from django.db import models
 
-# Create your models here.
+
+class CertificateBatch(models.Model):
+    """
+    A sealed Merkle tree of certificates. Only the root is signed, so one
+    signature covers every certificate in the batch.
+    """
+    merkle_root = models.CharField(max_length=64, unique=True)
+    size = models.PositiveIntegerField()
+    algorithm = models.CharField(max_length=16)
+    key_id = models.CharField(max_length=16)
+    signature = models.CharField(max_length=128)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "certificate batches"
+
+    def __str__(self):
+        return f"Batch {self.pk} ({self.size} certificates)"
+
+
+class Certificate(models.Model):
+    """
+    Authenticity certificate issued when a consultant verifies a product.
+
+    `payload` is the signed statement; `leaf_hash` is its Merkle leaf. Once the
+    certificate is sealed into a batch, `proof` holds the sibling hashes from
+    the leaf up to the batch root.
+    """
+    serial = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    product = models.ForeignKey(
+        "products.Product",
+        on_delete=models.CASCADE,
+        related_name="certificates"
+    )
+    payload = models.JSONField()
+    leaf_hash = models.CharField(max_length=64)
+    batch = models.ForeignKey(
+        CertificateBatch,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="certificates"
+    )
+    leaf_index = models.PositiveIntegerField(null=True, blank=True)
+    proof = models.JSONField(null=True, blank=True)
+    issued_at = models.DateTimeField(auto_now_add=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product"],
+                condition=models.Q(revoked_at__isnull=True),
+                name="certificate_active_product_unique",
+            ),
+        ]
+        indexes = [
+            # Work queue for seal_certificates.
+            models.Index(
+                fields=["id"],
+                condition=models.Q(batch__isnull=True, revoked_at__isnull=True),
+                name="certificate_unsealed_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Certificate {self.serial} for {self.product}"
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from products.models import Product
+
+from .certificates import issue_certificates, revoke_certificates
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_status(sender, instance, update_fields=None, **kwargs):
+    instance._previous_verification_status = None
+    if instance.pk and (update_fields is None or "verification_status" in update_fields):
+        instance._previous_verification_status = (
+            Product.objects.filter(pk=instance.pk).values_list("verification_status", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Product)
+def certify_on_verification(sender, instance, created, update_fields=None, **kwargs):
+    if not created and update_fields is not None and "verification_status" not in update_fields:
+        return
+    previous = getattr(instance, "_previous_verification_status", None)
+    verified = Product.VerificationStatus.VERIFIED
+    if instance.verification_status == verified and previous != verified:
+        issue_certificates([instance])
+    elif previous == verified and instance.verification_status != verified:
+        revoke_certificates([instance.pk])
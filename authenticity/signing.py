@@ -0,0 +1,88 @@
+"""
+Signatures over Merkle batch roots.
+
+With settings.AUTHENTICITY_SIGNING_KEY set (a base64 Ed25519 private key
+seed), roots are signed with Ed25519 using `cryptography` and the public key
+is published with every proof, so scanners can check certificates fully
+offline. Production requires the key. Without one (development only), roots
+are signed with HMAC-SHA256 keyed from SECRET_KEY; inclusion proofs still
+verify offline, but the signature can only be checked by this server.
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.crypto import salted_hmac
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+except ImportError:  # pragma: no cover - only needed with a signing key
+    Ed25519PrivateKey = None
+
+ED25519 = "ed25519"
+HMAC_SHA256 = "hmac-sha256"
+
+HMAC_SALT = "authenticity.signing"
+
+
+def signed_message(merkle_root, size):
+    return f"kalasetu:authenticity:v1:{merkle_root}:{size}".encode("ascii")
+
+
+class Signer:
+    def __init__(self, seed=None):
+        if seed:
+            if Ed25519PrivateKey is None:
+                raise ImproperlyConfigured(
+                    "AUTHENTICITY_SIGNING_KEY requires the 'cryptography' package."
+                )
+            try:
+                raw = base64.b64decode(seed, validate=True)
+                self.private_key = Ed25519PrivateKey.from_private_bytes(raw)
+            except (binascii.Error, ValueError):
+                raise ImproperlyConfigured(
+                    "AUTHENTICITY_SIGNING_KEY must be a base64-encoded 32-byte Ed25519 seed."
+                )
+            self.algorithm = ED25519
+            self.public_key = self.private_key.public_key().public_bytes(
+                serialization.Encoding.Raw, serialization.PublicFormat.Raw
+            ).hex()
+            self.key_id = hashlib.sha256(bytes.fromhex(self.public_key)).hexdigest()[:16]
+        else:
+            self.private_key = None
+            self.algorithm = HMAC_SHA256
+            self.public_key = None
+            self.key_id = salted_hmac(HMAC_SALT, "key-id", algorithm="sha256").hexdigest()[:16]
+
+    def sign(self, message):
+        if self.private_key is not None:
+            return self.private_key.sign(message).hex()
+        return salted_hmac(HMAC_SALT, message, algorithm="sha256").hexdigest()
+
+    def verify(self, algorithm, key_id, message, signature):
+        """Check a signature made by this key. Batches signed by a rotated-out key fail."""
+        if algorithm != self.algorithm or key_id != self.key_id:
+            return False
+        if self.private_key is None:
+            return hmac.compare_digest(self.sign(message), signature)
+        try:
+            self.private_key.public_key().verify(bytes.fromhex(signature), message)
+        except (InvalidSignature, ValueError):
+            return False
+        return True
+
+
+_signer = None
+
+
+def get_signer():
+    global _signer
+    if _signer is None:
+        _signer = Signer(settings.AUTHENTICITY_SIGNING_KEY)
+    return _signer
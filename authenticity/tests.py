@@ -1,3 +1,60 @@
-from django.test import TestCase
+import os
+import subprocess
+import sys
 
-# Create your tests here.
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+
+from products.models import Product
+from products.tests import make_artisan, make_product
+
+from .certificates import issue_certificates, proof_bundle, seal_batch, verify_bundles
+from .models import Certificate
+
+
+class CertificateTests(TestCase):
+    def setUp(self):
+        artisan = make_artisan()
+        # Created VERIFIED, so each already has a certificate.
+        self.products = [make_product(artisan, name=f"Piece {index}") for index in range(3)]
+
+    def test_issue_counts_only_new_certificates(self):
+        pending = make_product(self.products[0].artisan, verification_status=Product.VerificationStatus.PENDING)
+        Product.objects.filter(pk=pending.pk).update(verification_status=Product.VerificationStatus.VERIFIED)
+        pending.refresh_from_db()
+
+        self.assertEqual(issue_certificates([*self.products, pending]), 1)
+        self.assertEqual(issue_certificates([*self.products, pending]), 0)
+        self.assertEqual(Certificate.objects.count(), 4)
+
+    def test_sealed_proofs_verify_until_revoked(self):
+        batch = seal_batch()
+        self.assertEqual(batch.size, 3)
+        bundles = [proof_bundle(certificate) for certificate in Certificate.objects.select_related("batch")]
+
+        with self.assertNumQueries(2):
+            results = verify_bundles(bundles)
+        self.assertTrue(all(result["valid"] for result in results))
+
+        product = self.products[0]
+        product.verification_status = Product.VerificationStatus.REJECTED
+        product.save()
+        reasons = [result["reason"] for result in verify_bundles(bundles)]
+        self.assertEqual(reasons.count("revoked"), 1)
+
+    def test_tampered_payload_fails(self):
+        seal_batch()
+        bundle = proof_bundle(Certificate.objects.select_related("batch").first())
+        bundle["certificate"]["product_name"] = "Forgery"
+        self.assertEqual(verify_bundles([bundle])[0]["reason"], "proof_mismatch")
+
+
+class SigningKeySettingTests(SimpleTestCase):
+    def test_production_requires_signing_key(self):
+        env = {**os.environ, "DEBUG": "False", "REDIS_URL": "redis://localhost:6379/0", "AUTHENTICITY_SIGNING_KEY": ""}
+        result = subprocess.run(
+            [sys.executable, "-c", "import kalasetu_backend.settings"],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("AUTHENTICITY_SIGNING_KEY must be set", result.stderr)
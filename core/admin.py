@@ -1,3 +1,16 @@
 from django.contrib import admin
+from .models import DailyMarketplaceStats, RollupWatermark
 
-# Register your models here.
+
+@admin.register(DailyMarketplaceStats)
+class DailyMarketplaceStatsAdmin(admin.ModelAdmin):
+    list_display = ("date", "role", "region", "new_users", "new_products", "units_sold", "revenue")
+    list_filter = ("role", "date")
+    search_fields = ("region",)
+    ordering = ("-date", "role", "region")
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ("source", "last_id", "updated_at")
+    readonly_fields = ("source", "last_id", "updated_at")
@@ -2,6 +2,10 @@
 Context processors for making data available to all templates.
 """
 
+from django.utils.functional import SimpleLazyObject, lazy
+
+from products.cart import CartService
+
 
 def cart_context(request):
     """
@@ -9,14 +13,14 @@ def cart_context(request):
     
     Provides:
     - cart_count: Total number of items in cart
-    - cart_total_quantity: Sum of all product quantities
+    - cart: {product_id: quantity}
     
-    Cart structure in session: {product_id: quantity}
+    Both are lazy, so pages that never show the cart don't load it.
     """
-    cart = request.session.get('cart', {})
+    cart = SimpleLazyObject(lambda: CartService(request).get_items())
     
     # Calculate total number of items (sum of all quantities)
-    cart_count = sum(cart.values()) if cart else 0
+    cart_count = lazy(lambda: sum(cart.values()), int)()
     
     return {
         'cart_count': cart_count,
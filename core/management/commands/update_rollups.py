@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.rollups import update_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold users, products and order lines created since the last run into "
+        "DailyMarketplaceStats. Run it periodically (e.g. every 15 minutes); the "
+        "first run backfills all history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50000,
+            help="Source ids aggregated per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        processed = update_rollups(batch_size=options["batch_size"])
+        summary = ", ".join(f"{source}: {rows}" for source, rows in processed.items())
+        self.stdout.write(self.style.SUCCESS(f"Rolled up new rows ({summary})."))
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.4 on 2026-10-17 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyMarketplaceStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('role', models.CharField(choices=[('ADMIN', 'Admin'), ('ARTISAN', 'Artisan'), ('BUYER', 'Buyer'), ('CONSULTANT', 'Cultural Consultant')], max_length=20)),
+                ('region', models.CharField(blank=True, max_length=255)),
+                ('new_users', models.PositiveIntegerField(default=0)),
+                ('new_products', models.PositiveIntegerField(default=0)),
+                ('listed_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'daily marketplace stats',
+                'constraints': [models.UniqueConstraint(fields=('date', 'role', 'region'), name='daily_stats_date_role_region_unique')],
+            },
+        ),
+    ]
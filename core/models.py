@@ -1,3 +1,43 @@
 from django.db import models
 
-# Create your models here.
+from accounts.models import Role
+
+
+class DailyMarketplaceStats(models.Model):
+    """
+    Marketplace activity for one day, role and region, maintained by
+    core.rollups (run the update_rollups command periodically).
+
+    User counts use the user's role and region. Product and sales counts are
+    filed under ARTISAN and the product's region.
+    """
+    date = models.DateField()
+    role = models.CharField(max_length=20, choices=Role.choices)
+    region = models.CharField(max_length=255, blank=True)
+
+    new_users = models.PositiveIntegerField(default=0)
+    new_products = models.PositiveIntegerField(default=0)
+    listed_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "daily marketplace stats"
+        constraints = [
+            models.UniqueConstraint(fields=["date", "role", "region"], name="daily_stats_date_role_region_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.role} {self.region or '-'}"
+
+
+class RollupWatermark(models.Model):
+    """Highest source row id already folded into DailyMarketplaceStats."""
+    source = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} up to #{self.last_id}"
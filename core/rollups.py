@@ -0,0 +1,166 @@
+"""
+Incremental daily rollups into DailyMarketplaceStats.
+
+Each source table (users, products, order lines) has a RollupWatermark: the
+highest id already counted. A run aggregates only rows above the watermark,
+grouped by day, role and region in the database, adds the totals onto the
+existing rollup rows and moves the watermark, one id range per transaction.
+Rows younger than SAFETY_LAG are left for the next run, so a row whose
+transaction commits late (with a lower id than rows already visible) is not
+skipped.
+
+Order lines only count while their order is not CANCELLED. An order that is
+cancelled or reinstated after its lines were rolled up is corrected at the
+transition: `apply_order_status_change` (called from core.signals when an
+Order is saved) subtracts or re-adds those lines. Status changes made with
+queryset.update() send no signal and are not reflected.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import CharField, Count, DecimalField, F, Max, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from accounts.models import Role, User
+from orders.models import Order, OrderLine
+from products.models import Product
+
+from .models import DailyMarketplaceStats, RollupWatermark
+
+SAFETY_LAG = timedelta(minutes=5)
+
+METRICS = ("new_users", "new_products", "listed_value", "units_sold", "revenue")
+
+_ARTISAN = Value(Role.ARTISAN, output_field=CharField())
+
+
+def _sources():
+    return {
+        "users": (
+            User.objects.all(),
+            "date_joined",
+            {"stats_role": F("role"), "stats_region": F("region")},
+            {"new_users": Count("id")},
+        ),
+        "products": (
+            Product.objects.all(),
+            "created_at",
+            {"stats_role": _ARTISAN, "stats_region": F("region")},
+            {"new_products": Count("id"), "listed_value": Sum("price")},
+        ),
+        "order_lines": (
+            OrderLine.objects.exclude(order__status=Order.Status.CANCELLED),
+            "order__created_at",
+            *_order_line_aggregates(),
+        ),
+    }
+
+
+def _order_line_aggregates():
+    return (
+        {"stats_role": _ARTISAN, "stats_region": Coalesce("product__region", Value(""))},
+        {
+            "units_sold": Sum("quantity"),
+            "revenue": Sum(
+                F("unit_price") * F("quantity"),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+        },
+    )
+
+
+def update_rollups(batch_size=50000):
+    """Fold new rows of every source into the rollups. Returns {source: rows}."""
+    return {
+        name: _roll_up(name, *source, batch_size=batch_size)
+        for name, source in _sources().items()
+    }
+
+
+def _roll_up(name, queryset, timestamp, dimensions, metrics, batch_size):
+    RollupWatermark.objects.get_or_create(source=name)
+    cutoff = timezone.now() - SAFETY_LAG
+    processed = 0
+
+    while True:
+        with transaction.atomic():
+            # Locking the watermark serialises concurrent runs per source.
+            watermark = RollupWatermark.objects.select_for_update().get(source=name)
+            upper = queryset.filter(
+                id__gt=watermark.last_id, **{f"{timestamp}__lt": cutoff}
+            ).aggregate(upper=Max("id"))["upper"]
+            if upper is None:
+                return processed
+            upper = min(upper, watermark.last_id + batch_size)
+
+            rows = list(
+                queryset.filter(id__gt=watermark.last_id, id__lte=upper)
+                .annotate(day=TruncDate(timestamp), **dimensions)
+                .values("day", *dimensions)
+                .annotate(rows=Count("id"), **metrics)
+                .order_by()
+            )
+            _apply(rows, metrics)
+
+            processed += sum(row["rows"] for row in rows)
+            watermark.last_id = upper
+            watermark.save(update_fields=["last_id", "updated_at"])
+
+
+def apply_order_status_change(order, counted):
+    """
+    Add (`counted`) or subtract the lines of `order` that are already in the
+    rollups, after it left or entered CANCELLED. Lines above the watermark
+    are left to the next run, which reads the status as it is then.
+    """
+    dimensions, metrics = _order_line_aggregates()
+    RollupWatermark.objects.get_or_create(source="order_lines")
+    with transaction.atomic():
+        # Serialised with update_rollups by the watermark lock: lines it is
+        # rolling up right now are either above the watermark read here or
+        # were counted with the old status and are corrected below.
+        watermark = RollupWatermark.objects.select_for_update().get(source="order_lines")
+        rows = list(
+            OrderLine.objects.filter(order=order, id__lte=watermark.last_id)
+            .annotate(day=TruncDate("order__created_at"), **dimensions)
+            .values("day", *dimensions)
+            .annotate(rows=Count("id"), **metrics)
+            .order_by()
+        )
+        if not counted:
+            for row in rows:
+                for metric in metrics:
+                    row[metric] = -(row[metric] or 0)
+        _apply(rows, metrics)
+
+
+def _apply(rows, metrics):
+    if not rows:
+        return
+    existing = {
+        (stats.date, stats.role, stats.region): stats
+        for stats in DailyMarketplaceStats.objects.select_for_update().filter(
+            date__in={row["day"] for row in rows}
+        )
+    }
+    now = timezone.now()
+    created = []
+    updated = []
+    for row in rows:
+        key = (row["day"], row["stats_role"], row["stats_region"] or "")
+        stats = existing.get(key)
+        if stats is None:
+            stats = existing[key] = DailyMarketplaceStats(date=key[0], role=key[1], region=key[2])
+            created.append(stats)
+        elif stats.updated_at != now:
+            updated.append(stats)
+        stats.updated_at = now
+        for metric in metrics:
+            setattr(stats, metric, getattr(stats, metric) + (row[metric] or 0))
+
+    if updated:
+        DailyMarketplaceStats.objects.bulk_update(updated, list(metrics) + ["updated_at"])
+    if created:
+        DailyMarketplaceStats.objects.bulk_create(created)
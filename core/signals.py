@@ -0,0 +1,85 @@
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from orders.models import Order
+from products.models import Product
+from products.signals import products_changed
+
+from .rollups import apply_order_status_change
+from .stats import invalidate_dashboard_stats
+
+
+# Columns the dashboard statistics are computed from (core.stats). Changes to
+# anything else, e.g. the stock decrement of every checkout, keep the cache.
+PRODUCT_STATS_FIELDS = ("verification_status", "price", "artisan_id")
+USER_STATS_FIELDS = ("role", "email")
+
+
+def _concerns_stats(update_fields, stats_fields):
+    if update_fields is None:
+        return True
+    names = {name.removesuffix("_id") for name in update_fields}
+    return not names.isdisjoint(name.removesuffix("_id") for name in stats_fields)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=User)
+def product_or_user_deleted(sender, **kwargs):
+    invalidate_dashboard_stats()
+
+
+def _product_stats(instance):
+    # Read from __dict__ so deferred fields are not loaded; None marks unknown.
+    values = tuple(instance.__dict__.get(name, DEFERRED) for name in PRODUCT_STATS_FIELDS)
+    return None if DEFERRED in values else values
+
+
+@receiver(post_init, sender=Product)
+def remember_loaded_product_stats(sender, instance, **kwargs):
+    # Snapshotted on load rather than re-read in pre_save, so product writes
+    # cost no extra query.
+    instance._loaded_stats = _product_stats(instance)
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, update_fields=None, **kwargs):
+    if not (created or _concerns_stats(update_fields, PRODUCT_STATS_FIELDS)):
+        return
+    current = _product_stats(instance)
+    if created or current is None or instance._loaded_stats != current:
+        invalidate_dashboard_stats()
+    instance._loaded_stats = current
+
+
+@receiver(products_changed)
+def products_changed_in_bulk(sender, fields=None, **kwargs):
+    if _concerns_stats(fields, PRODUCT_STATS_FIELDS):
+        invalidate_dashboard_stats()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, created, update_fields=None, **kwargs):
+    # Every login saves last_login; that changes none of the statistics.
+    if created or _concerns_stats(update_fields, USER_STATS_FIELDS):
+        invalidate_dashboard_stats()
+
+
+@receiver(pre_save, sender=Order)
+def remember_previous_order_status(sender, instance, update_fields=None, **kwargs):
+    instance._previous_status = None
+    if instance.pk and (update_fields is None or "status" in update_fields):
+        instance._previous_status = (
+            Order.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Order)
+def roll_up_order_status_change(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_status", None)
+    if created or previous is None:
+        return
+    cancelled = Order.Status.CANCELLED
+    if (previous == cancelled) != (instance.status == cancelled):
+        apply_order_status_change(instance, counted=instance.status != cancelled)
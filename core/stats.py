@@ -0,0 +1,100 @@
+"""
+Statistics for the admin dashboard.
+
+Everything the dashboard shows comes from four queries: one conditional
+aggregate over users, one over products, one grouped query for the top
+artisans and one sum over the last RECENT_DAYS of DailyMarketplaceStats for
+the "new this week" figures, which therefore trail live data by up to one
+update_rollups interval. The result is cached for
+settings.ADMIN_DASHBOARD_CACHE_TIMEOUT seconds and dropped whenever a product
+or user changes in a way these figures depend on (see core.signals).
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from accounts.models import Role, User
+from products.models import Product
+
+from .models import DailyMarketplaceStats
+
+CACHE_KEY = "core:admin_dashboard:stats"
+
+TOP_ARTISANS = 5
+
+# Days, today included, behind recent_users_count / recent_products_count.
+RECENT_DAYS = 7
+
+
+def get_dashboard_stats():
+    stats = cache.get(CACHE_KEY)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(CACHE_KEY, stats, settings.ADMIN_DASHBOARD_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_dashboard_stats():
+    cache.delete(CACHE_KEY)
+
+
+def compute_dashboard_stats():
+    verified = Q(verification_status=Product.VerificationStatus.VERIFIED)
+
+    users = User.objects.aggregate(
+        total=Count("id"),
+        admins=Count("id", filter=Q(role=Role.ADMIN)),
+        artisans=Count("id", filter=Q(role=Role.ARTISAN)),
+        buyers=Count("id", filter=Q(role=Role.BUYER)),
+        consultants=Count("id", filter=Q(role=Role.CONSULTANT)),
+    )
+    products = Product.objects.aggregate(
+        total=Count("id"),
+        approved=Count("id", filter=verified),
+        pending=Count("id", filter=Q(verification_status=Product.VerificationStatus.PENDING)),
+        avg_price=Avg("price"),
+        total_value=Sum("price", filter=verified),
+    )
+    top_artisans = list(
+        Product.objects.values("artisan_id", "artisan__email")
+        .annotate(product_count=Count("id"), approved_count=Count("id", filter=verified))
+        .order_by("-product_count", "artisan_id")[:TOP_ARTISANS]
+    )
+    recent = DailyMarketplaceStats.objects.filter(
+        date__gt=timezone.localdate() - timedelta(days=RECENT_DAYS)
+    ).aggregate(users=Sum("new_users"), products=Sum("new_products"))
+
+    total_products = products["total"]
+    return {
+        "total_users": users["total"],
+        "role_breakdown": {
+            Role.ADMIN: users["admins"],
+            Role.ARTISAN: users["artisans"],
+            Role.BUYER: users["buyers"],
+            Role.CONSULTANT: users["consultants"],
+        },
+        "admin_count": users["admins"],
+        "artisan_count": users["artisans"],
+        "buyer_count": users["buyers"],
+        "consultant_count": users["consultants"],
+        "recent_users_count": recent["users"] or 0,
+        "total_products": total_products,
+        "approved_products": products["approved"],
+        "pending_products": products["pending"],
+        "approval_rate": round(products["approved"] / total_products * 100, 1) if total_products else 0,
+        "recent_products_count": recent["products"] or 0,
+        "top_artisans": [
+            {
+                "email": row["artisan__email"],
+                "product_count": row["product_count"],
+                "approved_count": row["approved_count"],
+            }
+            for row in top_artisans
+        ],
+        "average_price": products["avg_price"] or 0,
+        "total_marketplace_value": products["total_value"] or 0,
+    }
@@ -1,3 +1,231 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Role, User
+from orders.checkout import place_order
+from orders.models import Order, OrderLine
+from products.inventory import reserve
+from products.models import Product
+from products.moderation import apply_decisions
+from products.review_queue import claim_products
+from products.tests import make_artisan, make_product
+from reviews.ratings import apply_rating_change
+
+from .models import DailyMarketplaceStats
+from .rollups import update_rollups
+from .stats import CACHE_KEY, compute_dashboard_stats, get_dashboard_stats, invalidate_dashboard_stats
+from .views import admin_dashboard
+
+
+def make_order(buyer, product, quantity=1, status=Order.Status.PAID):
+    order = Order.objects.create(buyer=buyer, status=status, total=product.price * quantity)
+    OrderLine.objects.create(
+        order=order,
+        product=product,
+        artisan_id=product.artisan_id,
+        product_name=product.name,
+        unit_price=product.price,
+        quantity=quantity,
+    )
+    return order
+
+
+@mock.patch("core.rollups.SAFETY_LAG", timedelta(0))
+class RollupTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email="buyer@example.com", password="pass", role=Role.BUYER)
+        self.product = make_product(make_artisan(), price=Decimal("100.00"), region="Kutch")
+
+    def sales(self):
+        return DailyMarketplaceStats.objects.aggregate(units=Sum("units_sold"), revenue=Sum("revenue"))
+
+    def test_rolls_up_each_row_once(self):
+        make_order(self.buyer, self.product, quantity=2)
+        self.assertEqual(update_rollups(), {"users": 2, "products": 1, "order_lines": 1})
+        self.assertEqual(update_rollups(), {"users": 0, "products": 0, "order_lines": 0})
+        self.assertEqual(self.sales(), {"units": 2, "revenue": Decimal("200.00")})
+
+    def test_cancelled_before_rollup_is_not_counted(self):
+        make_order(self.buyer, self.product, status=Order.Status.CANCELLED)
+        update_rollups()
+        self.assertEqual(self.sales(), {"units": 0, "revenue": Decimal("0.00")})
+
+    def test_cancellation_after_rollup_is_subtracted(self):
+        order = make_order(self.buyer, self.product, quantity=2)
+        make_order(self.buyer, self.product, quantity=1)
+        update_rollups()
+
+        order.status = Order.Status.CANCELLED
+        order.save()
+        self.assertEqual(self.sales(), {"units": 1, "revenue": Decimal("100.00")})
+
+        # Saving again without a status change does nothing.
+        order.save()
+        self.assertEqual(self.sales(), {"units": 1, "revenue": Decimal("100.00")})
+
+        order.status = Order.Status.PAID
+        order.save(update_fields=["status", "updated_at"])
+        self.assertEqual(self.sales(), {"units": 3, "revenue": Decimal("300.00")})
+
+    def test_cancellation_before_next_run_is_left_to_it(self):
+        update_rollups()
+        order = make_order(self.buyer, self.product, quantity=2)
+        order.status = Order.Status.CANCELLED
+        order.save()
+        update_rollups()
+        self.assertEqual(self.sales(), {"units": 0, "revenue": Decimal("0.00")})
+
+
+@mock.patch("core.rollups.SAFETY_LAG", timedelta(0))
+class DashboardStatsTests(TestCase):
+    def test_recent_counts_come_from_rollups(self):
+        artisan = make_artisan()
+        make_product(artisan)
+        old = User.objects.create_user(email="old@example.com", password="pass", role=Role.BUYER)
+        User.objects.filter(pk=old.pk).update(date_joined=timezone.now() - timedelta(days=30))
+
+        stats = compute_dashboard_stats()
+        self.assertEqual((stats["recent_users_count"], stats["recent_products_count"]), (0, 0))
+
+        update_rollups()
+        stats = compute_dashboard_stats()
+        self.assertEqual((stats["recent_users_count"], stats["recent_products_count"]), (1, 1))
+        self.assertEqual(stats["total_users"], 2)
+
+
+class AdminDashboardBudgetTests(TestCase):
+    """
+    The dashboard runs four statistics queries plus one per moderation table
+    when its statistics cache is cold, and only the table pages when warm,
+    however many products there are.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email="admin@example.com", password="pass", role=Role.ADMIN)
+        artisans = [make_artisan(f"artisan{index}@example.com") for index in range(20)]
+        statuses = Product.VerificationStatus.values
+        Product.objects.bulk_create([
+            Product(
+                artisan=artisans[index % len(artisans)],
+                name=f"Piece {index}",
+                price=Decimal(100 + index % 900),
+                image="product_images/piece.jpg",
+                verification_status=statuses[index % len(statuses)],
+            )
+            for index in range(20000)
+        ], batch_size=5000)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE products_product")
+
+    def setUp(self):
+        invalidate_dashboard_stats()
+        self.addCleanup(invalidate_dashboard_stats)
+
+    def get(self):
+        request = RequestFactory().get("/admin-dashboard/", {"pending_page": 3})
+        request.user = self.admin
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        response = admin_dashboard(request)
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_counts(self):
+        with self.assertNumQueries(6):
+            self.get()
+        with self.assertNumQueries(2):
+            self.get()
+
+
+class DashboardInvalidationTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email="buyer@example.com", password="pass", role=Role.BUYER)
+        self.product = make_product(make_artisan(), stock=5)
+        self.addCleanup(invalidate_dashboard_stats)
+
+    def assertDropsStats(self, change, dropped=True):
+        get_dashboard_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        self.assertEqual(cache.get(CACHE_KEY) is None, dropped)
+
+    def test_stock_and_rating_changes_keep_the_stats(self):
+        self.assertDropsStats(lambda: place_order(self.buyer, {self.product.id: 1}), dropped=False)
+        self.assertDropsStats(lambda: reserve(self.buyer, {self.product.id: 2}), dropped=False)
+        self.assertDropsStats(lambda: apply_rating_change(self.product.id, 1, 5), dropped=False)
+
+        def restock():
+            self.product.stock = 50
+            self.product.save()
+        self.assertDropsStats(restock, dropped=False)
+
+    def test_aggregated_changes_drop_the_stats(self):
+        def reprice():
+            self.product.price = Decimal("300.00")
+            self.product.save()
+
+        def reject():
+            apply_decisions(self.buyer, [{"id": self.product.id, "verification_status": "REJECTED"}], False)
+
+        self.assertDropsStats(reprice)
+        self.assertDropsStats(reject)
+        self.assertDropsStats(lambda: make_product(self.product.artisan, name="Second"))
+        self.assertDropsStats(self.product.delete)
+
+    def test_user_changes(self):
+        self.assertDropsStats(lambda: self.buyer.save(update_fields=["last_login"]), dropped=False)
+        self.assertDropsStats(lambda: self.buyer.save(update_fields=["bio"]), dropped=False)
+        self.assertDropsStats(lambda: self.buyer.save(update_fields=["role"]))
+
+
+class BulkRejectTests(TestCase):
+    def test_repeated_ids_are_rejected_once(self):
+        admin = User.objects.create_user(email="admin@example.com", password="pass", role=Role.ADMIN)
+        product = make_product(make_artisan())
+        self.client.force_login(admin)
+
+        response = self.client.post(reverse("bulk_reject_products"), {"product_ids": [product.id, product.id]})
+
+        self.assertRedirects(response, reverse("admin_dashboard"), fetch_redirect_response=False)
+        product.refresh_from_db()
+        self.assertEqual(product.verification_status, Product.VerificationStatus.REJECTED)
+
+
+class VerifyProductTests(TestCase):
+    def setUp(self):
+        self.product = make_product(make_artisan(), verification_status=Product.VerificationStatus.PENDING)
+        self.holder, self.other = [
+            User.objects.create_user(email=f"consultant{index}@example.com", password="pass", role=Role.CONSULTANT)
+            for index in range(2)
+        ]
+        claim_products(self.holder, 1)
+
+    def verify(self, consultant):
+        self.client.force_login(consultant)
+        return self.client.post(reverse("verify_product", args=[self.product.pk]), {"action": "verify"})
+
+    def test_product_claimed_by_another_consultant_is_not_verified(self):
+        response = self.verify(self.other)
+
+        self.assertRedirects(response, reverse("consultant_dashboard"), fetch_redirect_response=False)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.verification_status, Product.VerificationStatus.PENDING)
+        self.assertEqual(self.product.review_claimed_by, self.holder)
+
+    def test_claim_holder_verifies(self):
+        self.verify(self.holder)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.verification_status, Product.VerificationStatus.VERIFIED)
+        self.assertEqual(self.product.verified_by, self.holder)
+        self.assertIsNone(self.product.review_claimed_by)
@@ -4,9 +4,11 @@ from .views import (
     admin_dashboard,
     approve_product,
     reject_product,
+    bulk_reject_products,
     artisan_dashboard,
     buyer_dashboard,
     consultant_dashboard,
+    claim_review_products,
     verify_product,
 )
 
@@ -15,8 +17,10 @@ urlpatterns = [
     path("admin-dashboard/", admin_dashboard, name="admin_dashboard"),
     path("approve-product/<int:product_id>/", approve_product, name="approve_product"),
     path("reject-product/<int:product_id>/", reject_product, name="reject_product"),
+    path("reject-products/", bulk_reject_products, name="bulk_reject_products"),
     path("artisan-dashboard/", artisan_dashboard, name="artisan_dashboard"),
     path("buyer-dashboard/", buyer_dashboard, name="buyer_dashboard"),
     path("consultant/dashboard/", consultant_dashboard, name="consultant_dashboard"),
+    path("consultant/claim/", claim_review_products, name="claim_review_products"),
     path("consultant/verify/<int:pk>/", verify_product, name="verify_product"),
 ]
\ No newline at end of file
@@ -1,13 +1,21 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Q, Sum, Avg
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count, Q
 from django.utils import timezone
 from django.views.decorators.http import require_POST
-from datetime import timedelta
 from functools import wraps
+from products.cart import CartService
 from products.models import Product
-from accounts.models import User, Role, ArtisanStory
+from products.moderation import MAX_DECISIONS, UPDATED, apply_decisions
+from products.review_queue import ClaimHeld, check_claim, claim_products, claimed_by
+from accounts.models import Role, ArtisanStory
+
+from .stats import get_dashboard_stats
+
+ADMIN_TABLE_PAGE_SIZE = 25
 
  
 def landing_page(request):
@@ -50,82 +58,37 @@ def admin_dashboard(request):
     - Product statistics (total, approved, pending)
     - Recent activity (users and products in last 7 days)
     - Product pricing statistics
+
+    The statistics come from core.stats (four queries, cached); the
+    moderation tables are paginated.
     """
-    
-    # === USER STATISTICS ===
-    total_users = User.objects.count()
-    
-    # Users count by role using aggregation
-    users_by_role = User.objects.values('role').annotate(count=Count('id')).order_by('role')
-    role_breakdown = {item['role']: item['count'] for item in users_by_role}
-    
-    # Recent users (last 7 days)
-    seven_days_ago = timezone.now() - timedelta(days=7)
-    recent_users_count = User.objects.filter(date_joined__gte=seven_days_ago).count()
-    
-    # === PRODUCT STATISTICS ===
-    # Basic product counts
-    total_products = Product.objects.count()
-    approved_products = Product.objects.filter(verification_status=Product.VerificationStatus.VERIFIED).count()
-    pending_products = Product.objects.filter(verification_status=Product.VerificationStatus.PENDING).count()
-    
-    # Product verification rate (percentage)
-    approval_rate = (approved_products / total_products * 100) if total_products > 0 else 0
-    
-    # Recent products (last 7 days)
-    recent_products_count = Product.objects.filter(created_at__gte=seven_days_ago).count()
-    
+    stats = get_dashboard_stats()
+
     # Products lists for moderation tables
-    pending_products_list = Product.objects.filter(
-        verification_status=Product.VerificationStatus.PENDING
-    ).select_related('artisan').order_by('-created_at')
-    approved_products_list = Product.objects.filter(
-        verification_status=Product.VerificationStatus.VERIFIED
-    ).select_related('artisan').order_by('-created_at')
-    
-    # === ARTISAN STATISTICS ===
-    # Top artisans by product count
-    top_artisans = User.objects.filter(
-        role=Role.ARTISAN
-    ).annotate(
-        product_count=Count('products'),
-        approved_count=Count('products', filter=Q(products__verification_status=Product.VerificationStatus.VERIFIED))
-    ).order_by('-product_count')[:5]
-    
-    # === PRODUCT PRICING STATISTICS ===
-    # Aggregate pricing data
-    pricing_stats = Product.objects.aggregate(
-        avg_price=Avg('price'),
-        total_value=Sum('price', filter=Q(verification_status=Product.VerificationStatus.VERIFIED))
+    pending_products_list = _paginate(
+        request,
+        Product.objects.filter(
+            verification_status=Product.VerificationStatus.PENDING
+        ).select_related('artisan').order_by('-created_at', '-id'),
+        'pending_page',
+        stats['pending_products'],
     )
-    
-    # Build context dictionary
+    approved_products_list = _paginate(
+        request,
+        Product.objects.filter(
+            verification_status=Product.VerificationStatus.VERIFIED
+        ).select_related('artisan').order_by('-created_at', '-id'),
+        'approved_page',
+        stats['approved_products'],
+    )
+
     context = {
-        # User statistics
-        'total_users': total_users,
-        'role_breakdown': role_breakdown,
-        'admin_count': role_breakdown.get(Role.ADMIN, 0),
-        'artisan_count': role_breakdown.get(Role.ARTISAN, 0),
-        'buyer_count': role_breakdown.get(Role.BUYER, 0),
-        'consultant_count': role_breakdown.get(Role.CONSULTANT, 0),
-        'recent_users_count': recent_users_count,
-        
-        # Product statistics
-        'total_products': total_products,
-        'approved_products': approved_products,
-        'pending_products': pending_products,
-        'approval_rate': round(approval_rate, 1),
-        'recent_products_count': recent_products_count,
-        
+        **stats,
+
         # Product details
         'pending_products_list': pending_products_list,
         'approved_products_list': approved_products_list,
-        'top_artisans': top_artisans,
-        
-        # Pricing statistics
-        'average_price': pricing_stats['avg_price'] or 0,
-        'total_marketplace_value': pricing_stats['total_value'] or 0,
-        
+
         # Current admin user
         'admin_user': request.user,
     }
@@ -133,6 +96,13 @@ def admin_dashboard(request):
     return render(request, "dashboards/admin_dashboard.html", context)
 
 
+def _paginate(request, queryset, page_param, count):
+    paginator = Paginator(queryset, ADMIN_TABLE_PAGE_SIZE)
+    # The dashboard statistics already counted these rows.
+    paginator.count = count
+    return paginator.get_page(request.GET.get(page_param))
+
+
 @role_required(Role.ADMIN)
 @require_POST
 def approve_product(request, product_id):
@@ -149,11 +119,31 @@ def reject_product(request, product_id):
     product.verification_status = Product.VerificationStatus.REJECTED
     product.is_approved = False
     product.is_verified = False
-    product.save(update_fields=["verification_status", "is_approved", "is_verified"])
+    product.save(update_fields=["verification_status", "is_approved", "is_verified", "updated_at"])
     messages.warning(request, f"Rejected product: {product_name}")
     return redirect("admin_dashboard")
 
 
+@role_required(Role.ADMIN)
+@require_POST
+def bulk_reject_products(request):
+    product_ids = list(dict.fromkeys(
+        int(pk) for pk in request.POST.getlist("product_ids") if pk.isdigit()
+    ))[:MAX_DECISIONS]
+    if not product_ids:
+        messages.error(request, "Select at least one product to reject.")
+        return redirect("admin_dashboard")
+
+    results = apply_decisions(
+        request.user,
+        [{"id": pk, "verification_status": Product.VerificationStatus.REJECTED} for pk in product_ids],
+        respect_claims=False,
+    )
+    rejected = sum(1 for result in results if result["status"] == UPDATED)
+    messages.warning(request, f"Rejected {rejected} product(s).")
+    return redirect("admin_dashboard")
+
+
 @role_required(Role.ARTISAN)
 def artisan_dashboard(request):
     artisan_products = Product.objects.filter(
@@ -181,8 +171,7 @@ def artisan_dashboard(request):
 
 @role_required(Role.BUYER)
 def buyer_dashboard(request):
-    cart = request.session.get("cart", {})
-    cart_item_count = sum(cart.values()) if cart else 0
+    cart_item_count = CartService(request).count()
 
     latest_products = Product.objects.filter(
         verification_status=Product.VerificationStatus.VERIFIED
@@ -198,38 +187,48 @@ def buyer_dashboard(request):
 
 @role_required(Role.CONSULTANT)
 def consultant_dashboard(request):
-    reviewed_count = Product.objects.filter(
-        verification_status__in=[
-            Product.VerificationStatus.VERIFIED,
-            Product.VerificationStatus.REJECTED,
-        ]
-    ).count()
-    verified_count = Product.objects.filter(
-        verification_status=Product.VerificationStatus.VERIFIED
-    ).count()
-    rejected_count = Product.objects.filter(
-        verification_status=Product.VerificationStatus.REJECTED
-    ).count()
+    counts = Product.objects.aggregate(
+        verified_count=Count("id", filter=Q(verification_status=Product.VerificationStatus.VERIFIED)),
+        rejected_count=Count("id", filter=Q(verification_status=Product.VerificationStatus.REJECTED)),
+        pending_count=Count("id", filter=Q(verification_status=Product.VerificationStatus.PENDING)),
+    )
 
-    pending_products = Product.objects.filter(
-        verification_status=Product.VerificationStatus.PENDING
-    ).select_related("artisan").order_by("-created_at")
+    # Each consultant works from their own claimed slice of the queue.
+    claimed_products = list(claimed_by(request.user).select_related("artisan"))
 
     context = {
-        "reviewed_count": reviewed_count,
-        "verified_count": verified_count,
-        "rejected_count": rejected_count,
-        "pending_count": pending_products.count(),
-        "pending_products": pending_products,
+        "reviewed_count": counts["verified_count"] + counts["rejected_count"],
+        "verified_count": counts["verified_count"],
+        "rejected_count": counts["rejected_count"],
+        "pending_count": counts["pending_count"],
+        "pending_products": claimed_products,
+        "claim_expires_at": min((p.review_claim_expires_at for p in claimed_products), default=None),
+        "consultant_region": request.user.region,
     }
 
     return render(request, "core/consultant_dashboard.html", context)
 
 
+@role_required(Role.CONSULTANT)
+@require_POST
+def claim_review_products(request):
+    try:
+        count = min(max(int(request.POST.get("count", 10)), 1), 50)
+    except ValueError:
+        count = 10
+    region = request.user.region if request.POST.get("match_region") else None
+
+    ids = claim_products(request.user, count, region=region)
+    if ids:
+        messages.success(request, f"You have {len(ids)} product(s) to review.")
+    else:
+        messages.info(request, "No unclaimed products are waiting for review.")
+    return redirect("consultant_dashboard")
+
+
 @role_required(Role.CONSULTANT)
 @require_POST
 def verify_product(request, pk):
-    product = get_object_or_404(Product, pk=pk, verification_status=Product.VerificationStatus.PENDING)
     action = request.POST.get("action")
     note = (request.POST.get("verification_note") or "").strip()
 
@@ -237,24 +236,42 @@ def verify_product(request, pk):
         messages.error(request, "Invalid verification action.")
         return redirect("consultant_dashboard")
 
-    if action == "verify":
-        product.verification_status = Product.VerificationStatus.VERIFIED
-        product.is_verified = True
-        messages.success(request, f"Verified product: {product.name}")
-    else:
-        product.verification_status = Product.VerificationStatus.REJECTED
-        product.is_verified = False
-        messages.warning(request, f"Rejected product: {product.name}")
-
-    product.verification_note = note
-    product.verified_by = request.user
-    product.verified_at = timezone.now()
-    product.save(update_fields=[
-        "verification_status",
-        "is_verified",
-        "verification_note",
-        "verified_by",
-        "verified_at",
-    ])
+    with transaction.atomic():
+        # Locked so two consultants cannot both decide on this product.
+        product = get_object_or_404(
+            Product.objects.select_for_update(),
+            pk=pk,
+            verification_status=Product.VerificationStatus.PENDING,
+        )
+        try:
+            check_claim(product, request.user)
+        except ClaimHeld:
+            messages.error(request, f"{product.name} is being reviewed by another consultant.")
+            return redirect("consultant_dashboard")
+
+        if action == "verify":
+            product.verification_status = Product.VerificationStatus.VERIFIED
+            product.is_verified = True
+            messages.success(request, f"Verified product: {product.name}")
+        else:
+            product.verification_status = Product.VerificationStatus.REJECTED
+            product.is_verified = False
+            messages.warning(request, f"Rejected product: {product.name}")
+
+        product.verification_note = note
+        product.verified_by = request.user
+        product.verified_at = timezone.now()
+        product.review_claimed_by = None
+        product.review_claim_expires_at = None
+        product.save(update_fields=[
+            "verification_status",
+            "is_verified",
+            "verification_note",
+            "verified_by",
+            "verified_at",
+            "review_claimed_by",
+            "review_claim_expires_at",
+            "updated_at",
+        ])
 
     return redirect("consultant_dashboard")
\ No newline at end of file
@@ -15,6 +15,8 @@ from datetime import timedelta
 from urllib.parse import parse_qs, urlparse
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 
 def _load_env_file(file_path):
     if not os.path.exists(file_path):
@@ -94,6 +96,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'accounts',
     'products',
     'orders',
@@ -111,6 +114,7 @@ MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'products.middleware.CartCookieMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -147,6 +151,76 @@ DATABASES = {
 }
 
 
+# Cache
+# Production needs REDIS_URL so every gunicorn worker shares one cache: user
+# revocation (accounts/user_cache.py), the JWT denylist, login throttles and
+# the response-cache/ETag version tokens all rely on a write by one worker
+# being seen by the others. The per-process memory cache is for development
+# only, and startup fails without REDIS_URL when DEBUG is off.
+
+REDIS_URL = os.getenv('REDIS_URL', '').strip()
+
+if not REDIS_URL and not DEBUG:
+    raise ImproperlyConfigured('REDIS_URL must be set when DEBUG is off; see the Cache section of settings.py.')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'kalasetu',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'kalasetu',
+        }
+    }
+
+# Seconds a cached public product response may be served.
+API_RESPONSE_CACHE_TIMEOUT = int(os.getenv('API_RESPONSE_CACHE_TIMEOUT', '300'))
+
+# Admin dashboard statistics (core/stats.py); also dropped on any product or
+# user change.
+ADMIN_DASHBOARD_CACHE_TIMEOUT = int(os.getenv('ADMIN_DASHBOARD_CACHE_TIMEOUT', '60'))
+
+# Users resolved for authenticated requests (accounts/user_cache.py); dropped
+# whenever the user is saved.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '300'))
+
+# Sessions are read from the cache and only written through to the database
+# when they change.
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+
+# Cart storage for guests (logged-in users always use CartItem rows); see
+# products/cart.py. Use 'products.cart.SessionCartStorage' to keep guest carts
+# server-side instead.
+CART_GUEST_STORAGE = os.getenv('CART_GUEST_STORAGE', 'products.cart.SignedCookieCartStorage')
+CART_COOKIE_NAME = 'kalasetu_cart'
+CART_COOKIE_AGE = 60 * 60 * 24 * 30
+
+# How long POST /api/cart/reserve/ holds stock before the sweeper
+# (release_expired_reservations) gives it back.
+STOCK_RESERVATION_MINUTES = int(os.getenv('STOCK_RESERVATION_MINUTES', '15'))
+
+# How long a consultant's review-queue claim (POST /api/consultant/claims/)
+# keeps other consultants off a product.
+REVIEW_CLAIM_MINUTES = int(os.getenv('REVIEW_CLAIM_MINUTES', '30'))
+
+# Authenticity certificates (authenticity app). A base64 Ed25519 private key
+# seed signs batch roots so scanners can verify offline. Left empty, roots are
+# signed with an HMAC of SECRET_KEY and proofs carry no public key, which is
+# only allowed with DEBUG on.
+AUTHENTICITY_SIGNING_KEY = os.getenv('AUTHENTICITY_SIGNING_KEY', '')
+
+if not AUTHENTICITY_SIGNING_KEY and not DEBUG:
+    raise ImproperlyConfigured('AUTHENTICITY_SIGNING_KEY must be set when DEBUG is off.')
+
+AUTHENTICITY_BATCH_SIZE = int(os.getenv('AUTHENTICITY_BATCH_SIZE', '1024'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -204,13 +278,22 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.StandardPageNumberPagination',
     'PAGE_SIZE': 10,
     'EXCEPTION_HANDLER': 'api.exceptions.custom_exception_handler',
 }
@@ -219,7 +302,9 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
-    'ROTATE_REFRESH_TOKENS': False,
+    'ROTATE_REFRESH_TOKENS': True,
+    # Rotated and logged-out tokens go to accounts.revocation, not the
+    # database-backed token_blacklist app.
     'BLACKLIST_AFTER_ROTATION': False,
     'UPDATE_LAST_LOGIN': False,
 
@@ -236,6 +321,21 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=30),
 }
 
+# Login/registration throttling (accounts/throttling.py), in DRF rate format
+# ("<count>/<s|min|hour|day>"); per client IP, or per submitted email.
+AUTH_THROTTLE_RATES = {
+    'login_ip': os.getenv('THROTTLE_LOGIN_IP', '30/min'),
+    'login_email': os.getenv('THROTTLE_LOGIN_EMAIL', '10/min'),
+    'register_ip': os.getenv('THROTTLE_REGISTER_IP', '10/hour'),
+}
+
+# JWT denylist (accounts/revocation.py): how often each worker checks the
+# shared version counter, syncs from the database regardless, and rebuilds its
+# Bloom filter while pruning expired entries.
+JWT_DENYLIST_POLL_SECONDS = float(os.getenv('JWT_DENYLIST_POLL_SECONDS', '1'))
+JWT_DENYLIST_RESYNC_SECONDS = int(os.getenv('JWT_DENYLIST_RESYNC_SECONDS', '60'))
+JWT_DENYLIST_REBUILD_SECONDS = int(os.getenv('JWT_DENYLIST_REBUILD_SECONDS', '3600'))
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:5173',
@@ -267,6 +367,14 @@ CORS_ALLOW_HEADERS = [
 
 # Google reCAPTCHA
 RECAPTCHA_SECRET_KEY = os.getenv('RECAPTCHA_SECRET_KEY', '').strip()
+RECAPTCHA_VERIFY_URL = os.getenv('RECAPTCHA_VERIFY_URL', 'https://www.google.com/recaptcha/api/siteverify')
+RECAPTCHA_TIMEOUT = float(os.getenv('RECAPTCHA_TIMEOUT', '3'))
+# Seconds an already-verified token is accepted again without asking Google.
+RECAPTCHA_CACHE_SECONDS = int(os.getenv('RECAPTCHA_CACHE_SECONDS', '120'))
+# Whether logins and registrations go through while Google is unreachable.
+RECAPTCHA_FAIL_OPEN = os.getenv('RECAPTCHA_FAIL_OPEN', 'False').lower() == 'true'
+RECAPTCHA_BREAKER_THRESHOLD = int(os.getenv('RECAPTCHA_BREAKER_THRESHOLD', '5'))
+RECAPTCHA_BREAKER_COOLDOWN = int(os.getenv('RECAPTCHA_BREAKER_COOLDOWN', '30'))
     
 CSRF_TRUSTED_ORIGINS = [
     origin.strip()
@@ -1,3 +1,17 @@
 from django.contrib import admin
+from .models import Order, OrderLine
 
-# Register your models here.
+
+class OrderLineInline(admin.TabularInline):
+    model = OrderLine
+    extra = 0
+    readonly_fields = ("product", "artisan", "product_name", "unit_price", "quantity")
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ("id", "buyer", "status", "total", "created_at")
+    list_filter = ("status", "created_at")
+    search_fields = ("buyer__email",)
+    ordering = ("-created_at",)
+    inlines = (OrderLineInline,)
@@ -0,0 +1,111 @@
+"""
+Atomic checkout.
+
+`place_order` turns a cart ({product_id: quantity}) into an Order in one
+transaction. Product rows are locked with SELECT ... FOR UPDATE in id order,
+so two checkouts that share products always lock them in the same order and
+cannot deadlock. Stock comes from the buyer's live reservations first and
+otherwise from a conditional decrement (see products/inventory.py). Prices
+are copied onto the lines, and all lines are written with a single
+bulk_create.
+"""
+
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+
+from products.inventory import consume_reservations, return_stock, take_stock
+from products.models import Product
+
+from .models import Order, OrderLine
+
+
+class CheckoutError(Exception):
+    """The cart cannot be turned into an order."""
+
+    def __init__(self, message, product_ids=()):
+        super().__init__(message)
+        self.product_ids = list(product_ids)
+
+
+def place_order(buyer, items, idempotency_key=""):
+    """
+    Create and return `(order, created)` for `items`.
+
+    With an `idempotency_key`, a retried submit returns the order the first
+    attempt created (`created` is False) instead of ordering twice.
+    """
+    if idempotency_key:
+        existing = _find_existing(buyer, idempotency_key)
+        if existing is not None:
+            return existing, False
+
+    items = {product_id: quantity for product_id, quantity in items.items() if quantity > 0}
+    if not items:
+        raise CheckoutError("Your cart is empty.")
+
+    try:
+        with transaction.atomic():
+            order = _create_order(buyer, items, idempotency_key)
+    except IntegrityError:
+        # A concurrent submit with the same key committed first.
+        existing = _find_existing(buyer, idempotency_key) if idempotency_key else None
+        if existing is None:
+            raise
+        return existing, False
+    return order, True
+
+
+def _create_order(buyer, items, idempotency_key):
+    products = list(
+        Product.objects.select_for_update()
+        .filter(id__in=list(items), verification_status=Product.VerificationStatus.VERIFIED)
+        .order_by("id")
+    )
+    missing = set(items) - {product.id for product in products}
+    if missing:
+        raise CheckoutError("Some products in your cart are no longer available.", sorted(missing))
+
+    held = consume_reservations(buyer, list(items))
+    surplus = {}
+    out_of_stock = []
+    for product in products:
+        needed = items[product.id] - held.get(product.id, 0)
+        if needed > 0 and not take_stock(product.id, needed):
+            out_of_stock.append(product.id)
+        elif needed < 0:
+            surplus[product.id] = -needed
+    if out_of_stock:
+        raise CheckoutError("Some products in your cart are out of stock.", out_of_stock)
+    if surplus:
+        return_stock(surplus)
+
+    lines = []
+    total = Decimal("0.00")
+    for product in products:
+        quantity = items[product.id]
+        total += product.price * quantity
+        lines.append(OrderLine(
+            product=product,
+            artisan_id=product.artisan_id,
+            product_name=product.name,
+            unit_price=product.price,
+            quantity=quantity,
+        ))
+
+    # There is no payment gateway yet; checkout is treated as payment, as the
+    # payment_success page has always assumed.
+    order = Order.objects.create(
+        buyer=buyer,
+        status=Order.Status.PAID,
+        total=total,
+        idempotency_key=idempotency_key,
+    )
+    for line in lines:
+        line.order = order
+    OrderLine.objects.bulk_create(lines)
+    return order
+
+
+def _find_existing(buyer, idempotency_key):
+    return Order.objects.filter(buyer=buyer, idempotency_key=idempotency_key).first()
@@ -1,3 +1,109 @@
-from django.test import TestCase
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.test import TransactionTestCase
+
+from accounts.models import Role, User
+from products.models import Product
+from products.tests import make_artisan, make_product
+
+from .checkout import CheckoutError, place_order
+from .models import Order, OrderLine
+
+WORKERS = 16
+
+
+def run_parallel(jobs, function):
+    """Call `function(*job)` for every job from WORKERS threads, started together."""
+    start = threading.Barrier(min(WORKERS, len(jobs)))
+    results = []
+
+    def submit(job):
+        try:
+            try:
+                start.wait(timeout=5)
+            except threading.BrokenBarrierError:
+                pass
+            results.append(function(*job))
+        except Exception as exc:  # noqa: BLE001 - reported by the caller
+            results.append(exc)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        list(pool.map(submit, jobs))
+    return results
+
+
+class ParallelCheckoutTests(TransactionTestCase):
+    def setUp(self):
+        self.artisan = make_artisan()
+        self.buyers = [
+            User.objects.create_user(email=f"buyer{index}@example.com", password="pass", role=Role.BUYER)
+            for index in range(WORKERS)
+        ]
+
+    def test_scarce_stock_is_never_oversold(self):
+        product = make_product(self.artisan, stock=10)
+        jobs = [(self.buyers[index % WORKERS], {product.id: 1 + index % 2}) for index in range(40)]
+
+        results = run_parallel(jobs, place_order)
+
+        placed = [result[0] for result in results if isinstance(result, tuple)]
+        failures = [result for result in results if not isinstance(result, tuple)]
+        self.assertTrue(all(isinstance(failure, CheckoutError) for failure in failures), failures)
+        sold = sum(order.lines.get().quantity for order in placed)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 10 - sold)
+        self.assertGreaterEqual(product.stock, 0)
+        # With 1- and 2-unit carts, at most one unit can be left unsold.
+        self.assertLessEqual(product.stock, 1)
+
+    def test_shared_products_lose_no_updates(self):
+        rng = random.Random(12)
+        products = [make_product(self.artisan, name=f"Piece {index}", stock=1000) for index in range(5)]
+        prices = {product.id: product.price for product in products}
+        jobs = []
+        for index in range(120):
+            picked = rng.sample(list(prices), rng.randint(1, len(prices)))
+            # Shuffled on purpose: lock order must not depend on cart order.
+            jobs.append((self.buyers[index % WORKERS], {product_id: rng.randint(1, 3) for product_id in picked}))
+
+        results = run_parallel(jobs, place_order)
+
+        self.assertEqual([result for result in results if not isinstance(result, tuple)], [])
+        self.assertEqual(Order.objects.count(), len(jobs))
+        self.assertEqual(OrderLine.objects.count(), sum(len(items) for _, items in jobs))
+        expected_total = sum(
+            (prices[product_id] * quantity for _, items in jobs for product_id, quantity in items.items()),
+            Decimal("0.00"),
+        )
+        self.assertEqual(sum(Order.objects.values_list("total", flat=True), Decimal("0.00")), expected_total)
+        for product in products:
+            sold = sum(items.get(product.id, 0) for _, items in jobs)
+            product.refresh_from_db(fields=["stock"])
+            self.assertEqual(product.stock, 1000 - sold)
+
+    def test_idempotency_key_creates_one_order(self):
+        product = make_product(self.artisan, stock=100)
+        buyer = self.buyers[0]
+        key = uuid.uuid4().hex
+
+        results = run_parallel([(buyer, {product.id: 2}, key)] * WORKERS, place_order)
+
+        self.assertTrue(all(isinstance(result, tuple) for result in results), results)
+        self.assertEqual(len({order.pk for order, _ in results}), 1)
+        self.assertEqual(sum(created for _, created in results), 1)
+        self.assertEqual(Order.objects.filter(buyer=buyer, idempotency_key=key).count(), 1)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 98)
+
+    def test_unverified_product_is_refused(self):
+        product = make_product(self.artisan, verification_status=Product.VerificationStatus.PENDING)
+        with self.assertRaises(CheckoutError):
+            place_order(self.buyers[0], {product.id: 1})
+        self.assertFalse(Order.objects.exists())
@@ -1,10 +1,35 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import Product
+from .moderation import MAX_DECISIONS, apply_decisions
 
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ("name", "artisan", "price", "is_approved", "created_at")
-    list_filter = ("is_approved", "created_at")
+    list_display = ("name", "artisan", "price", "verification_status", "is_approved", "created_at")
+    list_filter = ("verification_status", "is_approved", "created_at")
     search_fields = ("name", "artisan__email")
-    ordering = ("-created_at",)
\ No newline at end of file
+    ordering = ("-created_at",)
+    actions = ("verify_selected", "reject_selected")
+
+    @admin.action(description="Verify selected products")
+    def verify_selected(self, request, queryset):
+        self._decide(request, queryset, Product.VerificationStatus.VERIFIED)
+
+    @admin.action(description="Reject selected products")
+    def reject_selected(self, request, queryset):
+        self._decide(request, queryset, Product.VerificationStatus.REJECTED)
+
+    def _decide(self, request, queryset, verification_status):
+        ids = list(queryset.values_list("id", flat=True))
+        for start in range(0, len(ids), MAX_DECISIONS):
+            # Admins override review-queue claims.
+            apply_decisions(
+                request.user,
+                [{"id": pk, "verification_status": verification_status} for pk in ids[start:start + MAX_DECISIONS]],
+                respect_claims=False,
+            )
+        self.message_user(
+            request,
+            f"{len(ids)} product(s) marked {verification_status.label.lower()}.",
+            messages.SUCCESS,
+        )
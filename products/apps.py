@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class StartappConfig(AppConfig):
     name = 'products'
+
+    def ready(self):
+        from . import signals  # noqa: F401
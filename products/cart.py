@@ -0,0 +1,323 @@
+"""
+Shopping cart shared by the template views and the /api/cart/ endpoints.
+
+A cart is {product_id: quantity}. Where it is stored depends on who is
+asking:
+
+- logged-in users: `DatabaseCartStorage`, one CartItem row per line with
+  atomic quantity increments;
+- guests: settings.CART_GUEST_STORAGE, by default `SignedCookieCartStorage`
+  (no server-side write at all) or `SessionCartStorage`.
+
+Guest carts are merged into the user's cart on login (see products.signals),
+capped at the stock on hand.
+`CartService.resolve` turns a cart into products with one query and drops
+lines whose product has been deleted or is no longer verified.
+"""
+
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+from .models import CartItem, Product
+
+SESSION_KEY = "cart"
+
+# Keeps the signed cookie comfortably under the 4 KB browser limit.
+MAX_COOKIE_LINES = 50
+
+
+class Cart:
+    """
+    A resolved cart.
+
+    `products` are Product instances carrying `quantity` and `subtotal`
+    attributes, in the order they were added.
+    """
+
+    def __init__(self, products, total):
+        self.products = products
+        self.total = total
+
+    @property
+    def item_count(self):
+        return sum(product.quantity for product in self.products)
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def __len__(self):
+        return len(self.products)
+
+
+class SessionCartStorage:
+    """Cart kept in request.session (the original storage)."""
+
+    def __init__(self, request):
+        self.session = request.session
+
+    def get_items(self):
+        return _clean_items(self.session.get(SESSION_KEY, {}))
+
+    def add(self, product_id, quantity):
+        items = self.get_items()
+        items[product_id] = items.get(product_id, 0) + quantity
+        self._save(items)
+
+    def set_quantity(self, product_id, quantity):
+        items = self.get_items()
+        items[product_id] = quantity
+        self._save(items)
+
+    def remove(self, product_ids):
+        items = self.get_items()
+        for product_id in product_ids:
+            items.pop(product_id, None)
+        self._save(items)
+
+    def clear(self):
+        if SESSION_KEY in self.session:
+            del self.session[SESSION_KEY]
+
+    def _save(self, items):
+        self.session[SESSION_KEY] = {str(product_id): quantity for product_id, quantity in items.items()}
+        self.session.modified = True
+
+
+class SignedCookieCartStorage:
+    """
+    Cart kept in a signed cookie, so guest carts never touch the database.
+
+    Changes are buffered on the instance and written to the response by
+    products.middleware.CartCookieMiddleware; use `for_request` so every
+    caller within a request shares one instance.
+    """
+
+    salt = "products.cart"
+
+    def __init__(self, request):
+        self.items = None
+        self.dirty = False
+        self.request = request
+
+    @classmethod
+    def for_request(cls, request):
+        request = getattr(request, "_request", request)
+        storage = getattr(request, "_cart_cookie_storage", None)
+        if storage is None:
+            storage = request._cart_cookie_storage = cls(request)
+        return storage
+
+    def get_items(self):
+        if self.items is None:
+            value = self.request.get_signed_cookie(
+                settings.CART_COOKIE_NAME,
+                default=None,
+                salt=self.salt,
+                max_age=settings.CART_COOKIE_AGE,
+            )
+            try:
+                self.items = _clean_items(json.loads(value)) if value else {}
+            except ValueError:
+                self.items = {}
+        return dict(self.items)
+
+    def add(self, product_id, quantity):
+        items = self.get_items()
+        items[product_id] = items.get(product_id, 0) + quantity
+        self._save(items)
+
+    def set_quantity(self, product_id, quantity):
+        items = self.get_items()
+        items[product_id] = quantity
+        self._save(items)
+
+    def remove(self, product_ids):
+        items = self.get_items()
+        for product_id in product_ids:
+            items.pop(product_id, None)
+        self._save(items)
+
+    def clear(self):
+        self._save({})
+
+    def _save(self, items):
+        # Oldest lines drop off first if the cookie would grow too large.
+        self.items = dict(list(items.items())[-MAX_COOKIE_LINES:])
+        self.dirty = True
+
+    def update_response(self, response):
+        if not self.dirty:
+            return
+        if not self.items:
+            response.delete_cookie(settings.CART_COOKIE_NAME, samesite="Lax")
+            return
+        response.set_signed_cookie(
+            settings.CART_COOKIE_NAME,
+            json.dumps(self.items, separators=(",", ":")),
+            salt=self.salt,
+            max_age=settings.CART_COOKIE_AGE,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite="Lax",
+        )
+
+
+class DatabaseCartStorage:
+    """Cart kept as CartItem rows for a logged-in user."""
+
+    def __init__(self, user):
+        self.user = user
+
+    def get_items(self):
+        return dict(
+            CartItem.objects.filter(user=self.user)
+            .order_by("created_at", "id")
+            .values_list("product_id", "quantity")
+        )
+
+    def add(self, product_id, quantity):
+        lines = CartItem.objects.filter(user=self.user, product_id=product_id)
+        if lines.update(quantity=F("quantity") + quantity):
+            return
+        try:
+            with transaction.atomic():
+                CartItem.objects.create(user=self.user, product_id=product_id, quantity=quantity)
+        except IntegrityError:
+            # A concurrent request created the line first. If there is no
+            # line, the product itself is missing: let the caller see that.
+            if not lines.update(quantity=F("quantity") + quantity):
+                raise
+
+    def set_quantity(self, product_id, quantity):
+        lines = CartItem.objects.filter(user=self.user, product_id=product_id)
+        if lines.update(quantity=quantity):
+            return
+        try:
+            with transaction.atomic():
+                CartItem.objects.create(user=self.user, product_id=product_id, quantity=quantity)
+        except IntegrityError:
+            if not lines.update(quantity=quantity):
+                raise
+
+    def remove(self, product_ids):
+        CartItem.objects.filter(user=self.user, product_id__in=product_ids).delete()
+
+    def clear(self):
+        CartItem.objects.filter(user=self.user).delete()
+
+
+def get_guest_storage(request):
+    storage_class = import_string(settings.CART_GUEST_STORAGE)
+    if hasattr(storage_class, "for_request"):
+        return storage_class.for_request(request)
+    return storage_class(request)
+
+
+def get_cart_storage(request):
+    if request.user.is_authenticated:
+        return DatabaseCartStorage(request.user)
+    return get_guest_storage(request)
+
+
+def merge_guest_cart(request, user):
+    """
+    Move the guest cart into `user`'s cart and empty it. Merged quantities
+    are capped at the product's stock; lines for missing or sold-out
+    products are dropped.
+    """
+    guest = get_guest_storage(request)
+    items = guest.get_items()
+    if not items:
+        return
+
+    storage = DatabaseCartStorage(user)
+    existing = dict(
+        CartItem.objects.filter(user=user, product_id__in=list(items)).values_list("product_id", "quantity")
+    )
+    stock = dict(Product.objects.filter(id__in=list(items), stock__gt=0).values_list("id", "stock"))
+    with transaction.atomic():
+        for product_id, quantity in items.items():
+            if product_id in existing and product_id in stock:
+                merged = min(existing[product_id] + quantity, stock[product_id])
+                if merged != existing[product_id]:
+                    storage.set_quantity(product_id, merged)
+        CartItem.objects.bulk_create(
+            [
+                CartItem(user=user, product_id=product_id, quantity=min(quantity, stock[product_id]))
+                for product_id, quantity in items.items()
+                if product_id not in existing and product_id in stock and quantity > 0
+            ],
+            ignore_conflicts=True,
+        )
+    guest.clear()
+
+
+class CartService:
+    def __init__(self, request):
+        self.storage = get_cart_storage(request)
+
+    def get_items(self):
+        """Return the cart as {product_id: quantity}."""
+        return self.storage.get_items()
+
+    def count(self):
+        """Total quantity across all lines, without loading products."""
+        return sum(self.get_items().values())
+
+    def add(self, product_id, quantity=1):
+        self.storage.add(product_id, quantity)
+
+    def set_quantity(self, product_id, quantity):
+        if quantity > 0:
+            self.storage.set_quantity(product_id, quantity)
+        else:
+            self.storage.remove([product_id])
+
+    def remove(self, product_id):
+        self.storage.remove([product_id])
+
+    def clear(self):
+        self.storage.clear()
+
+    def resolve(self):
+        """Load every line in one query and return a `Cart`."""
+        items = self.get_items()
+        if not items:
+            return Cart([], Decimal("0.00"))
+
+        available = Product.objects.filter(
+            verification_status=Product.VerificationStatus.VERIFIED
+        ).select_related("artisan").in_bulk(list(items))
+
+        products = []
+        total = Decimal("0.00")
+        for product_id, quantity in items.items():
+            product = available.get(product_id)
+            if product is None or quantity <= 0:
+                continue
+            product.quantity = quantity
+            product.subtotal = product.price * quantity
+            total += product.subtotal
+            products.append(product)
+
+        if len(products) != len(items):
+            # Deleted or unverified since it was added to the cart.
+            kept = {product.id for product in products}
+            self.storage.remove([product_id for product_id in items if product_id not in kept])
+
+        return Cart(products, total)
+
+
+def _clean_items(raw):
+    items = {}
+    for product_id, quantity in raw.items():
+        try:
+            items[int(product_id)] = int(quantity)
+        except (TypeError, ValueError):
+            continue
+    return items
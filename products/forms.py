@@ -6,6 +6,7 @@ class ProductForm(forms.ModelForm):
     name = forms.CharField(required=True)
     description = forms.CharField(required=True, widget=forms.Textarea)
     price = forms.DecimalField(required=True, min_value=0)
+    stock = forms.IntegerField(required=True, min_value=0, initial=1)
     image = forms.ImageField(required=True)
 
     class Meta:
@@ -14,11 +15,13 @@ class ProductForm(forms.ModelForm):
             "name",
             "description",
             "price",
+            "stock",
             "image",
         ]
         widgets = {
             "name": forms.TextInput(attrs={"class": "form-control", "placeholder": "Product name"}),
             "description": forms.Textarea(attrs={"class": "form-control", "rows": 4, "placeholder": "Product description"}),
             "price": forms.NumberInput(attrs={"class": "form-control", "placeholder": "Price in ₹"}),
+            "stock": forms.NumberInput(attrs={"class": "form-control", "placeholder": "Units available"}),
             "image": forms.FileInput(attrs={"class": "form-control"}),
         }
\ No newline at end of file
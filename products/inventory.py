@@ -0,0 +1,137 @@
+"""
+Stock counters and expiring reservations.
+
+Product.stock is only ever changed with conditional UPDATEs
+(`SET stock = stock - n WHERE stock >= n`), so concurrent buyers can never
+drive it below zero and no read-modify-write race can lose an update.
+Callers that touch several products do so in id order, which keeps lock
+acquisition deterministic.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Product, StockReservation
+from .signals import products_changed
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_ids):
+        super().__init__("Some products are out of stock.")
+        self.product_ids = list(product_ids)
+
+
+def take_stock(product_id, quantity):
+    """Subtract `quantity` units if available; return whether it succeeded."""
+    taken = Product.objects.filter(id=product_id, stock__gte=quantity).update(
+        stock=F("stock") - quantity, updated_at=timezone.now()
+    )
+    if taken:
+        _notify([product_id])
+    return bool(taken)
+
+
+def return_stock(quantities):
+    """Add units back, given {product_id: quantity}."""
+    now = timezone.now()
+    for product_id in sorted(quantities):
+        Product.objects.filter(id=product_id).update(
+            stock=F("stock") + quantities[product_id], updated_at=now
+        )
+    _notify(list(quantities))
+
+
+def reserve(user, items):
+    """
+    Hold `items` ({product_id: quantity}) for `user` for
+    settings.STOCK_RESERVATION_MINUTES, replacing their previous holds.
+
+    Raises OutOfStock, holding nothing, if any product lacks the units.
+    """
+    expires_at = timezone.now() + timedelta(minutes=settings.STOCK_RESERVATION_MINUTES)
+    with transaction.atomic():
+        _release(
+            StockReservation.objects.select_for_update()
+            .filter(user=user, expires_at__gt=timezone.now())
+        )
+
+        missing = [
+            product_id for product_id in sorted(items)
+            if not take_stock(product_id, items[product_id])
+        ]
+        if missing:
+            # Raising rolls back the units already taken above.
+            raise OutOfStock(missing)
+
+        return StockReservation.objects.bulk_create([
+            StockReservation(user=user, product_id=product_id, quantity=quantity, expires_at=expires_at)
+            for product_id, quantity in items.items()
+        ])
+
+
+def consume_reservations(user, product_ids):
+    """
+    Delete `user`'s live reservations for `product_ids` and return
+    {product_id: quantity} they held. Call inside the checkout transaction.
+    """
+    reservations = list(
+        StockReservation.objects.select_for_update()
+        .filter(user=user, product_id__in=product_ids, expires_at__gt=timezone.now())
+        .order_by("id")
+    )
+    held = {}
+    for reservation in reservations:
+        held[reservation.product_id] = held.get(reservation.product_id, 0) + reservation.quantity
+    StockReservation.objects.filter(id__in=[reservation.id for reservation in reservations]).delete()
+    return held
+
+
+def release_expired_reservations(batch_size=500, now=None):
+    """Return the stock of expired reservations, `batch_size` rows per transaction."""
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            # SKIP LOCKED lets several sweepers run, and never waits on a
+            # checkout that is consuming a reservation right now. A short
+            # batch may just mean rows were locked, so stop only when none
+            # unlocked are left.
+            ids = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(expires_at__lte=now)
+                .order_by("expires_at", "id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return released
+            released += _release(StockReservation.objects.select_for_update().filter(id__in=ids))
+
+
+def _release(reservations):
+    """
+    Delete `reservations` and give their units back.
+
+    `reservations` must be a select_for_update() queryset: the rows are locked
+    before their quantities are read, so a concurrent consume_reservations
+    either finishes first (and the rows are gone by the time the lock is
+    granted) or waits, and no unit is refunded that a checkout also used.
+    """
+    rows = list(reservations.order_by("id").values_list("id", "product_id", "quantity"))
+    if not rows:
+        return 0
+    quantities = {}
+    for _, product_id, quantity in rows:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    StockReservation.objects.filter(id__in=[row[0] for row in rows]).delete()
+    return_stock(quantities)
+    return len(rows)
+
+
+def _notify(product_ids):
+    transaction.on_commit(
+        lambda: products_changed.send(sender=Product, product_ids=list(product_ids), fields=["stock"])
+    )
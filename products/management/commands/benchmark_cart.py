@@ -0,0 +1,110 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from products.cart import DatabaseCartStorage, SessionCartStorage, SignedCookieCartStorage
+from products.models import Product
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure add-to-cart throughput for each cart storage backend. Each add "
+        "includes the work a real request would do to persist it (saving the "
+        "session, writing the cookie, or the CartItem UPDATE/INSERT). Runs inside "
+        "a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--adds", type=int, default=500, help="Adds per backend.")
+        parser.add_argument(
+            "--session-engine",
+            action="append",
+            dest="session_engines",
+            help=(
+                "Session engine(s) to benchmark SessionCartStorage with "
+                "(default: the database and cached_db engines)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        product_ids = list(
+            Product.objects.filter(verification_status=Product.VerificationStatus.VERIFIED)
+            .order_by("id")
+            .values_list("id", flat=True)[:20]
+        )
+        if not product_ids:
+            raise CommandError("Need at least one verified product to add to carts.")
+
+        adds = options["adds"]
+        engines = options["session_engines"] or [
+            "django.contrib.sessions.backends.db",
+            "django.contrib.sessions.backends.cached_db",
+        ]
+
+        results = []
+        try:
+            with transaction.atomic():
+                for engine in engines:
+                    results.append((f"session ({engine.rsplit('.', 1)[-1]})",
+                                    self._bench_session(engine, product_ids, adds)))
+                results.append(("signed cookie", self._bench_cookie(product_ids, adds)))
+                results.append(("database (CartItem)", self._bench_database(product_ids, adds)))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        for label, elapsed in results:
+            self.stdout.write(
+                f"{label:<28} {adds / elapsed:>10.0f} adds/s  ({elapsed * 1000 / adds:.3f} ms/add)"
+            )
+
+    def _bench_session(self, engine, product_ids, adds):
+        store_class = import_module(engine).SessionStore
+        request = RequestFactory().get("/")
+        request.session = store_class()
+        request.session.save()
+
+        start = time.perf_counter()
+        for i in range(adds):
+            # A fresh store per add, as each request would load and save it.
+            request.session = store_class(request.session.session_key)
+            SessionCartStorage(request).add(product_ids[i % len(product_ids)], 1)
+            request.session.save()
+        return time.perf_counter() - start
+
+    def _bench_cookie(self, product_ids, adds):
+        factory = RequestFactory()
+        cookie = None
+
+        start = time.perf_counter()
+        for i in range(adds):
+            request = factory.get("/")
+            if cookie is not None:
+                request.COOKIES[settings.CART_COOKIE_NAME] = cookie
+            storage = SignedCookieCartStorage(request)
+            storage.add(product_ids[i % len(product_ids)], 1)
+            response = HttpResponse()
+            storage.update_response(response)
+            cookie = response.cookies[settings.CART_COOKIE_NAME].value
+        return time.perf_counter() - start
+
+    def _bench_database(self, product_ids, adds):
+        user = get_user_model().objects.create_user(
+            email="cart-benchmark@example.invalid", password=None, role="BUYER"
+        )
+        storage = DatabaseCartStorage(user)
+
+        start = time.perf_counter()
+        for i in range(adds):
+            storage.add(product_ids[i % len(product_ids)], 1)
+        return time.perf_counter() - start
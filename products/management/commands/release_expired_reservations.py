@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from products.inventory import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = (
+        "Return the stock held by expired reservations. Safe to run from cron "
+        "every minute, and in parallel: rows are claimed with SKIP LOCKED."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Reservations released per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        released = release_expired_reservations(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired reservation(s)."))
@@ -0,0 +1,12 @@
+class CartCookieMiddleware:
+    """Write pending guest-cart changes (SignedCookieCartStorage) to the response."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        storage = getattr(request, "_cart_cookie_storage", None)
+        if storage is not None:
+            storage.update_response(response)
+        return response
@@ -0,0 +1,95 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+CREATE_SEARCH_TRIGGER = """
+CREATE OR REPLACE FUNCTION products_product_search_vector(name text, description text, cultural_story text)
+RETURNS tsvector
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A')
+        || setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')
+        || setweight(to_tsvector('english'::regconfig, coalesce(cultural_story, '')), 'C')
+$$;
+
+CREATE OR REPLACE FUNCTION products_product_search_vector_update()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := products_product_search_vector(NEW.name, NEW.description, NEW.cultural_story);
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS products_product_search_vector_update ON products_product;
+CREATE TRIGGER products_product_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, description, cultural_story ON products_product
+    FOR EACH ROW EXECUTE FUNCTION products_product_search_vector_update();
+"""
+
+DROP_SEARCH_TRIGGER = """
+DROP TRIGGER IF EXISTS products_product_search_vector_update ON products_product;
+DROP FUNCTION IF EXISTS products_product_search_vector_update();
+DROP FUNCTION IF EXISTS products_product_search_vector(text, text, text);
+"""
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """Populate search_vector for existing rows, one committed batch at a time."""
+    last_id = 0
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                """
+                WITH batch AS (
+                    SELECT id FROM products_product
+                    WHERE id > %s
+                    ORDER BY id
+                    LIMIT %s
+                )
+                UPDATE products_product AS product
+                SET search_vector = products_product_search_vector(
+                    product.name, product.description, product.cultural_story
+                )
+                FROM batch
+                WHERE product.id = batch.id
+                RETURNING product.id
+                """,
+                [last_id, BACKFILL_BATCH_SIZE],
+            )
+            updated_ids = [row[0] for row in cursor.fetchall()]
+            if not updated_ids:
+                break
+            last_id = max(updated_ids)
+
+
+class Migration(migrations.Migration):
+    """Add a trigger-maintained weighted tsvector for catalogue search."""
+
+    # Backfill batches commit independently and the GIN index is built
+    # concurrently, so the table is never locked for the whole run.
+    atomic = False
+
+    dependencies = [
+        ('products', '0004_auto_approve_products_by_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            sql=CREATE_SEARCH_TRIGGER,
+            reverse_sql=DROP_SEARCH_TRIGGER,
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+        ),
+    ]
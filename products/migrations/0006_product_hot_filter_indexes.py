@@ -0,0 +1,36 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Composite and partial indexes for the marketplace, artisan and review-queue listings."""
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('products', '0005_product_search_vector'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('verification_status', 'VERIFIED')), fields=['-created_at', '-id'], name='product_verified_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('verification_status', 'VERIFIED')), fields=['price', 'id'], name='product_verified_price_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('verification_status', 'VERIFIED')), fields=['name', 'id'], name='product_verified_name_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('verification_status', 'PENDING')), fields=['-created_at', '-id'], name='product_pending_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['artisan', '-created_at'], name='product_artisan_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Partial index backing the marketplace's ?in_stock=true filter."""
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('products', '0009_product_stock_stockreservation'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__gt', 0), ('verification_status', 'VERIFIED')), fields=['-created_at', '-id'], name='product_verified_instock_idx'),
+        ),
+    ]
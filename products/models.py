@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 
@@ -21,8 +23,20 @@ class Product(models.Model):
 
     image = models.ImageField(upload_to="product_images/")
 
+    # Units available to buy; most pieces are one-of-a-kind. Only changed with
+    # conditional F() updates in products/inventory.py.
+    stock = models.PositiveIntegerField(default=1)
+
+    # Buyer ratings, maintained incrementally by reviews/ratings.py so product
+    # cards never aggregate the reviews table. `rating` is rating_sum /
+    # rating_count, or NULL while there are no ratings.
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True, editable=False)
+
     is_approved = models.BooleanField(default=True)  # Auto-approved; marketplace visibility gated by consultant verification
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     # Cultural Story Fields
     region = models.CharField(
@@ -73,5 +87,122 @@ class Product(models.Model):
         help_text="When verification decision was made"
     )
 
+    # Review work-queue lease (products/review_queue.py): the consultant who
+    # claimed this PENDING product and when the claim lapses.
+    review_claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="review_claims",
+        editable=False
+    )
+    review_claim_expires_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Weighted tsvector over name/description/cultural_story, kept in sync by a
+    # database trigger; see products/search.py.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="product_search_vector_gin"),
+            # Public marketplace: VERIFIED rows by recency, price or name, with
+            # id as the keyset-pagination tiebreaker.
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(verification_status="VERIFIED"),
+                name="product_verified_recent_idx",
+            ),
+            models.Index(
+                fields=["price", "id"],
+                condition=models.Q(verification_status="VERIFIED"),
+                name="product_verified_price_idx",
+            ),
+            models.Index(
+                fields=["name", "id"],
+                condition=models.Q(verification_status="VERIFIED"),
+                name="product_verified_name_idx",
+            ),
+            # Marketplace with ?in_stock=true.
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(verification_status="VERIFIED", stock__gt=0),
+                name="product_verified_instock_idx",
+            ),
+            # Marketplace with ?ordering=-rating / ?min_rating=.
+            models.Index(
+                models.F("rating").desc(nulls_last=True),
+                models.F("id").desc(),
+                condition=models.Q(verification_status="VERIFIED"),
+                name="product_verified_rating_idx",
+            ),
+            # Consultant review queue.
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(verification_status="PENDING"),
+                name="product_pending_recent_idx",
+            ),
+            # Artisan profile and dashboard pages.
+            models.Index(
+                fields=["artisan", "-created_at"],
+                name="product_artisan_recent_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+class CartItem(models.Model):
+    """One line of a logged-in user's cart (see products/cart.py)."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="cart_items"
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="cart_items"
+    )
+    quantity = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "product"], name="cartitem_user_product_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} x{self.quantity} {self.product}"
+
+
+class StockReservation(models.Model):
+    """
+    Stock held for a buyer between reserving their cart and checking out.
+
+    The units are already subtracted from Product.stock; checkout consumes the
+    reservation, and release_expired_reservations gives expired ones back.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="stock_reservations"
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="reservations"
+    )
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["expires_at", "id"], name="reservation_expiry_idx"),
+            models.Index(fields=["user", "product"], name="reservation_user_product_idx"),
+        ]
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f"{self.quantity} x {self.product} for {self.user} until {self.expires_at}"
@@ -0,0 +1,103 @@
+"""
+Bulk consultant/admin decisions.
+
+`apply_decisions` records many verify/reject decisions with one
+`SELECT ... FOR UPDATE` and one `bulk_update`, in a single transaction.
+bulk_update skips the post_save signals that single saves rely on, so the
+same follow-up work is done explicitly: certificates are issued or revoked
+in the transaction and `products_changed` is sent once it commits.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from authenticity.certificates import issue_certificates, revoke_certificates
+
+from .models import Product
+from .review_queue import ClaimHeld, check_claim
+from .signals import products_changed
+
+# Upper bound for one bulk request.
+MAX_DECISIONS = 500
+
+UPDATED = "updated"
+NOT_FOUND = "not_found"
+CLAIM_HELD = "claim_held"
+
+DECISION_FIELDS = [
+    "verification_status", "verification_note", "impact_score", "is_approved", "is_verified",
+    "verified_at", "verified_by", "review_claimed_by", "review_claim_expires_at", "updated_at",
+]
+
+
+def apply_decisions(reviewer, decisions, respect_claims=True):
+    """
+    Apply `decisions`, dicts with `id` and `verification_status` (VERIFIED or
+    REJECTED) and optionally `verification_note` and `impact_score`.
+
+    Returns one `{"id", "status", "verification_status"}` result per
+    decision, in order. Products that do not exist, or (with
+    `respect_claims`) are claimed by another consultant, are skipped. Each
+    product may appear only once; ValueError is raised otherwise.
+    """
+    ids = [decision["id"] for decision in decisions]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Each product may appear only once.")
+
+    now = timezone.now()
+    verified = Product.VerificationStatus.VERIFIED
+    results = []
+
+    with transaction.atomic():
+        products = Product.objects.select_for_update().filter(id__in=ids).order_by("id").in_bulk()
+
+        changed = []
+        newly_verified = []
+        unverified = []
+        for decision in decisions:
+            product = products.get(decision["id"])
+            if product is None:
+                results.append({"id": decision["id"], "status": NOT_FOUND, "verification_status": None})
+                continue
+            if respect_claims:
+                try:
+                    check_claim(product, reviewer)
+                except ClaimHeld:
+                    results.append({
+                        "id": product.pk, "status": CLAIM_HELD,
+                        "verification_status": product.verification_status,
+                    })
+                    continue
+
+            previous = product.verification_status
+            product.verification_status = decision["verification_status"]
+            product.is_approved = product.is_verified = product.verification_status == verified
+            product.verified_at = now
+            product.verified_by = reviewer
+            if "verification_note" in decision:
+                product.verification_note = decision["verification_note"]
+            if "impact_score" in decision:
+                product.impact_score = decision["impact_score"]
+            product.review_claimed_by = None
+            product.review_claim_expires_at = None
+            product.updated_at = now
+            changed.append(product)
+
+            if product.verification_status == verified and previous != verified:
+                newly_verified.append(product)
+            elif previous == verified and product.verification_status != verified:
+                unverified.append(product.pk)
+            results.append({
+                "id": product.pk, "status": UPDATED, "verification_status": product.verification_status,
+            })
+
+        if changed:
+            Product.objects.bulk_update(changed, DECISION_FIELDS)
+            issue_certificates(newly_verified)
+            revoke_certificates(unverified)
+            changed_ids = [product.pk for product in changed]
+            transaction.on_commit(
+                lambda: products_changed.send(sender=Product, product_ids=changed_ids, fields=DECISION_FIELDS)
+            )
+
+    return results
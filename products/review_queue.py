@@ -0,0 +1,115 @@
+"""
+Consultant review work queue.
+
+Instead of every consultant working from the same PENDING list, each one
+claims the next products with `SELECT ... FOR UPDATE SKIP LOCKED` and holds
+them under a lease of settings.REVIEW_CLAIM_MINUTES. Concurrent claimers
+skip each other's locked rows, so no product is handed to two consultants.
+A lapsed lease needs no sweeper: an expired claim simply counts as
+unclaimed the next time anyone asks. Verification by anyone other than
+the claim holder is refused while the lease lasts.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Product
+
+
+class ClaimHeld(Exception):
+    def __init__(self, product):
+        super().__init__("This product is claimed by another consultant.")
+        self.product_id = product.pk
+        self.expires_at = product.review_claim_expires_at
+
+
+def claimable(consultant, now=None):
+    """PENDING products that are unclaimed, lapsed, or already `consultant`'s."""
+    now = now or timezone.now()
+    return Product.objects.filter(
+        verification_status=Product.VerificationStatus.PENDING
+    ).filter(
+        Q(review_claimed_by__isnull=True)
+        | Q(review_claim_expires_at__lte=now)
+        | Q(review_claimed_by=consultant)
+    )
+
+
+def claimed_by(consultant, now=None):
+    """`consultant`'s live claims, oldest product first."""
+    now = now or timezone.now()
+    return Product.objects.filter(
+        verification_status=Product.VerificationStatus.PENDING,
+        review_claimed_by=consultant,
+        review_claim_expires_at__gt=now,
+    ).order_by("created_at", "id")
+
+
+def claim_products(consultant, count, region=None, strict=False):
+    """
+    Claim up to `count` products for `consultant`, oldest first, and return
+    the ids of everything they now hold (claims they already had are renewed
+    and count towards `count`).
+
+    With `region`, products from that region come first; `strict` claims
+    nothing else.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(minutes=settings.REVIEW_CLAIM_MINUTES)
+
+    with transaction.atomic():
+        ids = []
+        passes = [Q(region__iexact=region)] if region else []
+        if not region or not strict:
+            passes.append(Q())
+        for condition in passes:
+            if len(ids) >= count:
+                break
+            ids += list(
+                claimable(consultant, now)
+                .filter(condition)
+                .exclude(id__in=ids)
+                .select_for_update(skip_locked=True)
+                .order_by("created_at", "id")
+                .values_list("id", flat=True)[:count - len(ids)]
+            )
+        if ids:
+            Product.objects.filter(id__in=ids).update(
+                review_claimed_by=consultant, review_claim_expires_at=expires_at
+            )
+    return ids
+
+
+def release_claims(consultant, product_ids=None):
+    """Give back `consultant`'s claims (all of them by default)."""
+    claims = Product.objects.filter(review_claimed_by=consultant)
+    if product_ids is not None:
+        claims = claims.filter(id__in=list(product_ids))
+    return claims.update(review_claimed_by=None, review_claim_expires_at=None)
+
+
+def check_claim(product, consultant):
+    """Raise ClaimHeld if someone other than `consultant` holds a live claim on `product`."""
+    if (
+        product.review_claimed_by_id is not None
+        and product.review_claimed_by_id != consultant.pk
+        and product.review_claim_expires_at is not None
+        and product.review_claim_expires_at > timezone.now()
+    ):
+        raise ClaimHeld(product)
+
+
+def lock_for_review(product_id, consultant):
+    """
+    Lock a product row for a verification decision and check the claim.
+
+    Call inside a transaction; the row lock makes concurrent decisions on
+    the same product run one after the other.
+    """
+    product = Product.objects.select_for_update().get(id=product_id)
+    check_claim(product, consultant)
+    return product
@@ -0,0 +1,39 @@
+"""
+Full-text search over the product catalogue.
+
+`Product.search_vector` is maintained by a database trigger (see migration
+0005) so it stays in sync on `save()`, `bulk_update()` and `QuerySet.update()`
+alike. Name matches are weighted A, description B and cultural story C.
+"""
+
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField, Value
+
+SEARCH_CONFIG = 'english'
+
+# Anything that is not whitespace or a tsquery operator counts as a term.
+# Apostrophes are dropped first so "artisan's" stays a single term.
+_TERM_RE = re.compile(r"[^\s\"&|!():*<>\\]+")
+
+
+def build_search_query(text):
+    """Turn free text into a prefix-matching tsquery, or None if it has no terms."""
+    terms = _TERM_RE.findall((text or '').replace("'", ''))
+    if not terms:
+        return None
+
+    raw_query = ' & '.join(f"'{term}':*" for term in terms)
+    return SearchQuery(raw_query, search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_products(queryset, text):
+    """Filter `queryset` to products matching `text`, annotated with `search_rank`."""
+    query = build_search_query(text)
+    if query is None:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+    )
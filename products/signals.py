@@ -0,0 +1,15 @@
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import Signal, receiver
+
+from .cart import merge_guest_cart
+
+# Sent with `product_ids` after queryset.update() calls that change products
+# without post_save (stock counters, bulk moderation), once the transaction
+# commits. `fields` names the columns that changed.
+products_changed = Signal()
+
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    if request is not None:
+        merge_guest_cart(request, user)
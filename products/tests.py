@@ -1,3 +1,502 @@
-from django.test import TestCase
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F, QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User
+
+from . import inventory
+from .cart import CartService, DatabaseCartStorage, SignedCookieCartStorage, merge_guest_cart
+from .models import CartItem, Product, StockReservation
+from .moderation import apply_decisions
+from .review_queue import ClaimHeld, claim_products, lock_for_review
+from .search import search_products
+
+
+def make_artisan(email="artisan@example.com"):
+    return User.objects.create_user(email=email, password="pass", role=Role.ARTISAN)
+
+
+def make_product(artisan, **fields):
+    fields.setdefault("name", "Terracotta lamp")
+    fields.setdefault("description", "Hand-thrown lamp")
+    fields.setdefault("price", Decimal("250.00"))
+    fields.setdefault("image", "product_images/lamp.jpg")
+    fields.setdefault("verification_status", Product.VerificationStatus.VERIFIED)
+    return Product.objects.create(artisan=artisan, **fields)
+
+
+class ReservationTests(TestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email="buyer@example.com", password="pass", role=Role.BUYER)
+        self.product = make_product(make_artisan(), stock=5)
+
+    def stock(self):
+        return Product.objects.values_list("stock", flat=True).get(id=self.product.id)
+
+    def test_reserve_replaces_previous_hold(self):
+        inventory.reserve(self.buyer, {self.product.id: 2})
+        inventory.reserve(self.buyer, {self.product.id: 3})
+
+        self.assertEqual(self.stock(), 2)
+        self.assertEqual(StockReservation.objects.get().quantity, 3)
+
+    def test_out_of_stock_holds_nothing(self):
+        inventory.reserve(self.buyer, {self.product.id: 2})
+
+        with self.assertRaises(inventory.OutOfStock):
+            inventory.reserve(self.buyer, {self.product.id: 6})
+
+        self.assertEqual(self.stock(), 3)
+        self.assertEqual(StockReservation.objects.get().quantity, 2)
+
+    def test_release_expired_returns_stock(self):
+        inventory.reserve(self.buyer, {self.product.id: 2})
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(inventory.release_expired_reservations(), 1)
+        self.assertEqual(self.stock(), 5)
+        self.assertFalse(StockReservation.objects.exists())
+
+
+class ConcurrentReservationTests(TransactionTestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email="buyer@example.com", password="pass", role=Role.BUYER)
+        self.product = make_product(make_artisan(), stock=5)
+
+    def test_reserve_does_not_refund_hold_consumed_by_checkout(self):
+        inventory.reserve(self.buyer, {self.product.id: 2})
+        consumed = threading.Event()
+        finish = threading.Event()
+        held = {}
+
+        def checkout():
+            try:
+                with transaction.atomic():
+                    held.update(inventory.consume_reservations(self.buyer, [self.product.id]))
+                    consumed.set()
+                    finish.wait(5)
+            finally:
+                connection.close()
+
+        def rereserve():
+            close_old_connections()
+            try:
+                inventory.reserve(self.buyer, {self.product.id: 1})
+            finally:
+                connection.close()
+
+        checkout_thread = threading.Thread(target=checkout)
+        checkout_thread.start()
+        self.assertTrue(consumed.wait(5))
+        reserve_thread = threading.Thread(target=rereserve)
+        reserve_thread.start()
+        # reserve() now waits on the rows the checkout has locked.
+        reserve_thread.join(0.5)
+        finish.set()
+        checkout_thread.join()
+        reserve_thread.join()
+
+        self.assertEqual(held, {self.product.id: 2})
+        # 5 - 2 held by the checkout - 1 newly reserved; the consumed hold is
+        # not given back a second time.
+        self.assertEqual(Product.objects.get(id=self.product.id).stock, 2)
+        self.assertEqual(StockReservation.objects.get().quantity, 1)
+
+
+class ReviewQueueLoadTests(TransactionTestCase):
+    """Many consultants working one pending queue in parallel review every product exactly once."""
+
+    regions = ("Odisha", "Kutch", "Bengal", "Kashmir")
+
+    def setUp(self):
+        self.consultants = [
+            User.objects.create_user(
+                email=f"consultant{index}@example.com",
+                password="pass",
+                role=Role.CONSULTANT,
+                region=self.regions[index % len(self.regions)],
+            )
+            for index in range(16)
+        ]
+        artisan = make_artisan()
+        self.product_ids = {
+            product.id
+            for product in Product.objects.bulk_create(
+                Product(
+                    artisan=artisan,
+                    name=f"Piece {index}",
+                    price=Decimal(100 + index % 50),
+                    image="product_images/piece.jpg",
+                    region=self.regions[index % len(self.regions)],
+                )
+                for index in range(800)
+            )
+        }
+
+    def review(self, consultant, decisions, conflicts):
+        while ids := claim_products(consultant, 10, region=consultant.region):
+            for product_id in ids:
+                with transaction.atomic():
+                    product = lock_for_review(product_id, consultant)
+                    if product.verification_status != Product.VerificationStatus.PENDING:
+                        # Someone else already decided: a duplicate review.
+                        conflicts.append(product_id)
+                        continue
+                    product.verification_status = Product.VerificationStatus.VERIFIED
+                    product.verified_by = consultant
+                    product.verified_at = timezone.now()
+                    product.review_claimed_by = None
+                    product.review_claim_expires_at = None
+                    product.save(update_fields=[
+                        "verification_status", "verified_by", "verified_at",
+                        "review_claimed_by", "review_claim_expires_at", "updated_at",
+                    ])
+                decisions[product_id] += 1
+
+    def test_parallel_consultants_review_each_product_once(self):
+        decisions = Counter()
+        conflicts = []
+        errors = []
+
+        def work(consultant):
+            try:
+                self.review(consultant, decisions, conflicts)
+            except ClaimHeld as exc:
+                conflicts.append(exc.product_id)
+            except Exception as exc:  # noqa: BLE001 - reported below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(self.consultants)) as pool:
+            list(pool.map(work, self.consultants))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(errors, [])
+        self.assertEqual(conflicts, [])
+        self.assertEqual(set(decisions), self.product_ids)
+        self.assertEqual([pk for pk, count in decisions.items() if count > 1], [])
+        self.assertFalse(Product.objects.filter(verification_status=Product.VerificationStatus.PENDING).exists())
+        # Reviews per second. A generous floor, around a fifth of what this
+        # sustains locally: it catches claimers queueing on each other's
+        # locks, not jitter.
+        self.assertGreater(len(decisions) / elapsed, 25)
+
+
+class ReservationSweepTests(TransactionTestCase):
+    def test_sweep_continues_past_locked_rows(self):
+        product = make_product(make_artisan(), stock=10)
+        buyers = [
+            User.objects.create_user(email=f"buyer{index}@example.com", password="pass", role=Role.BUYER)
+            for index in range(5)
+        ]
+        for index, buyer in enumerate(buyers):
+            inventory.reserve(buyer, {product.id: 1})
+            StockReservation.objects.filter(user=buyer).update(
+                expires_at=timezone.now() - timedelta(minutes=10 - index)
+            )
+        # The two oldest holds are being consumed by a checkout.
+        locked_ids = list(StockReservation.objects.order_by("expires_at").values_list("id", flat=True)[:2])
+        locked = threading.Event()
+        finish = threading.Event()
+
+        def checkout():
+            try:
+                with transaction.atomic():
+                    list(StockReservation.objects.select_for_update().filter(id__in=locked_ids))
+                    locked.set()
+                    finish.wait(5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=checkout)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(5))
+            released = inventory.release_expired_reservations(batch_size=2)
+        finally:
+            finish.set()
+            thread.join()
+
+        self.assertEqual(released, 3)
+        self.assertEqual(sorted(StockReservation.objects.values_list("id", flat=True)), sorted(locked_ids))
+        self.assertEqual(Product.objects.get(id=product.id).stock, 8)
+
+
+class ApplyDecisionsTests(TestCase):
+    def test_duplicate_ids_are_refused(self):
+        product = make_product(make_artisan(), verification_status=Product.VerificationStatus.PENDING)
+        consultant = User.objects.create_user(email="consultant@example.com", password="pass", role=Role.CONSULTANT)
+        decisions = [
+            {"id": product.id, "verification_status": Product.VerificationStatus.VERIFIED},
+            {"id": product.id, "verification_status": Product.VerificationStatus.REJECTED},
+        ]
+
+        with self.assertRaises(ValueError):
+            apply_decisions(consultant, decisions)
+
+        product.refresh_from_db()
+        self.assertEqual(product.verification_status, Product.VerificationStatus.PENDING)
+
+
+def guest_cart_cookie(items):
+    """Return the signed cookie value a guest with cart `items` would send."""
+    storage = SignedCookieCartStorage(RequestFactory().get("/"))
+    for product_id, quantity in items.items():
+        storage.set_quantity(product_id, quantity)
+    response = HttpResponse()
+    storage.update_response(response)
+    return response.cookies[settings.CART_COOKIE_NAME].value
+
+
+class CartResolveTests(TestCase):
+    def setUp(self):
+        artisan = make_artisan()
+        self.lamp = make_product(artisan)
+        self.pending = make_product(artisan, name="Pending", verification_status=Product.VerificationStatus.PENDING)
+        self.buyer = User.objects.create_user(email="buyer@example.com", password="pass", role=Role.BUYER)
+
+    def request(self, user):
+        request = RequestFactory().get("/cart/")
+        request.user = user
+        request.COOKIES[settings.CART_COOKIE_NAME] = guest_cart_cookie(
+            {self.lamp.id: 2, self.pending.id: 1, 999999: 4}
+        )
+        return request
+
+    def test_guest_cart_drops_deleted_and_unverified_products(self):
+        service = CartService(self.request(AnonymousUser()))
+
+        with self.assertNumQueries(1):
+            cart = service.resolve()
+
+        self.assertEqual([(product, product.quantity) for product in cart], [(self.lamp, 2)])
+        self.assertEqual(cart.total, Decimal("500.00"))
+        self.assertEqual(service.get_items(), {self.lamp.id: 2})
+
+    def test_stored_cart_drops_products_rejected_or_deleted_since(self):
+        storage = DatabaseCartStorage(self.buyer)
+        retired = make_product(self.lamp.artisan, name="Retired")
+        for product in (self.lamp, self.pending, retired):
+            storage.add(product.id, 1)
+        Product.objects.filter(pk=self.lamp.pk).update(verification_status=Product.VerificationStatus.REJECTED)
+        retired.delete()
+        self.pending.verification_status = Product.VerificationStatus.VERIFIED
+        self.pending.save()
+
+        cart = CartService(self.request(self.buyer)).resolve()
+
+        self.assertEqual([product.id for product in cart], [self.pending.id])
+        self.assertEqual(storage.get_items(), {self.pending.id: 1})
+
+
+class GuestCartMergeTests(TestCase):
+    def setUp(self):
+        artisan = make_artisan()
+        self.lamp = make_product(artisan, stock=5)
+        self.bowl = make_product(artisan, name="Bowl", stock=3)
+        self.sold_out = make_product(artisan, name="Sold out", stock=0)
+        self.buyer = User.objects.create_user(email="buyer@example.com", password="pass", role=Role.BUYER)
+        CartItem.objects.create(user=self.buyer, product=self.lamp, quantity=2)
+        self.client.cookies[settings.CART_COOKIE_NAME] = guest_cart_cookie(
+            {self.lamp.id: 1, self.bowl.id: 9, self.sold_out.id: 1, 999999: 1}
+        )
+
+    def assertMerged(self, response):
+        self.assertEqual(
+            DatabaseCartStorage(self.buyer).get_items(),
+            {self.lamp.id: 3, self.bowl.id: 3},
+        )
+        # The guest cookie is emptied.
+        self.assertEqual(response.cookies[settings.CART_COOKIE_NAME].value, "")
+
+    def test_session_login_merges_guest_cart(self):
+        response = self.client.post("/login/", {"email": "buyer@example.com", "password": "pass"})
+        self.assertEqual(response.status_code, 302)
+        self.assertMerged(response)
+
+    def test_jwt_login_merges_guest_cart(self):
+        with mock.patch("api.views.verify_captcha", return_value=(True, None)):
+            response = self.client.post(
+                "/api/auth/login/",
+                {"email": "buyer@example.com", "password": "pass", "captcha_token": "token"},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertMerged(response)
+
+    def test_merge_caps_quantities_at_stock(self):
+        CartItem.objects.filter(user=self.buyer).update(quantity=5)
+        request = RequestFactory().post("/login/")
+        request.COOKIES[settings.CART_COOKIE_NAME] = guest_cart_cookie({self.lamp.id: 4, self.bowl.id: 4})
+
+        merge_guest_cart(request, self.buyer)
+
+        self.assertEqual(DatabaseCartStorage(self.buyer).get_items(), {self.lamp.id: 5, self.bowl.id: 3})
+
+
+class DatabaseCartStorageTests(TransactionTestCase):
+    def setUp(self):
+        self.buyer = User.objects.create_user(email="buyer@example.com", password="pass", role=Role.BUYER)
+        self.storage = DatabaseCartStorage(self.buyer)
+
+    def test_missing_product_is_not_taken_for_a_duplicate_line(self):
+        for add in (self.storage.add, self.storage.set_quantity):
+            with self.subTest(method=add.__name__), self.assertRaises(IntegrityError):
+                add(999999, 1)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_line_created_concurrently_is_incremented(self):
+        product = make_product(make_artisan())
+        CartItem.objects.create(user=self.buyer, product=product, quantity=2)
+        update = QuerySet.update
+        calls = []
+
+        def update_missing_first(queryset, **kwargs):
+            # The first update runs before the other request's line exists.
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", update_missing_first):
+            self.storage.add(product.id, 3)
+
+        self.assertEqual(self.storage.get_items(), {product.id: 5})
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        artisan = make_artisan()
+        # Created best match first, so newest-first order is the reverse of relevance.
+        cls.by_name = make_product(artisan, name="Pottery lamp")
+        cls.by_description = make_product(artisan, name="Glazed bowl", description="Wheel-thrown pottery")
+        cls.by_story = make_product(
+            artisan, name="Clay bell", description="Cast bell", cultural_story="Made in a pottery village"
+        )
+        cls.unrelated = make_product(artisan, name="Woven basket", description="Cane basket")
+
+    def search(self, text):
+        return list(search_products(Product.objects.all(), text).order_by("-search_rank", "-created_at"))
+
+    def test_partial_term_matches_by_prefix(self):
+        self.assertEqual(set(self.search("pott")), {self.by_name, self.by_description, self.by_story})
+        self.assertEqual(self.search("pott lam"), [self.by_name])
+        self.assertEqual(self.search("pottery's"), self.search("pottery"))
+
+    def test_name_outranks_description_outranks_story(self):
+        results = self.search("pottery")
+        self.assertEqual(results, [self.by_name, self.by_description, self.by_story])
+        ranks = [product.search_rank for product in results]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        self.assertGreater(ranks[0], ranks[-1])
+
+    def test_queries_without_terms_match_nothing(self):
+        for text in ("", "  ", "&|!"):
+            with self.subTest(text=text):
+                self.assertEqual(self.search(text), [])
+
+    def test_api_orders_by_relevance(self):
+        # Anonymous list responses are cached across requests.
+        cache.clear()
+        response = APIClient().get("/api/products/", {"search": "pott", "ordering": "relevance"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [product["id"] for product in response.data["results"]],
+            [self.by_name.id, self.by_description.id, self.by_story.id],
+        )
+
+    def test_trigger_follows_queryset_update(self):
+        Product.objects.filter(pk=self.unrelated.pk).update(name="Walnut box", description="Carved walnut")
+        self.assertEqual(self.search("walnut"), [self.unrelated])
+        self.assertEqual(self.search("basket"), [])
+
+    def test_trigger_follows_bulk_update(self):
+        self.by_name.name = "Brass lamp"
+        self.unrelated.cultural_story = "Woven by a pottery guild"
+        Product.objects.bulk_update([self.by_name, self.unrelated], ["name", "cultural_story"])
+        self.assertEqual(self.search("brass"), [self.by_name])
+        self.assertEqual(set(self.search("pottery")), {self.by_description, self.by_story, self.unrelated})
+
+
+class HotQueryIndexTests(TestCase):
+    """
+    The marketplace, review-queue and artisan-page queries must be served by
+    the indexes added for them, on a table large enough that the planner
+    would otherwise pick a sequential scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        artisans = [make_artisan(f"artisan{index}@example.com") for index in range(20)]
+        statuses = [Product.VerificationStatus.VERIFIED] * 7 + [
+            Product.VerificationStatus.PENDING,
+            Product.VerificationStatus.PENDING,
+            Product.VerificationStatus.REJECTED,
+        ]
+        Product.objects.bulk_create([
+            Product(
+                artisan=artisans[index % len(artisans)],
+                name=f"Piece {index}",
+                # A spread of terms, so the planner's statistics see "bidriware"
+                # as the rare word it is.
+                description=f"Motif{index % 300} pattern" if index % 500 else "Rare bidriware inlay",
+                price=Decimal(index % 400),
+                stock=index % 3,
+                rating=Decimal(index % 5) if index % 4 else None,
+                image="product_images/piece.jpg",
+                verification_status=statuses[index % len(statuses)],
+            )
+            for index in range(5000)
+        ], batch_size=1000)
+        cls.artisan_id = artisans[0].id
+        with connection.cursor() as cursor:
+            # What autovacuum does on a live table: flush the rows just
+            # inserted out of the GIN pending list, and gather statistics.
+            cursor.execute("SELECT gin_clean_pending_list(%s::regclass)", ["product_search_vector_gin"])
+            cursor.execute("ANALYZE products_product")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotIn("Seq Scan on products_product", plan)
+
+    def test_hot_queries_use_their_indexes(self):
+        verified = Product.objects.filter(verification_status=Product.VerificationStatus.VERIFIED)
+        pending = Product.objects.filter(verification_status=Product.VerificationStatus.PENDING)
+        hot_queries = [
+            (verified.order_by("-created_at", "-id")[:10], "product_verified_recent_idx"),
+            (verified.filter(price__gte=100).order_by("price", "id")[:10], "product_verified_price_idx"),
+            (verified.order_by("name", "id")[:10], "product_verified_name_idx"),
+            (
+                verified.order_by(F("rating").desc(nulls_last=True), "-id")[:10],
+                "product_verified_rating_idx",
+            ),
+            (verified.filter(stock__gt=0).order_by("-created_at", "-id")[:10], "product_verified_instock_idx"),
+            (pending.order_by("-created_at", "-id")[:10], "product_pending_recent_idx"),
+            (
+                Product.objects.filter(artisan_id=self.artisan_id).order_by("-created_at")[:10],
+                "product_artisan_recent_idx",
+            ),
+            (
+                search_products(verified, "bidriware").order_by("-search_rank", "-created_at")[:10],
+                "product_search_vector_gin",
+            ),
+        ]
+        for queryset, index_name in hot_queries:
+            with self.subTest(index=index_name):
+                self.assertUsesIndex(queryset, index_name)
@@ -2,7 +2,10 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.urls import reverse
 from urllib.parse import quote
+import uuid
 from django.contrib.auth.decorators import login_required
+from orders.checkout import CheckoutError, place_order
+from .cart import CartService
 from .forms import ProductForm
 from .models import Product
 
@@ -51,22 +54,18 @@ def product_detail(request, pk):
             next_url = quote(request.get_full_path())
             return redirect(f"{reverse('login')}?next={next_url}")
 
-        cart = request.session.get("cart", {})
+        if product.stock == 0:
+            messages.error(request, f"{product.name} is out of stock.")
+            return redirect("product_detail", pk=pk)
 
-        if str(pk) in cart:
-            cart[str(pk)] += 1
-        else:
-            cart[str(pk)] = 1
-
-        request.session["cart"] = cart
-        request.session.modified = True
+        CartService(request).add(product.id)
 
         messages.success(request, f"{product.name} added to cart!")
         return redirect("product_detail", pk=pk)
 
     context = {
         "product": product,
-        "cart_count": len(request.session.get("cart", {}))
+        "cart_count": len(CartService(request).get_items())
     }
 
     return render(request, "products/product_detail.html", context)
@@ -85,41 +84,44 @@ def add_to_cart(request, product_id):
         id=product_id,
     )
 
-    cart = request.session.get("cart", {})
-
-    if str(product_id) in cart:
-        cart[str(product_id)] += 1
-    else:
-        cart[str(product_id)] = 1
+    if product.stock == 0:
+        messages.error(request, f"{product.name} is out of stock.")
+        return redirect("product_list")
 
-    request.session["cart"] = cart
-    request.session.modified = True
+    CartService(request).add(product.id)
 
     return redirect("product_list")
 
 
 def view_cart(request):
-    cart = request.session.get("cart", {})
-    products = []
-    total = 0
-
-    for product_id, quantity in cart.items():
-        product = Product.objects.get(id=product_id)
-        product.quantity = quantity
-        product.subtotal = product.price * quantity
-        total += product.subtotal
-        products.append(product)
+    cart = CartService(request).resolve()
 
     context = {
-        "products": products,
-        "total": total
+        "products": cart.products,
+        "total": cart.total,
+        # Resubmitting the same checkout form returns the original order.
+        "checkout_key": uuid.uuid4().hex,
     }
 
     return render(request, "products/cart.html", context)
 
 
+@login_required
 def checkout(request):
-    request.session["cart"] = {}
-    request.session.modified = True
-
-    return render(request, "products/payment_success.html")
\ No newline at end of file
+    if request.method != "POST":
+        return redirect("view_cart")
+
+    cart = CartService(request)
+    try:
+        order, created = place_order(
+            request.user,
+            cart.get_items(),
+            idempotency_key=request.POST.get("idempotency_key", "")[:64],
+        )
+    except CheckoutError as exc:
+        messages.error(request, str(exc))
+        return redirect("view_cart")
+
+    cart.clear()
+
+    return render(request, "products/payment_success.html", {"order": order})
\ No newline at end of file
@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import Review
 
-# Register your models here.
+
+@admin.register(Review)
+class ReviewAdmin(admin.ModelAdmin):
+    list_display = ("product", "buyer", "rating", "created_at")
+    list_filter = ("rating", "created_at")
+    search_fields = ("product__name", "buyer__email")
+    ordering = ("-created_at",)
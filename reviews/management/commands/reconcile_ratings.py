@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from reviews.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Product.rating_count, rating_sum and rating from the reviews "
+        "table and fix any product whose counters have drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Products locked and checked per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        fixed = reconcile_ratings(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Reconciled ratings; {fixed} product(s) had drifted."))
@@ -0,0 +1,94 @@
+"""
+Incremental maintenance of Product.rating_count / rating_sum / rating.
+
+Every review change becomes one UPDATE that shifts the counters with F()
+expressions and recomputes the average from the same row values, so
+concurrent reviews of one product never overwrite each other.
+`reconcile_ratings` rebuilds the counters from the reviews table in batches
+to repair any drift.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
+
+from products.models import Product
+from products.signals import products_changed
+
+
+def apply_rating_change(product_id, count_delta, sum_delta):
+    """Shift a product's rating counters by the given deltas."""
+    new_count = F("rating_count") + count_delta
+    new_sum = F("rating_sum") + sum_delta
+    Product.objects.filter(id=product_id).update(
+        rating_count=new_count,
+        rating_sum=new_sum,
+        # The right-hand side sees the row as it was before this UPDATE.
+        rating=Cast(new_sum, DecimalField(max_digits=12, decimal_places=4)) / NullIf(new_count, 0),
+        updated_at=timezone.now(),
+    )
+    _notify([product_id])
+
+
+def reconcile_ratings(batch_size=500):
+    """
+    Recompute the rating columns from Review rows, `batch_size` products per
+    transaction. Returns the number of products that had drifted.
+    """
+    from .models import Review
+
+    fixed = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            # Locking the batch stops a concurrent review from landing
+            # between the aggregate and the write.
+            products = list(
+                Product.objects.select_for_update()
+                .filter(id__gt=last_id)
+                .order_by("id")
+                .only("id", "rating_count", "rating_sum", "rating")[:batch_size]
+            )
+            if not products:
+                return fixed
+            last_id = products[-1].id
+
+            totals = {
+                row["product_id"]: row
+                for row in Review.objects.filter(product__in=products)
+                .order_by()
+                .values("product_id")
+                .annotate(count=Count("id"), total=Sum("rating"))
+            }
+            drifted = []
+            for product in products:
+                row = totals.get(product.id, {"count": 0, "total": 0})
+                rating = average_rating(row["count"], row["total"])
+                if (product.rating_count, product.rating_sum, product.rating) != (row["count"], row["total"], rating):
+                    product.rating_count = row["count"]
+                    product.rating_sum = row["total"]
+                    product.rating = rating
+                    product.updated_at = timezone.now()
+                    drifted.append(product)
+
+            if drifted:
+                Product.objects.bulk_update(drifted, ["rating_count", "rating_sum", "rating", "updated_at"])
+                _notify([product.id for product in drifted])
+                fixed += len(drifted)
+
+
+def average_rating(count, total):
+    if not count:
+        return None
+    return (Decimal(total) / count).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _notify(product_ids):
+    transaction.on_commit(
+        lambda: products_changed.send(
+            sender=Product, product_ids=list(product_ids), fields=["rating_count", "rating_sum", "rating"]
+        )
+    )
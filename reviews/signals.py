@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Review
+from .ratings import apply_rating_change
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = (
+            Review.objects.filter(pk=instance.pk).values_list("rating", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    if created:
+        apply_rating_change(instance.product_id, 1, instance.rating)
+    elif instance._previous_rating is not None and instance._previous_rating != instance.rating:
+        apply_rating_change(instance.product_id, 0, instance.rating - instance._previous_rating)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    # Also runs for cascades, e.g. when the buyer account is deleted.
+    apply_rating_change(instance.product_id, -1, -instance.rating)
@@ -1,3 +1,104 @@
+from decimal import Decimal
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import Role, User
+from products.models import Product
+from products.tests import make_artisan, make_product
+
+from .models import Review
+from .ratings import reconcile_ratings
+
+
+def make_buyers(count):
+    return [
+        User.objects.create_user(email=f"buyer{index}@example.com", password="pass", role=Role.BUYER)
+        for index in range(count)
+    ]
+
+
+class RatingCounterTests(TestCase):
+    def setUp(self):
+        self.product = make_product(make_artisan())
+        self.buyers = make_buyers(3)
+
+    def counters(self):
+        return Product.objects.values_list("rating_count", "rating_sum", "rating").get(pk=self.product.pk)
+
+    def test_unrated_product_has_no_average(self):
+        self.assertEqual(self.counters(), (0, 0, None))
+
+    def test_counters_follow_create_edit_and_delete(self):
+        reviews = [
+            Review.objects.create(product=self.product, buyer=buyer, rating=rating)
+            for buyer, rating in zip(self.buyers, (5, 4, 4))
+        ]
+        self.assertEqual(self.counters(), (3, 13, Decimal("4.33")))
+
+        reviews[1].rating = 1
+        reviews[1].save()
+        self.assertEqual(self.counters(), (3, 10, Decimal("3.33")))
+
+        # Saving without changing the rating leaves the counters alone.
+        reviews[1].comment = "Chipped on arrival"
+        reviews[1].save()
+        self.assertEqual(self.counters(), (3, 10, Decimal("3.33")))
+
+        reviews[0].delete()
+        self.assertEqual(self.counters(), (2, 5, Decimal("2.50")))
+
+        for review in reviews[1:]:
+            review.delete()
+        self.assertEqual(self.counters(), (0, 0, None))
+
+    def test_reconcile_repairs_drifted_counters(self):
+        for buyer, rating in zip(self.buyers[:2], (5, 2)):
+            Review.objects.create(product=self.product, buyer=buyer, rating=rating)
+        untouched = make_product(self.product.artisan, name="Untouched")
+        Product.objects.filter(pk=self.product.pk).update(rating_count=9, rating_sum=1, rating=Decimal("0.11"))
+
+        self.assertEqual(reconcile_ratings(batch_size=1), 1)
+        self.assertEqual(self.counters(), (2, 7, Decimal("3.50")))
+        self.assertEqual(
+            Product.objects.values_list("rating_count", "rating").get(pk=untouched.pk), (0, None)
+        )
+        self.assertEqual(reconcile_ratings(), 0)
+
+
+class RatingFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        artisan = make_artisan()
+        buyers = make_buyers(2)
+        cls.unrated = make_product(artisan, name="Unrated")
+        cls.low = make_product(artisan, name="Low")
+        cls.high = make_product(artisan, name="High")
+        for product, ratings in ((cls.low, (2, 3)), (cls.high, (5, 4))):
+            for buyer, rating in zip(buyers, ratings):
+                Review.objects.create(product=product, buyer=buyer, rating=rating)
+
+    def setUp(self):
+        # Anonymous list responses are cached across requests.
+        cache.clear()
+        self.client = APIClient()
+
+    def names(self, **params):
+        response = self.client.get("/api/products/", params)
+        self.assertEqual(response.status_code, 200)
+        return [product["name"] for product in response.data["results"]]
+
+    def test_ordering_by_rating_puts_unrated_last(self):
+        self.assertEqual(self.names(ordering="-rating"), ["High", "Low", "Unrated"])
+        self.assertEqual(self.names(ordering="rating"), ["Low", "High", "Unrated"])
+
+    def test_min_rating(self):
+        self.assertEqual(self.names(min_rating="4"), ["High"])
+        self.assertEqual(self.names(min_rating="2.5", ordering="-rating"), ["High", "Low"])
+        self.assertEqual(self.client.get("/api/products/", {"min_rating": "high"}).status_code, 400)
 
-# Create your tests here.
+    def test_cursor_pagination_refuses_rating_ordering(self):
+        response = self.client.get("/api/products/", {"pagination": "cursor", "ordering": "-rating"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ordering", str(response.data))